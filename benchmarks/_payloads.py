@@ -0,0 +1,91 @@
+"""Synthetic API payloads shaped and sized like real Luogu responses."""
+import random
+
+_rng = random.Random(0)
+
+def _text(n: int) -> str:
+    return "".join(_rng.choice("abcdefghij 的一是在不了有和人这中大为") for _ in range(n))
+
+def user(uid: int) -> dict:
+    return {
+        "uid": uid, "name": f"user{uid}", "avatar": f"https://cdn.luogu.com.cn/upload/usericon/{uid}.png",
+        "slogan": _text(20), "badge": None, "isAdmin": False, "isBanned": False, "isRoot": False,
+        "color": "Blue", "ccfLevel": 6, "background": "",
+    }
+
+def problem_summary(i: int) -> dict:
+    return {
+        "pid": f"P{1000 + i}", "title": _text(12), "difficulty": i % 8, "type": "P",
+        "submitted": False, "accepted": False, "tags": [_rng.randrange(500) for _ in range(5)],
+        "totalSubmit": 100000 + i, "totalAccepted": 50000 + i, "flag": 1, "fullScore": 100,
+    }
+
+def problem_list_page(n: int = 50) -> dict:
+    return {"problems": [problem_summary(i) for i in range(n)], "count": 10000, "perPage": n}
+
+def problem_detail() -> dict:
+    problem = problem_summary(0)
+    problem.update({
+        "content": {
+            "user": user(1), "version": 3, "name": problem["title"], "background": _text(200),
+            "description": _text(3000), "formatI": _text(300), "formatO": _text(200),
+            "hint": _text(1500), "locale": "zh-CN",
+        },
+        "samples": [[_text(50), _text(20)] for _ in range(3)],
+        "provider": user(1),
+        "attachments": [],
+        "limits": [[1000, 131072] for _ in range(20)],
+        "showScore": True, "score": None, "stdCode": "", "vjudge": None,
+        "acceptLanguages": list(range(30)),
+    })
+    return {
+        "problem": problem,
+        "translations": {},
+        "bookmarked": False,
+        "recommendations": [
+            {k: v for k, v in problem_summary(i).items() if k in ("pid", "title", "difficulty", "type")}
+            for i in range(10)
+        ],
+        "lastLanguage": 28, "lastCode": _text(2000),
+    }
+
+def tags(n: int = 700) -> dict:
+    return {
+        "tags": [{"id": i, "name": _text(4), "type": i % 6, "parent": None if i % 6 else i // 6} for i in range(n)],
+        "types": [{"id": i, "name": _text(3), "color": "#52c41a"} for i in range(6)],
+    }
+
+def record(rid: int) -> dict:
+    return {
+        "id": rid, "time": 120, "memory": 2048, "status": 12, "score": 100, "enableO2": True,
+        "language": 28, "sourceCodeLength": 512, "submitTime": 1700000000 + rid,
+        "problem": {k: v for k, v in problem_summary(rid % 5000).items() if k in ("pid", "title", "difficulty", "type")},
+        "user": user(rid % 1000),
+    }
+
+_users = {}
+
+def known_user(uid: int) -> dict:
+    """A fresh copy of the same user data on every call, as repeated in feeds and replies."""
+    if uid not in _users:
+        _users[uid] = user(uid)
+    return dict(_users[uid])
+
+def activity_page(n: int = 50, authors: int = 10) -> dict:
+    return {
+        "activities": [
+            {"content": _text(100), "id": i, "type": 1, "time": 1700000000 + i, "user": known_user(i % authors)}
+            for i in range(n)
+        ],
+        "count": 1000, "perPage": n,
+    }
+
+def problem_settings(i: int) -> dict:
+    return {
+        "title": _text(12), "background": _text(200), "description": _text(1500),
+        "inputFormat": _text(300), "outputFormat": _text(200),
+        "samples": [[_text(50), _text(20)] for _ in range(2)], "hint": _text(800),
+        "translation": "", "comment": "", "needsTranslation": False, "acceptSolution": True,
+        "allowDataDownload": False, "tags": [_rng.randrange(500) for _ in range(5)],
+        "difficulty": i % 8, "showScore": True, "providerID": 1, "flag": 1,
+    }
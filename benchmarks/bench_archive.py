@@ -0,0 +1,90 @@
+"""
+Storing and reloading a problem mirror: one ``store`` file per problem
+against a single ``ArchiveWriter`` archive (plain, gzip and zstd), read
+back through the memory-mapped ``ArchiveReader``.
+
+    python benchmarks/bench_archive.py [problems]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.archive import ArchiveReader, ArchiveWriter
+from pyLuogu.types import ProblemSettings
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def bench_files(directory: str, problems: dict) -> tuple:
+    target = os.path.join(directory, "files")
+    os.makedirs(target)
+
+    def store():
+        for pid, settings in problems.items():
+            settings.store(os.path.join(target, f"{pid}.json"))
+
+    def load():
+        for pid in problems:
+            ProblemSettings.from_file(os.path.join(target, f"{pid}.json"))
+
+    sample = random.Random(0).sample(list(problems), 200)
+
+    def lookup():
+        for pid in sample:
+            path = os.path.join(target, f"{pid}.json")
+            if os.path.exists(path):
+                ProblemSettings.from_file(path)
+
+    store_time = timed(store)
+    size = sum(os.path.getsize(os.path.join(target, name)) for name in os.listdir(target))
+    return store_time, 0.0, timed(load), timed(lookup) / len(sample), size
+
+def bench_archive(directory: str, problems: dict, compression: str | None) -> tuple:
+    path = os.path.join(directory, f"problems.{compression}.lgar")
+
+    def store():
+        with ArchiveWriter(path, compression=compression) as writer:
+            for pid, settings in problems.items():
+                writer.write(pid, settings)
+
+    def load():
+        with ArchiveReader(path, ProblemSettings) as reader:
+            for _ in reader.values():
+                pass
+
+    sample = random.Random(0).sample(list(problems), 200)
+
+    store_time = timed(store)
+    size = os.path.getsize(path) + os.path.getsize(path + ".idx")
+    open_time = min(timed(lambda: ArchiveReader(path).close()) for _ in range(5))
+    with ArchiveReader(path, ProblemSettings) as reader:
+        lookup = timed(lambda: [reader.get(pid) for pid in sample])
+    return store_time, open_time, timed(load), lookup / len(sample), size
+
+def main(count: int = 5000):
+    problems = {f"P{1000 + i}": ProblemSettings(_payloads.problem_settings(i)) for i in range(count)}
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"{count} problem settings")
+        print(f"{'storage':<14} {'store s':>8} {'open ms':>8} {'reload s':>9} {'get us':>8} {'MiB':>7}")
+        rows = [("files", bench_files(directory, problems))]
+        for compression in (None, "gzip", "zstd"):
+            try:
+                rows.append((f"archive {compression or 'plain'}", bench_archive(directory, problems, compression)))
+            except ImportError as e:
+                print(f"archive {compression}: skipped ({e})")
+        for name, (store, opening, load, lookup, size) in rows:
+            print(f"{name:<14} {store:8.2f} {opening * 1e3:8.1f} {load:9.2f} {lookup * 1e6:8.0f} {size / 2 ** 20:7.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,59 @@
+"""
+Round trips of parsed models through JSON, pickle and msgpack, as done
+when caching objects on disk or handing them to process-pool workers.
+
+``pickle (default)`` is the generic slots pickling used before
+``JsonSerializable.__reduce__`` existed.
+
+    python benchmarks/bench_binary.py [repeat]
+"""
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits import jsonlib
+from pyLuogu.bits.ultility import JsonSerializable, json_dumps_bytes, msgpack_dumps, msgpack_loads
+from pyLuogu.types import ProblemListRequestResponse, ProblemDataRequestResponse, Record
+
+CASES = [
+    ("problem list page (50)", ProblemListRequestResponse, ProblemListRequestResponse(_payloads.problem_list_page())),
+    ("problem detail", ProblemDataRequestResponse, ProblemDataRequestResponse(_payloads.problem_detail())),
+    ("records (50)", [Record], [Record(_payloads.record(rid)) for rid in range(50)]),
+]
+
+def round_trips(shape, obj) -> dict:
+    def from_json(data):
+        value = jsonlib.loads(data)
+        return [shape[0](v) for v in value] if isinstance(shape, list) else shape(value)
+
+    return {
+        "json": (lambda: json_dumps_bytes(obj), from_json),
+        "pickle (default)": (lambda: pickle.dumps(obj, 5), pickle.loads),
+        "pickle": (lambda: pickle.dumps(obj, 5), pickle.loads),
+        "msgpack": (lambda: msgpack_dumps(obj), lambda data: msgpack_loads(data, shape)),
+    }
+
+def main(repeat: int = 5):
+    print(f"{'payload':<24} {'format':<17} {'dump us':>8} {'load us':>8} {'bytes':>7}")
+    reduce = JsonSerializable.__reduce__
+    for name, shape, obj in CASES:
+        for fmt, (dump, load) in round_trips(shape, obj).items():
+            if fmt == "pickle (default)":
+                JsonSerializable.__reduce__ = object.__reduce__
+            try:
+                data = dump()
+                dumped = min(timeit.repeat(dump, number=200, repeat=repeat)) / 200
+                loaded = min(timeit.repeat(lambda: load(data), number=200, repeat=repeat)) / 200
+            except ImportError:
+                print(f"{name:<24} {fmt:<17} skipped, not installed")
+                continue
+            finally:
+                JsonSerializable.__reduce__ = reduce
+            print(f"{name:<24} {fmt:<17} {dumped * 1e6:8.1f} {loaded * 1e6:8.1f} {len(data):7}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
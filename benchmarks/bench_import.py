@@ -0,0 +1,51 @@
+"""
+Cold-start cost of importing pyLuogu.
+
+Every case runs in a fresh interpreter and times only the statement
+itself, so interpreter startup is excluded. Reported is the median over
+``repeat`` runs, with the heavy dependencies the case ended up loading.
+
+    python benchmarks/bench_import.py [repeat]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    "import pyLuogu",
+    "import pyLuogu.types",
+    "from pyLuogu import luoguAPI",
+    "from pyLuogu import asyncLuoguAPI",
+    "from pyLuogu import luogu",
+]
+
+HEAVY = ["httpx", "bs4", "asyncio", "sqlite3", "pyLuogu.types"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed * 1000)
+print(",".join(m for m in {heavy!r} if m in sys.modules) or "-")
+"""
+
+def run(statement: str):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    elapsed, loaded = result.stdout.split()
+    return float(elapsed), loaded
+
+def main(repeat: int = 10):
+    for statement in CASES:
+        samples = [run(statement) for _ in range(repeat)]
+        median = statistics.median(ms for ms, _ in samples)
+        print(f"{statement:<36} {median:8.1f} ms   loads: {samples[-1][1]}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
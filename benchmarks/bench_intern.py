@@ -0,0 +1,49 @@
+"""
+Parsing a crawl of activity feed pages with and without an ``InternTable``.
+
+Every page repeats the same few authors; with interning each author is
+built once and shared. Reports parse time and the memory held by the
+parsed pages.
+
+    python benchmarks/bench_intern.py [pages]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits.ultility import InternTable
+from pyLuogu.types import ActivityRequestResponse
+
+def crawl(pages: list, table: InternTable | None) -> list:
+    if table is None:
+        return [ActivityRequestResponse(page) for page in pages]
+    with table:
+        return [ActivityRequestResponse(page) for page in pages]
+
+def measure(pages: list, interned: bool) -> tuple:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        crawl(pages, InternTable() if interned else None)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    kept = crawl(pages, InternTable() if interned else None)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return best, size
+
+def main(pages: int = 200):
+    data = [_payloads.activity_page() for _ in range(pages)]
+    print(f"{pages} pages of 50 activities by 10 authors")
+    print(f"{'mode':<10} {'parse ms':>9} {'kept KiB':>9}")
+    for name, interned in (("fresh", False), ("interned", True)):
+        seconds, size = measure(data, interned)
+        print(f"{name:<10} {seconds * 1e3:9.1f} {size / 1024:9.0f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,51 @@
+"""
+Decoding and encoding speed of each installed ``jsonlib`` backend.
+
+Decodes Luogu-shaped response bodies as ``handle_response`` does, and
+encodes parsed models as ``json_dumps_bytes`` does for request bodies and
+``store``.
+
+    python benchmarks/bench_json.py [repeat]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits import jsonlib
+from pyLuogu.bits.ultility import json_dumps_bytes
+from pyLuogu.types import ProblemListRequestResponse, ProblemDataRequestResponse, TagRequestResponse
+
+CASES = [
+    ("problem list page (50)", ProblemListRequestResponse, _payloads.problem_list_page()),
+    ("problem detail", ProblemDataRequestResponse, _payloads.problem_detail()),
+    ("tags (700)", TagRequestResponse, _payloads.tags()),
+]
+
+def best(func, repeat: int, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def main(repeat: int = 5):
+    installed = []
+    for name in jsonlib.BACKENDS:
+        try:
+            jsonlib.use(name)
+        except ImportError:
+            continue
+        installed.append(name)
+
+    print(f"{'payload':<24} {'backend':<8} {'decode us':>10} {'encode us':>10}")
+    for case, cls, payload in CASES:
+        body = json.dumps({"currentData": payload}, ensure_ascii=False).encode()
+        model = cls(payload)
+        for name in installed:
+            jsonlib.use(name)
+            decode = best(lambda: jsonlib.loads(body), repeat, 200)
+            encode = best(lambda: json_dumps_bytes(model), repeat, 200)
+            print(f"{case:<24} {name:<8} {decode * 1e6:10.1f} {encode * 1e6:10.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,35 @@
+"""
+Cost of reading one nested field of a freshly parsed problem response.
+
+Compares eager parsing with ``lazy=True``, where nested objects are only
+built when first read, for the common ``res.problem.content`` access and
+for a full walk of the object.
+
+    python benchmarks/bench_lazy.py [repeat]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.types import ProblemDataRequestResponse
+
+def best(func, repeat: int, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def main(repeat: int = 5):
+    payload = _payloads.problem_detail()
+    cases = [
+        ("parse + .problem.content", lambda lazy: ProblemDataRequestResponse(payload, lazy=lazy).problem.content),
+        ("parse + to_json", lambda lazy: ProblemDataRequestResponse(payload, lazy=lazy).to_json()),
+    ]
+    print(f"{'access':<26} {'eager us':>9} {'lazy us':>9} {'speedup':>8}")
+    for name, func in cases:
+        eager = best(lambda: func(False), repeat, 2000)
+        lazy = best(lambda: func(True), repeat, 2000)
+        print(f"{name:<26} {eager * 1e6:>9.1f} {lazy * 1e6:>9.1f} {eager / lazy:>7.2f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,116 @@
+"""
+Per-request cost of request logging.
+
+Two measurements, each with the logger at WARNING (the default), with
+logging disabled outright, and at INFO:
+
+- ``_send``: the transport's send stage up to the network (the guarded
+  logging plus building the request, the body being encoded beforehand),
+  timed directly.
+- pipeline: whole requests through ``luoguAPI`` against an in-memory
+  transport, reporting the overhead per request (wall time minus network
+  and sleeps, from ``metrics.stats()``). Responses are tiny so that
+  parsing does not drown the difference.
+
+The configurations are interleaved within every round, in a rotating order
+and after a ``gc.collect()``, so drift between rounds hits them all alike;
+each figure is the best of ``ROUNDS`` rounds. The POST payload carries a
+large statement so that serializing it would show up. Finally the bounded
+payload preview is timed against a full ``json.dumps`` of the same payload.
+
+    python benchmarks/bench_logging.py [requests]
+"""
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import timeit
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyLuogu import logger
+from pyLuogu.api import luoguAPI
+from pyLuogu.bits.ultility import json_dumps_bytes
+from pyLuogu.transport import RequestContext, preview
+
+ROUNDS = 7
+
+STATEMENT = "给定两个整数 a, b，输出它们的和。" * 20000
+PAYLOAD = {"settings": {"description": STATEMENT}}
+
+CONFIGS = [
+    ("disabled", logging.WARNING, True),
+    ("WARNING", logging.WARNING, False),
+    ("INFO", logging.INFO, False),
+]
+
+def handler(request: httpx.Request):
+    if request.url.path == "/":
+        return httpx.Response(200, text='<meta name="csrf-token" content="x">')
+    if request.method == "POST":
+        return httpx.Response(200, json={"pid": "U1"})
+    return httpx.Response(200, json={"currentData": {"tags": [], "types": []}})
+
+def configure(level: int, disabled: bool):
+    logger.setLevel(level)
+    logger.disabled = disabled
+
+def time_send(api: luoguAPI, method: str, data, n: int) -> float:
+    """Seconds per run of ``_send`` up to its ``Send`` effect."""
+    transport = api.transport
+    # the body is encoded once up front, as for a retry, so only logging and building the request are timed
+    content = None if data is None else json_dumps_bytes(data)
+    begin = time.perf_counter()
+    for _ in range(n):
+        ctx = RequestContext(transport, "fe/api/problem/edit/U1" if data else "_lfe/tags", method, data=data)
+        if content is not None:
+            ctx.extensions["content"] = content
+        next(transport._send(ctx))
+    return (time.perf_counter() - begin) / n
+
+def time_pipeline(api: luoguAPI, send, n: int) -> float:
+    """Pipeline overhead in seconds per request."""
+    api.metrics.reset()
+    for _ in range(n):
+        send()
+    return api.metrics.stats()["overhead_per_request"]
+
+def main(n: int = 200):
+    logger.handlers[0].setStream(open(os.devnull, "w"))
+    api = luoguAPI()
+    api.transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    api.get_tags()
+    post = lambda: api._send_request("fe/api/problem/edit/U1", "POST", data=PAYLOAD)
+    measurements = {
+        "_send GET": lambda: time_send(api, "GET", None, n),
+        "_send POST": lambda: time_send(api, "POST", PAYLOAD, n),
+        "pipeline GET": lambda: time_pipeline(api, api.get_tags, n),
+        "pipeline POST": lambda: time_pipeline(api, post, n),
+    }
+
+    best = {(name, what): float("inf") for name, _, _ in CONFIGS for what in measurements}
+    for i in range(ROUNDS):
+        for name, level, disabled in CONFIGS[i % len(CONFIGS):] + CONFIGS[:i % len(CONFIGS)]:
+            configure(level, disabled)
+            for what, measure in measurements.items():
+                gc.collect()
+                best[name, what] = min(best[name, what], measure())
+    configure(logging.WARNING, False)
+
+    print(f"{'logging':<10}" + "".join(f"{what + ' us':>18}" for what in measurements))
+    for name, _, _ in CONFIGS:
+        print(f"{name:<10}" + "".join(f"{best[name, what] * 1e6:18.1f}" for what in measurements))
+    costs = ", ".join(
+        f"{what} {(best['WARNING', what] - best['disabled', what]) * 1e6:+.1f} us" for what in measurements
+    )
+    print(f"cost at default level: {costs}")
+    full = min(timeit.repeat(lambda: json.dumps(PAYLOAD), number=20, repeat=ROUNDS)) / 20
+    bounded = min(timeit.repeat(lambda: preview(PAYLOAD), number=20, repeat=ROUNDS)) / 20
+    print(f"payload preview: {bounded * 1e6:.1f} us (json.dumps of the payload: {full * 1e6:.1f} us)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,69 @@
+"""
+Memory held per model object.
+
+Parses ``count`` payloads into the slotted model classes and into
+``__dict__``-based twins of the same classes (built with ``slots=False``,
+nested types included), and reports the bytes allocated per top-level
+object as measured by ``tracemalloc``. Payload strings are shared by both
+and not counted, so the figures are the models' own overhead.
+
+    python benchmarks/bench_memory.py [count]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits.ultility import JsonSerializable, JsonSerializableMeta, Printable
+from pyLuogu.types import ProblemSummary, UserSummary, Record
+
+_twins = {}
+
+def dict_twin(shape):
+    """The same type shape with every model class replaced by a __dict__-based copy."""
+    if isinstance(shape, list):
+        return [dict_twin(x) for x in shape]
+    if isinstance(shape, tuple):
+        return tuple(dict_twin(x) for x in shape)
+    if isinstance(shape, dict):
+        return {dict_twin(k): dict_twin(v) for k, v in shape.items()}
+    if isinstance(shape, type) and issubclass(shape, JsonSerializable):
+        if shape not in _twins:
+            _twins[shape] = JsonSerializableMeta(
+                f"Dict{shape.__name__}", (JsonSerializable, Printable), {}, slots=False
+            )
+            _twins[shape].__type_dict__ = dict_twin(shape.__type_dict__)
+        return _twins[shape]
+    return shape
+
+def bytes_per_object(cls, payloads) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls(payload) for payload in payloads]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / len(payloads)
+
+CASES = [
+    ("ProblemSummary", ProblemSummary, _payloads.problem_summary),
+    ("UserSummary", UserSummary, _payloads.user),
+    ("Record", Record, _payloads.record),
+]
+
+def main(count: int = 20000):
+    print(f"{'class':<16} {'__dict__ B/obj':>15} {'__slots__ B/obj':>16} {'saved':>7}")
+    for name, cls, make in CASES:
+        payloads = [make(i) for i in range(count)]
+        twin = dict_twin(cls)
+        assert twin(payloads[0]).to_json() == cls(payloads[0]).to_json()
+        with_dict = bytes_per_object(twin, payloads)
+        with_slots = bytes_per_object(cls, payloads)
+        print(f"{name:<16} {with_dict:15.0f} {with_slots:16.0f} {1 - with_slots / with_dict:6.0%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,82 @@
+"""
+Walking a 10k-problem listing page by page, with simulated network latency
+and processing time per page.
+
+Compares collecting every page before processing, the hand-written page
+loop, ``iter_pages`` without and with prefetching of the next page, and
+``fetch_pages`` fetching up to 8 pages at once.
+Reports wall time and peak traced memory.
+
+    python benchmarks/bench_pagination.py [latency ms] [processing ms]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.pagination import fetch_pages, iter_pages
+from pyLuogu.types import ProblemListRequestResponse
+
+PAGES = 200
+PER_PAGE = 50
+
+def main(latency: float = 5.0, processing: float = 2.0):
+    payload = _payloads.problem_list_page(PER_PAGE)
+    payload["count"] = PAGES * PER_PAGE
+
+    def fetch(page):
+        time.sleep(latency / 1000)
+        return ProblemListRequestResponse(payload)
+
+    processed = [0]
+
+    def process(problem):
+        # the work of a page is slept in one go to stay above timer resolution
+        processed[0] += 1
+        if processed[0] % PER_PAGE == 0:
+            time.sleep(processing / 1000)
+
+    def collect_all():
+        pages = [fetch(page) for page in range(1, PAGES + 1)]
+        for res in pages:
+            for problem in res.problems:
+                process(problem)
+
+    def page_loop():
+        meta = fetch(1)
+        for page in range((meta.count - 1) // meta.perPage + 1):
+            for problem in fetch(page + 1).problems:
+                process(problem)
+
+    def iterate(prefetch):
+        for problem in iter_pages(fetch, lambda res: res.problems, prefetch=prefetch):
+            process(problem)
+
+    def fan_out(concurrency):
+        for _, res in fetch_pages(fetch, concurrency):
+            for problem in res.problems:
+                process(problem)
+
+    cases = [
+        ("collect all pages", collect_all),
+        ("page loop", page_loop),
+        ("iter_pages", lambda: iterate(False)),
+        ("iter_pages prefetch", lambda: iterate(True)),
+        ("fetch_pages x8", lambda: fan_out(8)),
+    ]
+    print(f"{PAGES} pages x {PER_PAGE}, {latency} ms latency and {processing} ms processing per page")
+    print(f"{'walk':<20} {'s':>6} {'peak KiB':>9}")
+    for name, func in cases:
+        tracemalloc.start()
+        begin = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - begin
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<20} {elapsed:>6.2f} {peak / 1024:>9.0f}")
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:3]))
@@ -0,0 +1,86 @@
+"""
+Parsing throughput of ``JsonSerializable.parse``.
+
+Compares the per-class compiled parsers against the previous generic
+implementation (kept below as ``legacy_parse``) on real-sized payloads,
+then the same parsers with ``validate=False`` and ``validate=100``.
+
+    python benchmarks/bench_parse.py [repeat]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits.ultility import JsonSerializable
+from pyLuogu.types import ProblemListRequestResponse, ProblemDataRequestResponse, TagRequestResponse
+
+def legacy_parse(self, json, *_):
+    """The generic parser as it was before compilation, for comparison."""
+    def handle_nested_type(_key, _value, _expected_type):
+        if _value is None:
+            return None
+        if isinstance(_expected_type, list):
+            if len(_expected_type) != 1:
+                raise TypeError(f"List type must have exactly one element type: {_expected_type}")
+            inner_type = _expected_type[0]
+            if not isinstance(_value, list):
+                raise TypeError(f"{_key} Expected a list of {inner_type}, got {type(_value)}")
+            return [handle_nested_type(None, v, inner_type) for v in _value]
+        elif isinstance(_expected_type, tuple):
+            if not isinstance(_value, (list, tuple)) or len(_value) != len(_expected_type):
+                raise TypeError(f"{_key} Expected a tuple of {_expected_type}, got {type(_value)} with value {_value}")
+            return tuple(handle_nested_type(None, v, t) for v, t in zip(_value, _expected_type))
+        elif isinstance(_expected_type, dict):
+            key_type, val_type = list(_expected_type.items())[0]
+            if isinstance(_value, list):
+                return {handle_nested_type(None, key_type(k), key_type): handle_nested_type(None, v, val_type) for k, v in enumerate(_value)}
+            return {handle_nested_type(None, k, key_type): handle_nested_type(None, v, val_type) for k, v in _value.items()}
+        elif issubclass(_expected_type, JsonSerializable):
+            return _expected_type(json=_value)
+        elif not isinstance(_value, _expected_type):
+            raise TypeError(f"{_key} Expected {_expected_type}, got {type(_value)}")
+        return _value
+
+    if not isinstance(json, dict):
+        raise TypeError(f"Expected a dictionary, got {type(json)}")
+    for key, value in json.items():
+        expected_type = self.__type_dict__.get(key)
+        if expected_type is None:
+            continue
+        if value is not None:
+            value = handle_nested_type(key, value, expected_type)
+        setattr(self, key, value)
+    for key, expected_type in self.__type_dict__.items():
+        if not hasattr(self, key):
+            setattr(self, key, None)
+
+CASES = [
+    ("problem list page (50)", ProblemListRequestResponse, _payloads.problem_list_page()),
+    ("problem detail", ProblemDataRequestResponse, _payloads.problem_detail()),
+    ("tags (700)", TagRequestResponse, _payloads.tags()),
+]
+
+def best(cls, payload, repeat: int, number: int, **kwargs) -> float:
+    return min(timeit.repeat(lambda: cls(payload, **kwargs), number=number, repeat=repeat)) / number
+
+def main(repeat: int = 5):
+    compiled = JsonSerializable.parse
+    print(f"{'payload':<24} {'legacy us':>10} {'compiled us':>12} {'speedup':>8} {'trusted us':>11} {'1/100 us':>9}")
+    for name, cls, payload in CASES:
+        number = 200
+        JsonSerializable.parse = legacy_parse
+        try:
+            before = best(cls, payload, repeat, number)
+        finally:
+            JsonSerializable.parse = compiled
+        after = best(cls, payload, repeat, number)
+        trusted = best(cls, payload, repeat, number, validate=False)
+        sampled = best(cls, payload, repeat, number, validate=100)
+        print(f"{name:<24} {before * 1e6:10.1f} {after * 1e6:12.1f} {before / after:7.2f}x"
+              f" {trusted * 1e6:11.1f} {sampled * 1e6:9.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
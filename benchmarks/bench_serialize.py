@@ -0,0 +1,65 @@
+"""
+Serialization throughput of ``JsonSerializable``.
+
+For each payload, times encoding to JSON text three ways:
+
+- ``legacy``: the previous generic ``to_json`` (kept below) + ``json.dumps``
+- ``to_json``: the compiled per-class ``to_json`` + ``json.dumps``
+- ``direct``: ``json_dumps(obj)``, which lets the C encoder walk the
+  objects without building an intermediate dict tree
+
+    python benchmarks/bench_serialize.py [repeat]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _payloads
+from pyLuogu.bits.ultility import JsonSerializable, json_dumps
+from pyLuogu.types import ProblemListRequestResponse, ProblemDataRequestResponse, TagRequestResponse
+
+def legacy_to_json(self):
+    """The generic serializer as it was before compilation, for comparison."""
+    def serialize(_value):
+        if isinstance(_value, JsonSerializable):
+            return legacy_to_json(_value)
+        elif isinstance(_value, list):
+            return [serialize(v) for v in _value]
+        elif isinstance(_value, tuple):
+            return [serialize(v) for v in _value]
+        elif isinstance(_value, dict):
+            return {serialize(k): serialize(v) for k, v in _value.items()}
+        else:
+            return _value
+
+    json_data = {}
+    for key, value in self.__type_dict__.items():
+        attr_value = getattr(self, key, None)
+        if attr_value is None:
+            continue
+        json_data[key] = serialize(attr_value)
+    return json_data
+
+CASES = [
+    ("problem list page (50)", ProblemListRequestResponse(_payloads.problem_list_page())),
+    ("problem detail", ProblemDataRequestResponse(_payloads.problem_detail())),
+    ("tags (700)", TagRequestResponse(_payloads.tags())),
+]
+
+def best(func, repeat: int, number: int = 100) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+def main(repeat: int = 5):
+    print(f"{'payload':<24} {'legacy us':>10} {'to_json us':>11} {'direct us':>10} {'speedup':>8}")
+    for name, obj in CASES:
+        assert json_dumps(obj) == json.dumps(legacy_to_json(obj))
+        legacy = best(lambda: json.dumps(legacy_to_json(obj)), repeat)
+        compiled = best(lambda: json.dumps(obj.to_json()), repeat)
+        direct = best(lambda: json_dumps(obj), repeat)
+        print(f"{name:<24} {legacy:10.1f} {compiled:11.1f} {direct:10.1f} {legacy / direct:7.2f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
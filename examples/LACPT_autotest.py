@@ -13,7 +13,10 @@ import pyLuogu.errors
 pyLuogu.set_log_level("WARNING")
 
 cookies_openai_agent = pyLuogu.LuoguCookies.from_file("cookies_openai_agent.json")
-luogu_openai_agent = pyLuogu.asyncLuoguAPI(cookies=cookies_openai_agent)
+luogu_openai_agent = pyLuogu.asyncLuoguAPI(
+    cookies=cookies_openai_agent,
+    rate_limiter=pyLuogu.EndpointRateLimiter(read_rate=0.4, read_burst=1, submit_rate=0.04)
+)
 
 LACPT_id = 702688
 base_url = "https://openrouter.ai/api/v1"
@@ -30,8 +33,6 @@ openai_client = openai.AsyncOpenAI(
     timeout=httpx.Timeout(300.0, read=100.0, write=20.0, connect=10.0)
 )
 
-rate_limiter_fetch = asynciolimiter.Limiter(0.4)
-rate_limiter_submit = asynciolimiter.Limiter(0.04)
 rate_limiter_openai = asynciolimiter.Limiter(0.5)
 sem = asyncio.Semaphore(maximal_parallel)
 
@@ -133,7 +134,6 @@ async def test_model(pid: int, pass_num: int = 1):
     if pass_num > 1:
         raise NotImplementedError("pass_num > 1 is not supported.")
     
-    await rate_limiter_fetch.wait()
     problem = (await luogu_openai_agent.get_problem(pid)).problem
 
     max_retry = 5
@@ -161,7 +161,6 @@ async def test_model(pid: int, pass_num: int = 1):
     max_retry = 5
     for attemp in range(max_retry):
         try:
-            await rate_limiter_submit.wait()
             rid = (await luogu_openai_agent.submit_code(
                 pid, 
                 answer, 
@@ -178,7 +177,6 @@ async def test_model(pid: int, pass_num: int = 1):
 
     max_retry = 25
     for attemp in range(max_retry):
-        await rate_limiter_fetch.wait()
         res = await luogu_openai_agent.get_record(rid)
         if res.record.status in [0, 1]:
             await asyncio.sleep(5)
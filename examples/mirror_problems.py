@@ -0,0 +1,25 @@
+import os
+
+import pyLuogu
+
+pyLuogu.set_log_level("INFO")
+
+cookies = pyLuogu.LuoguCookies.from_file("cookies.json")
+luogu = pyLuogu.luoguAPI(cookies=cookies)
+
+types = ["P", "CF", "AT", "SP"]
+
+# Nightly mirror: the listings are walked in full, but a problem is only
+# downloaded when its listing entry changed, or once a week to catch edits
+# of the statement alone. A problem is recorded in the snapshot once the
+# loop moves past it, so it is stored durably inside the loop body.
+os.makedirs(".cache/problems", exist_ok=True)
+
+with pyLuogu.SyncSnapshot(".cache/problems.snapshot", refresh_after=7 * 86400) as snapshot:
+    for _type in types:
+        for problem, res in snapshot.changes(luogu.iter_problems(_type=_type), luogu.get_problem):
+            print(f"updating {problem.pid}...")
+            res.problem.store(f".cache/problems/{problem.pid}.json")
+    for pid in snapshot.missing():
+        print(f"{pid} is no longer listed")
+    print(snapshot.stats())
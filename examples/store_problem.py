@@ -1,5 +1,4 @@
 import os
-from time import sleep
 
 import pyLuogu
 
@@ -9,25 +8,21 @@ cookies = pyLuogu.LuoguCookies.from_file("cookies.json")
 luogu = pyLuogu.luoguAPI(cookies=cookies)
 
 types = ["P", "CF", "AT", "SP"]
+# a restarted run resumes each listing at the problem it stopped at
+checkpoint = pyLuogu.Checkpoint(".cache/store_problem.journal")
 
 for _type in types:
-    res = luogu.get_problem_list(_type=_type)
-    pages = (res.count - 1) // res.perPage + 1
+    for problem in checkpoint.walk(_type, luogu.iter_problems, _type=_type):
+        pid = problem.pid
 
-    for page in range(pages):
-        problem_list = luogu.get_problem_list(_type=_type, page=page + 1)
+        if os.path.exists(f".cache/{pid}.json"):
+            continue
 
-        for problem in problem_list.problems:
-            pid = problem.pid
+        print(f"fetching {pid}...")
+        try:
+            res = luogu.get_problem_settings(pid)
+        except KeyError:
+            print(f"{pid} does not exist")
+            continue
 
-            if os.path.exists(f".cache/{pid}.json"):
-                continue
-
-            print(f"fetching {pid}...")
-            try:
-                res = luogu.get_problem_settings(pid)
-            except KeyError:
-                print(f"{pid} does not exist")
-                continue
-
-            res.problemSettings.store(f".cache/{pid}.json")
+        res.problemSettings.store(f".cache/{pid}.json")
@@ -1,3 +1,5 @@
+import copy
+import importlib
 import logging
 import typing
 
@@ -13,6 +15,8 @@ class ColoredFormatter(logging.Formatter):
 
     def format(self, record):
         log_color = self.COLORS.get(record.levelname, self.RESET)
+        # color a copy: the record is shared with every other handler
+        record = copy.copy(record)
         record.msg = f"{log_color}{record.msg}{self.RESET}"
         return super().format(record)
 
@@ -36,7 +40,37 @@ def set_log_level(level: typing.Literal["DEBUG", "INFO", "WARNING", "ERROR", "CR
 
 set_log_level("WARNING")
 
-from .api import luoguAPI
-from .async_api import asyncLuoguAPI
-from .static_api import staticLuoguAPI, luogu
-from .types import *
\ No newline at end of file
+# Public names and the submodule defining them. They are imported on first
+# access so that ``import pyLuogu`` does not pull in httpx, bs4 or the types.
+_LAZY_EXPORTS = {
+    "luoguAPI": "api",
+    "asyncLuoguAPI": "async_api",
+    "staticLuoguAPI": "static_api",
+    "luogu": "static_api",
+    "TokenBucket": "ratelimit",
+    "EndpointRateLimiter": "ratelimit",
+    "CachePolicy": "cache",
+    "SQLiteCache": "cache",
+    "ArchiveWriter": "archive",
+    "ArchiveReader": "archive",
+    "Checkpoint": "checkpoint",
+    "SyncSnapshot": "snapshot",
+}
+
+def _types_module():
+    return importlib.import_module(".types", __name__)
+
+def __getattr__(name: str):
+    if name == "__all__":
+        value = ["logger", "set_log_level", *_LAZY_EXPORTS, *_types_module().__all__]
+    elif name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__), name)
+    elif not name.startswith("_") and name in _types_module().__all__:
+        value = getattr(_types_module(), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__("__all__")))
\ No newline at end of file
@@ -1,14 +1,16 @@
-import re
-import json
-import time
-from typing import List, Literal, Callable
+from typing import Any, Iterable, Iterator, List, Literal, Callable, Tuple
 
 import httpx
-import bs4
 
 from .types import *
 from .errors import *
-from . import logger
+from .transport import SyncTransport
+from .middleware import Middleware, MetricsMiddleware, default_middlewares
+from .ratelimit import EndpointRateLimiter
+from .cache import CachePolicy, SQLiteCache
+from .pagination import fetch_pages, iter_pages
+from .batch import BatchReport, BatchResult, batch_update
+from .bits.ultility import CachePool
 
 class luoguAPI:
     def __init__(
@@ -17,189 +19,70 @@ class luoguAPI:
             cookies: LuoguCookies = None,
             timeout: float | httpx.Timeout | None = 10,
             max_retries: int = 5,
+            cache: CachePool | SQLiteCache | None = None,
+            cache_policy: CachePolicy | None = None,
+            rate_limiter: EndpointRateLimiter | None = None,
+            coalesce: bool = False,
+            middlewares: List[Middleware] | None = None,
     ):
-        self.base_url = base_url
-        self.cookies = None if cookies is None else cookies.to_json()
-        self.max_retries = max_retries
-        self.client = httpx.Client(
+        if middlewares is None:
+            middlewares = default_middlewares(
+                max_retries=max_retries, cache=cache, cache_policy=cache_policy,
+                rate_limiter=rate_limiter, coalesce=coalesce
+            )
+        self.transport = SyncTransport(
+            base_url=base_url,
+            cookies=None if cookies is None else cookies.to_json(),
             timeout=timeout,
-            cookies=self.cookies,
-            follow_redirects=True,
+            max_retries=max_retries,
+            middlewares=middlewares,
         )
-        self.x_csrf_token = None
+        self.base_url = base_url
+        self.cookies = self.transport.cookies
+        self.max_retries = max_retries
+        self.client = self.transport.client
+
+    @property
+    def x_csrf_token(self) -> str | None:
+        return self.transport.x_csrf_token
+
+    @property
+    def metrics(self) -> MetricsMiddleware | None:
+        return self.transport.metrics
 
     def _send_request(
             self,
             endpoint: str,
             method: str = "GET",
             params: RequestParams | None = None,
-            data: dict | None = None,
+            data: dict | LuoguType | None = None,
     ):
-        url = f"{self.base_url}/{endpoint}"
-        headers = self._get_headers(method)
         param_final = None if params is None else params.to_json()
+        return self.transport.request(endpoint, method, param_final, data)
 
-        request = self.client.build_request(
-            method, url,
-            headers=headers,
-            params=param_final,
-            json=data,
-        )
-
-        if method == "GET":
-            logger.info(f"GET from {url} with params: {param_final}")
-        else:
-            data_str = json.dumps(data)
-            payload_str = data_str if data and len(data_str) < 50 else data_str[:50] + "..."
-            logger.info(f"POST to {url} with payload: {payload_str}")
-
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.send(request)
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                time.sleep(1)
-                continue
-            except httpx.HTTPError as e:
-                logger.error(f"Request error: {e}")
-                raise RequestError("Request error") from e
-
-            try:
-                response.raise_for_status()
-                try:
-                    res_json = response.json()
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to decode JSON response: {response.text}")
-                    raise RequestError("Failed to decode JSON response") from None
-                logger.debug(f"{json.dumps(res_json)}")
-
-                if res_json.get("currentTemplate") == "AuthLogin":
-                    raise AuthenticationError("Need Login")
-                if res_json.get("code") == 403:
-                    if res_json.get("errorMessage") == "user.not_self":
-                        raise AuthenticationError("not yourself")
-                    error_message = res_json.get("currentData").get("errorMessage")
-                    raise ForbiddenError( error_message or "Forbidden" )
-                
-                if res_json.get("code") in [404, 418]:
-                    raise NotFoundError(f"Resource not found {endpoint}")
-
-                if res_json.get("currentData") is not None:
-                    res_json = res_json.get("currentData")
-                if res_json.get("data") is not None:
-                    res_json = res_json.get("data")
-                return res_json
-            except httpx.HTTPStatusError as e:
-                if response.status_code == 401:
-                    raise AuthenticationError("Authentication failed") from e
-                elif response.status_code == 403:
-                    res_json = response.json()
-                    message = res_json.get("errorMessage")
-                    logger.warning(f"HTTP 403: {message}")
-                    if message is None:
-                        raise ForbiddenError(f"Forbidden: {e}") from e
-                    if message == "请求频繁，请稍候再试":
-                        time.sleep(5)
-                        continue
-                    if message == "验证码错误":
-                        raise NeedCaptcha("Need captcha") from e
-                        continue
-                    if message == "user.not_self":
-                        raise AuthenticationError("not yourself")
-                    logger.warning("CSRF token expired, refreshing token...")
-                    self._get_csrf()
-                    continue  # Retry the request
-                elif response.status_code == 404:
-                    raise NotFoundError("Resource not found") from e
-                elif response.status_code == 429:
-                    raise RateLimitError("Rate limit exceeded") from e
-                elif 500 <= response.status_code < 600:
-                    raise ServerError("Server error") from e
-                else:
-                    raise RequestError(f"HTTP error: {e}", status_code=response.status_code) from e
-        else:
-            logger.error("Failed to send request after 5 attempts")
-            raise RequestError("Failed to send request after 5 attempts")
-
-    def _get_headers(self, method: str) -> dict:
-        headers = {
-            "User-Agent": "luogu_bot",
-            "x-luogu-type": "content-only",
-            "x-lentille-request": "content-only",
-        }
-        if method != "GET":
-            if not self.x_csrf_token:
-                self._get_csrf()
-            headers.update({
-                "Content-Type": "application/json",
-                "referer": "https://www.luogu.com.cn/",
-                "x-csrf-token": self.x_csrf_token
-            })
-        return headers
+    def fetch_all_pages(
+            self,
+            getter: Callable[..., Any],
+            *args,
+            concurrency: int = 8,
+            ordered: bool = True,
+            start: int = 1,
+            **kwargs
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Yield ``(page, response)`` for every page of a paged getter, e.g.
+        ``fetch_all_pages(api.get_problem_list, _type="P")``. Page 1 is
+        fetched first; the others are then requested concurrently on up to
+        ``concurrency`` threads, paced by the rate limiter, and yielded in
+        page order or, with ``ordered=False``, as they arrive.
+        """
+        return fetch_pages(lambda page: getter(*args, page=page, **kwargs), concurrency, ordered, start)
 
     def _get_csrf(self, endpoint="") -> str:
-        headers = {
-            "User-Agent": "luogu_bot",
-        }
-
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.get(
-                    self.base_url + endpoint, 
-                    headers=headers, 
-                    cookies=self.cookies
-                )
-                
-                response.raise_for_status()
-
-                result = re.search(r"C3VK=(.*);", response.text)
-                if result:
-                    self.cookies["C3VK"] = result.group(1)
-                    logger.debug("C3VK token fetched successfully")
-                    continue
-
-                soup = bs4.BeautifulSoup(response.text, "html.parser")
-                csrf_meta = soup.select_one("meta[name='csrf-token']")
-
-                if csrf_meta and "content" in csrf_meta.attrs:
-                    self.x_csrf_token = csrf_meta["content"]
-                    logger.info("CSRF token fetched successfully")
-                    return self.x_csrf_token
-                else:
-                    logger.warning("CSRF token not found, retrying...")
-                    time.sleep(1)
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                time.sleep(1)
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error: {e}")
-                raise RequestError("HTTP error") from e
-
-        logger.error("Failed to fetch CSRF token after 5 attempts")
-        raise RequestError("Failed to fetch CSRF token after 5 attempts")
+        return self.transport.get_csrf(endpoint)
 
     def _get_captcha(self):
-        headers = {
-            "User-Agent": "luogu_bot",
-            "x-csrf-token": self.x_csrf_token
-        }
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.get(
-                    self.base_url + "/api/verify/captcha", 
-                    headers=headers, 
-                    cookies=self.cookies
-                )
-
-                response.raise_for_status()
-
-                return response.content
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                time.sleep(1)
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error: {e}")
-                raise RequestError("HTTP error") from e
+        return self.transport.get_captcha()
 
     def _post_captcha(self, captcha: str):
         raise NotImplementedError
@@ -243,6 +126,22 @@ class luoguAPI:
 
         return ProblemListRequestResponse(res)
 
+    def iter_problems(
+            self,
+            orderBy: int | None = None,
+            keyword: str | None = None,
+            content: bool | None = None,
+            _type: ProblemType | None = None,
+            difficulty: int | None = None,
+            tag: str | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> Iterator[ProblemSummary]:
+        return iter_pages(
+            lambda page: self.get_problem_list(page, orderBy, keyword, content, _type, difficulty, tag),
+            lambda res: res.problems, start, prefetch
+        )
+
     def get_problem(
             self, pid: str,
             contest_id: int | None = None
@@ -286,7 +185,7 @@ class luoguAPI:
             endpoint=f"fe/api/problem/edit/{pid}",
             method="POST",
             data={
-                "settings": new_settings.to_json(),
+                "settings": new_settings,
                 "type": None,
                 "providerID": new_settings.providerID,
                 "comment": new_settings.comment
@@ -295,6 +194,23 @@ class luoguAPI:
 
         return ProblemModifiedResponse(res)
 
+    def batch_update_problem_settings(
+            self,
+            problems: Iterable[str | ProblemSummary],
+            transform: Callable[[ProblemSettings], ProblemSettings | None],
+            concurrency: int = 4,
+            write_rate: float | None = 0.5,
+            retries: int = 2,
+            retry_delay: float = 1,
+            on_result: Callable[[BatchResult], None] | None = None,
+    ) -> BatchReport:
+        """
+        Read, ``transform`` and write back the settings of many problems
+        concurrently, e.g. ``batch_update_problem_settings(api.iter_problems(tag="151"), retag)``.
+        See ``pyLuogu.batch.batch_update``.
+        """
+        return batch_update(self, problems, transform, concurrency, write_rate, retries, retry_delay, on_result)
+
     def update_testcases_settings(
             self, pid: str,
             new_settings: TestCaseSettings
@@ -302,7 +218,7 @@ class luoguAPI:
         res = self._send_request(
             endpoint=f"/fe/api/problem/editTestCase/{pid}",
             method="POST",
-            data=new_settings.to_json()
+            data=new_settings
         )
 
         return UpdateTestCasesSettingsResponse(res)
@@ -317,7 +233,7 @@ class luoguAPI:
             endpoint=f"fe/api/problem/new",
             method="POST",
             data={
-                "settings": settings.to_json(),
+                "settings": settings,
                 "type": _type,
                 "providerID": tid,
                 "comment": settings.comment
@@ -384,6 +300,9 @@ class luoguAPI:
 
         return ProblemSolutionRequestResponse(res)
 
+    def iter_solutions(self, pid: str, start: int = 1, prefetch: bool = True) -> Iterator[Article]:
+        return iter_pages(lambda page: self.get_problem_solutions(pid, page), lambda res: res.solutions, start, prefetch)
+
     def get_user(self, uid: int) -> UserDataRequestResponse:
         res = self._send_request(endpoint=f"user/{uid}")
         
@@ -412,6 +331,15 @@ class luoguAPI:
         params = UserListRequestParams(json={"user": uid, "page": page})
         res = self._send_request(endpoint=f"api/user/blacklist", params=params)
         return [UserDetails(user) for user in res["users"]["result"]]
+
+    def iter_followings(self, uid: int, start: int = 1, prefetch: bool = True) -> Iterator[UserDetails]:
+        return iter_pages(lambda page: self.get_user_following_list(uid, page), list, start, prefetch)
+
+    def iter_followers(self, uid: int, start: int = 1, prefetch: bool = True) -> Iterator[UserDetails]:
+        return iter_pages(lambda page: self.get_user_follower_list(uid, page), list, start, prefetch)
+
+    def iter_blacklist(self, uid: int, start: int = 1, prefetch: bool = True) -> Iterator[UserDetails]:
+        return iter_pages(lambda page: self.get_user_blacklist(uid, page), list, start, prefetch)
     
     def search_user(self, keyword: str) -> List[UserSummary]:
         params = UserSearchRequestParams({"keyword" : keyword})
@@ -443,6 +371,18 @@ class luoguAPI:
         res = self._send_request(endpoint="training/list", params=params)
         res["trainings"]["trainings"] = res["trainings"]["result"]
         return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_problem_sets(
+            self,
+            keyword: str | None = None,
+            type: ProblemSetType | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> Iterator[ProblemSetSummary]:
+        return iter_pages(
+            lambda page: self.get_problem_set_list(page, keyword, type),
+            lambda res: res.trainings, start, prefetch
+        )
     
     def get_contest(self, id: int) -> ContestDataRequestResponse:
         res = self._send_request(endpoint=f"contest/{id}")
@@ -456,6 +396,9 @@ class luoguAPI:
         res = self._send_request(endpoint="contest/list", params=params)
         res["contests"]["contests"] = res["contests"]["result"]
         return ContestListRequestResponse(res["contests"])
+
+    def iter_contests(self, start: int = 1, prefetch: bool = True) -> Iterator[ContestSummary]:
+        return iter_pages(self.get_contest_list, lambda res: res.contests, start, prefetch)
             
     def get_disscussion(self,
             id: int,
@@ -469,6 +412,15 @@ class luoguAPI:
         res["count"] = res["replies"]["count"]
         res["replies"] = res["replies"]["result"]
         return DiscussionRequestResponse(res)     
+
+    def iter_replies(
+            self,
+            id: int,
+            orderBy: int | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> Iterator[Reply]:
+        return iter_pages(lambda page: self.get_disscussion(id, page, orderBy), lambda res: res.replies, start, prefetch)
     
     def get_activity(self, 
             uid: int, 
@@ -482,18 +434,25 @@ class luoguAPI:
         res["count"] = res["feeds"]["count"]
         return ActivityRequestResponse(res)
 
+    def iter_activities(self, uid: int, start: int = 1, prefetch: bool = True) -> Iterator[Activity]:
+        return iter_pages(lambda page: self.get_activity(uid, page), lambda res: res.activities, start, prefetch)
+
     def get_team(self, tid: int) -> TeamDataRequestResponse:
         res = self._send_request(endpoint=f"team/{tid}")
         return TeamDataRequestResponse(res)
 
-    def get_team_member_list(self, tid: int) -> List[TeamMember]:
-        res = self._send_request(endpoint=f"api/team/members/{tid}")
+    def get_team_member_list(self, tid: int, page: int | None = None) -> TeamMemberRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = self._send_request(endpoint=f"api/team/members/{tid}", params=params)
         res["perPage"] = res["members"]["perPage"]
         res["count"] = res["members"]["count"]
         res["members"] = res["members"]["result"]
 
         return TeamMemberRequestResponse(res)
 
+    def iter_team_members(self, tid: int, start: int = 1, prefetch: bool = True) -> Iterator[TeamMember]:
+        return iter_pages(lambda page: self.get_team_member_list(tid, page), lambda res: res.members, start, prefetch)
+
     def get_team_problem_list(
             self, tid: int,
             page: int | None = None
@@ -510,11 +469,17 @@ class luoguAPI:
 
         return ProblemListRequestResponse(res)
 
+    def iter_team_problems(self, tid: int, start: int = 1, prefetch: bool = True) -> Iterator[ProblemSummary]:
+        return iter_pages(lambda page: self.get_team_problem_list(tid, page), lambda res: res.problems, start, prefetch)
+
     def get_team_problem_set_list(self, tid: int, page: int | None = None) -> ProblemSetListRequestResponse:
         params = ListRequestParams(json={"page": page})
         res = self._send_request(endpoint=f"api/team/trainings/{tid}", params=params)
         res["trainings"]["trainings"] = res["trainings"]["result"]
         return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_team_problem_sets(self, tid: int, start: int = 1, prefetch: bool = True) -> Iterator[ProblemSetSummary]:
+        return iter_pages(lambda page: self.get_team_problem_set_list(tid, page), lambda res: res.trainings, start, prefetch)
     
     def get_team_contest_list(self, tid: int, page: int | None = None) -> ContestListRequestResponse:
         params = ListRequestParams(json={"page": page})
@@ -522,6 +487,9 @@ class luoguAPI:
         res["contests"]["contests"] = res["contests"]["result"]
         return ContestListRequestResponse(res["contests"])
 
+    def iter_team_contests(self, tid: int, start: int = 1, prefetch: bool = True) -> Iterator[ContestSummary]:
+        return iter_pages(lambda page: self.get_team_contest_list(tid, page), lambda res: res.contests, start, prefetch)
+
     def get_paste(self, id: str) -> PasteRequestResponse:
         res = self._send_request(endpoint=f"paste/{id}")
         return PasteRequestResponse(res)
@@ -546,12 +514,18 @@ class luoguAPI:
 
         return ProblemListRequestResponse(res)
 
+    def iter_created_problems(self, start: int = 1, prefetch: bool = True) -> Iterator[ProblemSummary]:
+        return iter_pages(self.get_created_problem_list, lambda res: res.problems, start, prefetch)
+
     def get_created_problem_set_list(self, page: int | None = None):
         params = ListRequestParams(json={"page": page})
         res = self._send_request(endpoint="api/user/createdTrainings", params=params)
 
         res["trainings"]["trainings"] = res["trainings"]["result"]
         return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_created_problem_sets(self, start: int = 1, prefetch: bool = True) -> Iterator[ProblemSetSummary]:
+        return iter_pages(self.get_created_problem_set_list, lambda res: res.trainings, start, prefetch)
     
     def get_created_contest_list(self, page: int | None = None) -> ContestListRequestResponse:
         params = ListRequestParams(json={"page": page})
@@ -559,6 +533,9 @@ class luoguAPI:
         res["contests"]["contests"] = res["contests"]["result"]
         return ContestListRequestResponse(res["contests"])
 
+    def iter_created_contests(self, start: int = 1, prefetch: bool = True) -> Iterator[ContestSummary]:
+        return iter_pages(self.get_created_contest_list, lambda res: res.contests, start, prefetch)
+
     def submit_code(
             self,
             pid: str,
@@ -0,0 +1,346 @@
+__all__ = [
+    "ArchiveWriter",
+    "ArchiveReader",
+    "COMPRESSIONS",
+    "pack",
+]
+
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .bits import jsonlib
+from .bits.ultility import json_dumps_bytes
+
+# File layout: ``MAGIC``, one codec byte, then frames. A frame is a
+# little-endian u32 payload size followed by the payload, a block of JSON
+# lines ``[key, value]`` compressed as a whole. The sidecar ``<path>.idx``
+# holds one JSON line ``[key, frame offset, frame size, start, length]`` per
+# record, locating it inside the decompressed frame; the last entry of a
+# key wins. Frames not covered by the index (e.g. after a crash) are
+# re-indexed from the data file, and a truncated last frame is discarded.
+MAGIC = b"LGAR\x01"
+HEADER_SIZE = len(MAGIC) + 1
+FRAME_HEADER = struct.Struct("<I")
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+def _codec(compression: str | None, level: int | None = None) -> Codec:
+    if compression is None:
+        return (lambda data: data), (lambda data: data)
+    if compression == "gzip":
+        # level 1 compresses several times faster than gzip's default 6, for a few % in size
+        level = 1 if level is None else level
+
+        def compress(data: bytes) -> bytes:
+            encoder = zlib.compressobj(level, zlib.DEFLATED, 31)
+            return encoder.compress(data) + encoder.flush()
+        return compress, lambda data: zlib.decompress(data, 31)
+    if compression == "zstd":
+        try:
+            from compression import zstd  # Python 3.14+
+        except ImportError:
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("zstd compression needs Python 3.14 or the zstandard package") from None
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            decompressor = zstandard.ZstdDecompressor()
+            return compressor.compress, decompressor.decompress
+        return (lambda data: zstd.compress(data, level)), zstd.decompress
+    raise ValueError(f"Unknown compression: {compression}, expected one of {COMPRESSIONS}")
+
+class _Archive:
+    """Index and frame access shared by ``ArchiveWriter`` and ``ArchiveReader``."""
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        # key -> (frame offset, frame size, start, length)
+        self.index: Dict[str, Tuple[int, int, int, int]] = {}
+
+    def _open_index(self, file, compression: str | None) -> Tuple[int, list, bool]:
+        """
+        Load the sidecar index and index any frames after it. Returns the end
+        of the last complete frame, the entries found past the index, and
+        whether the index had entries beyond the data file that were dropped.
+        """
+        self._decompress = _codec(compression)[1]
+        self._plain = compression is None
+        size = os.fstat(file.fileno()).st_size
+        end = HEADER_SIZE
+        stale = False
+        index = self.index
+        for key, frame_offset, frame_size, start, length in self._load_index():
+            frame_end = frame_offset + frame_size
+            if frame_end > size:
+                stale = True
+                continue
+            if frame_end > end:
+                end = frame_end
+            index[key] = (frame_offset, frame_size, start, length)
+
+        recovered = []
+        while end + FRAME_HEADER.size <= size:
+            file.seek(end)
+            (payload_size,) = FRAME_HEADER.unpack(file.read(FRAME_HEADER.size))
+            frame_size = FRAME_HEADER.size + payload_size
+            if end + frame_size > size:
+                break
+            block = self._decompress(file.read(payload_size))
+            for start, line in self._lines(block):
+                key = jsonlib.loads(line)[0]
+                self.index[key] = (end, frame_size, start, len(line))
+                recovered.append([key, end, frame_size, start, len(line)])
+            end += frame_size
+        return end, recovered, stale
+
+    def _load_index(self) -> list:
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, "rb") as index_file:
+            data = index_file.read()
+        try:
+            # one decoder call for the whole file; JSON strings never contain a raw newline
+            return jsonlib.loads(b"[" + data.rstrip(b"\n").replace(b"\n", b",") + b"]")
+        except ValueError:
+            pass
+        entries = []
+        for line in data.splitlines():
+            try:
+                entries.append(jsonlib.loads(line))
+            except ValueError:
+                break  # a line cut short by a crash
+        return entries
+
+    @staticmethod
+    def _lines(block: bytes) -> Iterator[Tuple[int, bytes]]:
+        start = 0
+        while start < len(block):
+            stop = block.index(b"\n", start) + 1
+            yield start, block[start:stop]
+            start = stop
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+class ArchiveWriter(_Archive):
+    """
+    Append-only archive of JSON records keyed by strings, typically
+    ``LuoguType`` objects (e.g. problem settings keyed by pid).
+
+    Records are buffered and written as one frame per ``block_size``
+    uncompressed bytes, so archiving is sequential I/O on two files whatever
+    the number of records. ``compression`` is None, ``"gzip"`` or
+    ``"zstd"`` (Python 3.14 or the ``zstandard`` package); an existing
+    archive is appended to with its own compression. Records are durable
+    (fsynced to disk) once ``flush`` or ``close`` returns. Writing a key again supersedes the
+    old record. Not thread-safe.
+
+    A lookup in a compressed archive decompresses the record's whole frame;
+    a smaller ``block_size`` favours random access over compression ratio.
+    """
+    def __init__(
+            self,
+            path: str,
+            compression: str | None = None,
+            block_size: int = 1 << 16,
+            level: int | None = None,
+    ):
+        super().__init__(path)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.block_size = block_size
+        self._pending: List[bytes] = []
+        self._pending_keys: List[str] = []
+        self._pending_size = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            existing = _read_header(self._file, path)
+            if compression is not None and compression != existing:
+                self._file.close()
+                raise ValueError(f"{path} is compressed with {existing}, not {compression}")
+            compression = existing
+        self.compression = compression
+        self._compress = _codec(compression, level)[0]
+
+        self._index_file = open(self.index_path, "ab")
+        if exists:
+            end, recovered, stale = self._open_index(self._file, compression)
+            self._file.truncate(end)
+            if stale:
+                # rewrite so that no entry points into space about to be reused
+                self._index_file.truncate(0)
+                recovered = [[key, *entry] for key, entry in self.index.items()]
+            self._index_file.write(b"".join(json_dumps_bytes(entry) + b"\n" for entry in recovered))
+        else:
+            self._decompress = _codec(compression)[1]
+            self._plain = compression is None
+            self._index_file.truncate(0)
+            self._file.write(MAGIC + bytes((COMPRESSIONS.index(compression),)))
+            end = HEADER_SIZE
+        self._end = end
+
+    def write(self, key: str, value: Any):
+        """Append ``value`` (a ``JsonSerializable`` or plain JSON data) under ``key``."""
+        self._append(key, json_dumps_bytes([key, value]) + b"\n")
+
+    def _append(self, key: str, line: bytes):
+        self._pending.append(line)
+        self._pending_keys.append(key)
+        self._pending_size += len(line)
+        if self._pending_size >= self.block_size:
+            self._write_frame()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index or key in self._pending_keys
+
+    def _write_frame(self):
+        if not self._pending:
+            return
+        payload = self._compress(b"".join(self._pending))
+        frame_offset = self._end
+        frame_size = FRAME_HEADER.size + len(payload)
+        self._file.seek(frame_offset)
+        self._file.write(FRAME_HEADER.pack(len(payload)) + payload)
+        self._end += frame_size
+
+        entries = []
+        start = 0
+        for key, line in zip(self._pending_keys, self._pending):
+            self.index[key] = (frame_offset, frame_size, start, len(line))
+            entries.append(json_dumps_bytes([key, frame_offset, frame_size, start, len(line)]) + b"\n")
+            start += len(line)
+        self._index_file.write(b"".join(entries))
+        self._pending.clear()
+        self._pending_keys.clear()
+        self._pending_size = 0
+
+    def flush(self):
+        self._write_frame()
+        # data first, so a flushed index never points past the data file
+        for file in (self._file, self._index_file):
+            file.flush()
+            os.fsync(file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        self._index_file.close()
+
+class ArchiveReader(_Archive):
+    """
+    Read-only view of an archive written by ``ArchiveWriter``. The data file
+    is memory-mapped: opening only loads the index, ``get``/``[]`` decode
+    just the requested record (and, when compressed, its frame), and
+    ``items``/``values`` stream every live record frame by frame. Pages are
+    read in by the OS as they are touched and can be dropped again, so even
+    a whole problem bank stays cheap to keep open. Safe to share between
+    threads.
+
+    Records are returned as ``cls`` objects, parsed with ``validate`` (see
+    ``JsonSerializable.parse``), or as plain JSON data when ``cls`` is None.
+    """
+    def __init__(self, path: str, cls: type | None = None, validate: bool | int | None = None):
+        super().__init__(path)
+        self.cls = cls
+        self.validate = validate
+        with open(path, "rb") as file:
+            self.compression = _read_header(file, path)
+            self._end = self._open_index(file, self.compression)[0]
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # the last decompressed frame, as (offset, block)
+        self._frame = (-1, b"")
+
+    def _build(self, value):
+        if self.cls is None:
+            return value
+        if self.validate is None:
+            return self.cls(json=value)
+        return self.cls(json=value, validate=self.validate)
+
+    def _raw(self, entry: Tuple[int, int, int, int]) -> bytes:
+        frame_offset, frame_size, start, length = entry
+        if self._plain:
+            # records of a plain archive are sliced straight from the map
+            begin = frame_offset + FRAME_HEADER.size + start
+            return self._map[begin:begin + length]
+        frame = self._frame
+        if frame[0] != frame_offset:
+            payload = self._map[frame_offset + FRAME_HEADER.size:frame_offset + frame_size]
+            frame = self._frame = (frame_offset, self._decompress(payload))
+        return frame[1][start:start + length]
+
+    def get(self, key: str, default=None):
+        entry = self.index.get(key)
+        if entry is None:
+            return default
+        return self._build(jsonlib.loads(self._raw(entry))[1])
+
+    def __getitem__(self, key: str):
+        if key not in self.index:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def _live(self) -> Iterator[Tuple[str, bytes]]:
+        """``(key, raw record)`` of every live record, in file order."""
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]):
+            yield key, self._raw(entry)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Every live record in file order, decompressing each frame once."""
+        for key, raw in self._live():
+            yield key, self._build(jsonlib.loads(raw)[1])
+
+    def values(self) -> Iterator[Any]:
+        for _, value in self.items():
+            yield value
+
+    def close(self):
+        self._map.close()
+
+def pack(source: str, target: str, compression: str | None = None, block_size: int = 1 << 16) -> int:
+    """
+    Write the live records of archive ``source`` to a new archive
+    ``target``, dropping superseded ones, e.g. to recompress a mirror or
+    produce a plain one for the fastest ``ArchiveReader`` lookups. Records
+    are copied without being decoded. Returns the number of records.
+    """
+    if os.path.exists(target):
+        raise FileExistsError(target)
+    count = 0
+    with ArchiveReader(source) as reader, ArchiveWriter(target, compression, block_size) as writer:
+        for key, raw in reader._live():
+            writer._append(key, raw)
+            count += 1
+    return count
+
+def _read_header(file, path: str) -> str | None:
+    file.seek(0)
+    header = file.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not header.startswith(MAGIC) or header[-1] >= len(COMPRESSIONS):
+        raise ValueError(f"{path} is not a pyLuogu archive")
+    return COMPRESSIONS[header[-1]]
@@ -1,13 +1,17 @@
-import re
-import json
 import asyncio
-from typing import List, Literal, Callable
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, List, Literal, Callable, Tuple
 
 import httpx
-import bs4
 
 from .types import *
 from .errors import *
+from .transport import AsyncTransport
+from .middleware import Middleware, MetricsMiddleware, default_middlewares
+from .ratelimit import EndpointRateLimiter
+from .cache import CachePolicy, SQLiteCache
+from .pagination import afetch_pages, aiter_pages
+from .batch import BatchReport, BatchResult, abatch_update
+from .bits.ultility import CachePool
 from . import logger
 
 class asyncLuoguAPI:
@@ -17,216 +21,68 @@ class asyncLuoguAPI:
             cookies: LuoguCookies = None,
             timeout: float | httpx.Timeout | None = 10,
             max_retries: int = 5,
+            cache: CachePool | SQLiteCache | None = None,
+            cache_policy: CachePolicy | None = None,
+            rate_limiter: EndpointRateLimiter | None = None,
+            coalesce: bool = True,
+            middlewares: List[Middleware] | None = None,
     ):
-        self.base_url = base_url
-        self.cookies = None if cookies is None else cookies.to_json()
-        self.max_retries = max_retries
-        self.client = httpx.AsyncClient(
+        if middlewares is None:
+            middlewares = default_middlewares(
+                max_retries=max_retries, cache=cache, cache_policy=cache_policy,
+                rate_limiter=rate_limiter, coalesce=coalesce
+            )
+        self.transport = AsyncTransport(
+            base_url=base_url,
+            cookies=None if cookies is None else cookies.to_json(),
             timeout=timeout,
-            cookies=self.cookies,
-            follow_redirects=True,
+            max_retries=max_retries,
+            middlewares=middlewares,
         )
-        self.x_csrf_token = None
+        self.base_url = base_url
+        self.cookies = self.transport.cookies
+        self.max_retries = max_retries
+        self.client = self.transport.client
+
+    @property
+    def x_csrf_token(self) -> str | None:
+        return self.transport.x_csrf_token
+
+    @property
+    def metrics(self) -> MetricsMiddleware | None:
+        return self.transport.metrics
 
     async def _send_request(
             self,
             endpoint: str,
             method: str = "GET",
             params: RequestParams | None = None,
-            data: dict | None = None
+            data: dict | LuoguType | None = None
     ):
-        url = f"{self.base_url}/{endpoint}"
-        headers = await self._get_headers(method)
         param_final = None if params is None else params.to_json()
+        return await self.transport.request(endpoint, method, param_final, data)
 
-        request = self.client.build_request(
-            method, url,
-            headers=headers,
-            params=param_final,
-            json=data,
-        )
-
-        for attempt in range(self.max_retries):
-            if method == "GET":
-                logger.info(f"({attempt}/{self.max_retries}) Async GET from {url} with params: {param_final}")
-            else:
-                data_str = json.dumps(data)
-                payload_str = data_str if data and len(data_str) < 50 else data_str[:50] + "..."
-                logger.info(f"({attempt}/{self.max_retries}) Async POST to {url} with payload: {payload_str}")
-            
-            try:
-                response = await self.client.send(request)
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                await asyncio.sleep(1)
-                continue
-            except httpx.HTTPError as e:
-                logger.error(f"Request error: {e}")
-                raise RequestError("Request error") from e
-
-            try:
-                response.raise_for_status()
-                
-                new_C3VK = await self._get_C3VK(response)
-                if new_C3VK is not None:
-                    continue
-                
-                try:
-                    res_json = response.json()
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to decode JSON response: {response.text}")
-                    raise RequestError("Failed to decode JSON response") from None
-                logger.debug(f"{json.dumps(res_json)}")
-
-                if res_json.get("currentTemplate") == "AuthLogin":
-                    raise AuthenticationError("Need Login")
-                if res_json.get("code") == 403:
-                    if res_json.get("请求频繁，请稍候再试"):
-                        logger.warning("403: Request too frequent")
-                        await asyncio.sleep(attempt * 5)
-                        continue
-                    if res_json.get("errorMessage") == "user.not_self":
-                        raise AuthenticationError("not yourself")
-                    logger.warning("CSRF token expired, refreshing token...")
-                    await self._get_csrf()
-                    headers = await self._get_headers(method)
-                    continue
-                if res_json.get("code") in [404, 418]:
-                    raise NotFoundError(f"Resource not found {endpoint}")
-
-                if res_json.get("currentData") is not None:
-                    res_json = res_json.get("currentData")
-                if res_json.get("data") is not None:
-                    res_json = res_json.get("data")
-                return res_json
-            except httpx.HTTPStatusError as e:
-                if response.status_code == 401:
-                    raise AuthenticationError("Authentication failed") from e
-                elif response.status_code == 403:
-                    res_json = response.json()
-                    message = res_json.get("errorMessage")
-                    logger.warning(f"HTTP 403: {message}")
-                    if message is None:
-                        raise ForbiddenError(f"Forbidden: {e}") from e
-                    if message == "提交过于频繁，请过3分钟再尝试":
-                        await asyncio.sleep(180)
-                        continue
-                    if message == "请求频繁，请稍候再试":
-                        await asyncio.sleep(5)
-                        continue
-                    if message == "验证码错误":
-                        raise NeedCaptcha("Need captcha") from e
-                        continue
-                    if message == "user.not_self":
-                        raise AuthenticationError("not yourself")
-                    logger.warning("CSRF token expired, refreshing token...")
-                    self._get_csrf()
-                    continue  # Retry the request
-                elif response.status_code == 404:
-                    raise NotFoundError("Resource not found") from e
-                elif response.status_code == 429:
-                    logger.warning("429: Rate limit exceeded")
-                    await asyncio.sleep(attempt * 5)
-                    continue
-                elif 500 <= response.status_code < 600:
-                    raise ServerError("Server error") from e
-                else:
-                    raise RequestError("HTTP error") from e
-        
-        logger.error(f"Failed to send request after {self.max_retries} attempts")
-        raise RequestError(f"Failed to send request after {self.max_retries} attempts")
-
-    async def _get_headers(self, method: str) -> dict:
-        if self.x_csrf_token is None:
-            await self._get_csrf()
-        headers = {
-            "User-Agent": "luogu_bot",
-            "x-lentille-request": "content-only",
-            "x-luogu-type": "content-only",
-            "x-csrf-token": self.x_csrf_token
-        }
-        if method != "GET":
-            headers.update({
-                "Content-Type": "application/json",
-                "referer": "https://www.luogu.com.cn/",
-            })
-        return headers
-
-    async def _get_C3VK(self, response: httpx.Response) -> str | None:
-        result = re.search(r"C3VK=(.*); path", response.text)
-        if result:
-            self.cookies["C3VK"] = result.group(1)
-            self.client.cookies.set("C3VK", result.group(1))
-            logger.info(f"C3VK token fetched successfully {result.group(1)}")
-            return result.group(1)
-        else:
-            return None
+    def fetch_all_pages(
+            self,
+            getter: Callable[..., Any],
+            *args,
+            concurrency: int = 8,
+            ordered: bool = True,
+            start: int = 1,
+            **kwargs
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Async counterpart of ``luoguAPI.fetch_all_pages``: iterate with
+        ``async for page, res in api.fetch_all_pages(api.get_problem_list)``.
+        At most ``concurrency`` pages are requested at once.
+        """
+        return afetch_pages(lambda page: getter(*args, page=page, **kwargs), concurrency, ordered, start)
 
     async def _get_csrf(self, endpoint="") -> str:
-        headers = {
-            "User-Agent": "luogu_bot",
-        }
-
-        for attempt in range(self.max_retries):
-            try:
-                logger.info(f"({attempt}/{self.max_retries}) Async GET CSRF token from {self.base_url + endpoint}")
-                response = await self.client.get(
-                    self.base_url + endpoint, 
-                    headers=headers, 
-                    cookies=self.cookies
-                )
-                
-                response.raise_for_status()
-
-                new_C3VK = await self._get_C3VK(response)
-                if new_C3VK is not None:
-                    continue
-                
-                soup = bs4.BeautifulSoup(response.text, "html.parser")
-                csrf_meta = soup.select_one("meta[name='csrf-token']")
-
-                if csrf_meta and "content" in csrf_meta.attrs:
-                    self.x_csrf_token = csrf_meta["content"]
-                    logger.info(f"new CSRF token : {self.x_csrf_token}")
-                    return self.x_csrf_token
-                else:
-                    logger.warning("CSRF token not found, retrying...")
-                    await asyncio.sleep(1)
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                await asyncio.sleep(1)
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error: {e}")
-                raise RequestError(f"HTTP error: {e}")
-
-        logger.error(f"Failed to fetch CSRF token after {self.max_retries} attempts")
-        raise RequestError(f"Failed to fetch CSRF token after {self.max_retries} attempts")
+        return await self.transport.get_csrf(endpoint)
 
     async def _get_captcha(self):
-        headers = {
-            "User-Agent": "luogu_bot",
-            "x-csrf-token": self.x_csrf_token
-        }
-        for attempt in range(self.max_retries):
-            try:
-                logger.info(f"({attempt}/{self.max_retries}) Async GET captcha from {self.base_url + '/api/verify/captcha'}")
-                response = await self.client.get(
-                    self.base_url + "/api/verify/captcha", 
-                    headers=headers, 
-                    cookies=self.cookies
-                )
-
-                response.raise_for_status()
-
-                return response.content
-            except httpx.TimeoutException as e:
-                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
-                await asyncio.sleep(1)
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error: {e}")
-                raise RequestError("HTTP error") from e
-        
-        raise RequestError(f"Failed to fetch captcha after {self.max_retries} attempts")
+        return await self.transport.get_captcha()
 
     def _post_captcha(self, captcha: str):
         raise NotImplementedError
@@ -270,6 +126,22 @@ class asyncLuoguAPI:
 
         return ProblemListRequestResponse(res)
 
+    def iter_problems(
+            self,
+            orderBy: int | None = None,
+            keyword: str | None = None,
+            content: bool | None = None,
+            _type: ProblemType | None = None,
+            difficulty: int | None = None,
+            tag: str | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> AsyncIterator[ProblemSummary]:
+        return aiter_pages(
+            lambda page: self.get_problem_list(page, orderBy, keyword, content, _type, difficulty, tag),
+            lambda res: res.problems, start, prefetch
+        )
+
     async def get_team_problem_list(
             self, tid: int,
             page: int | None = None
@@ -286,6 +158,39 @@ class asyncLuoguAPI:
 
         return ProblemListRequestResponse(res)
 
+    def iter_team_problems(self, tid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[ProblemSummary]:
+        return aiter_pages(lambda page: self.get_team_problem_list(tid, page), lambda res: res.problems, start, prefetch)
+
+    async def get_team_member_list(self, tid: int, page: int | None = None) -> TeamMemberRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = await self._send_request(endpoint=f"api/team/members/{tid}", params=params)
+        res["perPage"] = res["members"]["perPage"]
+        res["count"] = res["members"]["count"]
+        res["members"] = res["members"]["result"]
+
+        return TeamMemberRequestResponse(res)
+
+    def iter_team_members(self, tid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[TeamMember]:
+        return aiter_pages(lambda page: self.get_team_member_list(tid, page), lambda res: res.members, start, prefetch)
+
+    async def get_team_problem_set_list(self, tid: int, page: int | None = None) -> ProblemSetListRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = await self._send_request(endpoint=f"api/team/trainings/{tid}", params=params)
+        res["trainings"]["trainings"] = res["trainings"]["result"]
+        return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_team_problem_sets(self, tid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[ProblemSetSummary]:
+        return aiter_pages(lambda page: self.get_team_problem_set_list(tid, page), lambda res: res.trainings, start, prefetch)
+
+    async def get_team_contest_list(self, tid: int, page: int | None = None) -> ContestListRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = await self._send_request(endpoint=f"api/team/contests/{tid}", params=params)
+        res["contests"]["contests"] = res["contests"]["result"]
+        return ContestListRequestResponse(res["contests"])
+
+    def iter_team_contests(self, tid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[ContestSummary]:
+        return aiter_pages(lambda page: self.get_team_contest_list(tid, page), lambda res: res.contests, start, prefetch)
+
     async def get_problem(
             self, pid: str,
             contest_id: int | None = None
@@ -299,6 +204,19 @@ class asyncLuoguAPI:
 
         return ProblemDataRequestResponse(res)
 
+    async def get_problem_solutions(self, pid: str, page: int | None = None) -> ProblemSolutionRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = await self._send_request(endpoint=f"problem/solution/{pid}", params=params)
+
+        res["count"] = res["solutions"]["count"]
+        res["perPage"] = res["solutions"]["perPage"]
+        res["solutions"] = res["solutions"]["result"]
+
+        return ProblemSolutionRequestResponse(res)
+
+    def iter_solutions(self, pid: str, start: int = 1, prefetch: bool = True) -> AsyncIterator[Article]:
+        return aiter_pages(lambda page: self.get_problem_solutions(pid, page), lambda res: res.solutions, start, prefetch)
+
     async def get_problem_settings(
             self, pid: str,
     ) -> ProblemSettingsRequestResponse:
@@ -324,7 +242,7 @@ class asyncLuoguAPI:
             endpoint=f"fe/api/problem/edit/{pid}",
             method="POST",
             data={
-                "settings": new_settings.to_json(),
+                "settings": new_settings,
                 "type": None,
                 "providerID": new_settings.providerID,
                 "comment": new_settings.comment
@@ -333,6 +251,19 @@ class asyncLuoguAPI:
 
         return ProblemModifiedResponse(res)
 
+    async def batch_update_problem_settings(
+            self,
+            problems: Iterable[str | ProblemSummary] | AsyncIterable[str | ProblemSummary],
+            transform: Callable[[ProblemSettings], ProblemSettings | None],
+            concurrency: int = 4,
+            write_rate: float | None = 0.5,
+            retries: int = 2,
+            retry_delay: float = 1,
+            on_result: Callable[[BatchResult], None] | None = None,
+    ) -> BatchReport:
+        """Async counterpart of ``luoguAPI.batch_update_problem_settings``."""
+        return await abatch_update(self, problems, transform, concurrency, write_rate, retries, retry_delay, on_result)
+
     async def update_testcases_settings(
             self, pid: str,
             new_settings: TestCaseSettings
@@ -340,7 +271,7 @@ class asyncLuoguAPI:
         res = await self._send_request(
             endpoint=f"/fe/api/problem/editTestCase/{pid}",
             method="POST",
-            data=new_settings.to_json()
+            data=new_settings
         )
 
         return UpdateTestCasesSettingsResponse(res)
@@ -355,7 +286,7 @@ class asyncLuoguAPI:
             endpoint=f"fe/api/problem/new",
             method="POST",
             data={
-                "settings": settings.to_json(),
+                "settings": settings,
                 "type": _type,
                 "providerID": tid,
                 "comment": settings.comment
@@ -433,6 +364,18 @@ class asyncLuoguAPI:
         res = await self._send_request(endpoint="training/list", params=params)
         res["trainings"]["trainings"] = res["trainings"]["result"]
         return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_problem_sets(
+            self,
+            keyword: str | None = None,
+            type: ProblemSetType | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> AsyncIterator[ProblemSetSummary]:
+        return aiter_pages(
+            lambda page: self.get_problem_set_list(page, keyword, type),
+            lambda res: res.trainings, start, prefetch
+        )
     
     async def get_user(self, uid: int) -> UserDataRequestResponse:
         res = await self._send_request(endpoint=f"user/{uid}")
@@ -456,6 +399,15 @@ class asyncLuoguAPI:
         params = UserListRequestParams(json={"user": uid, "page": page})
         res = await self._send_request(endpoint=f"api/user/blacklist", params=params)
         return [UserDetails(user) for user in res["users"]["result"]]
+
+    def iter_followings(self, uid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[UserDetails]:
+        return aiter_pages(lambda page: self.get_user_following_list(uid, page), list, start, prefetch)
+
+    def iter_followers(self, uid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[UserDetails]:
+        return aiter_pages(lambda page: self.get_user_follower_list(uid, page), list, start, prefetch)
+
+    def iter_blacklist(self, uid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[UserDetails]:
+        return aiter_pages(lambda page: self.get_user_blacklist(uid, page), list, start, prefetch)
     
     async def search_user(self, keyword: str) -> List[UserSummary]:
         params = UserSearchRequestParams({"keyword" : keyword})
@@ -468,6 +420,50 @@ class asyncLuoguAPI:
         res["contest"]["problems"] = [x.get("problem") for x in res["contestProblems"]]
         res["contest"]["isScoreboardFrozen"] = res["isScoreboardFrozen"]
         return ContestDataRequestResponse(res)
+
+    async def get_contest_list(self, page: int | None = None) -> ContestListRequestResponse:
+        params = ListRequestParams(json={"page": page})
+        res = await self._send_request(endpoint="contest/list", params=params)
+        res["contests"]["contests"] = res["contests"]["result"]
+        return ContestListRequestResponse(res["contests"])
+
+    def iter_contests(self, start: int = 1, prefetch: bool = True) -> AsyncIterator[ContestSummary]:
+        return aiter_pages(self.get_contest_list, lambda res: res.contests, start, prefetch)
+
+    async def get_disscussion(
+            self,
+            id: int,
+            page: int | None = None,
+            orderBy: int | None = None,
+    ) -> DiscussionRequestResponse:
+        params = DiscussionRequestParams(json={"page": page, "orderBy": orderBy})
+        res = await self._send_request(endpoint=f"discuss/{id}", params=params)
+
+        res["perPage"] = res["replies"]["perPage"]
+        res["count"] = res["replies"]["count"]
+        res["replies"] = res["replies"]["result"]
+        return DiscussionRequestResponse(res)
+
+    def iter_replies(
+            self,
+            id: int,
+            orderBy: int | None = None,
+            start: int = 1,
+            prefetch: bool = True,
+    ) -> AsyncIterator[Reply]:
+        return aiter_pages(lambda page: self.get_disscussion(id, page, orderBy), lambda res: res.replies, start, prefetch)
+
+    async def get_activity(self, uid: int, page: int | None = None) -> ActivityRequestResponse:
+        params = ActivityReuqestParams(json={"user": uid, "page": page})
+        res = await self._send_request(endpoint=f"/api/feed/list", params=params)
+
+        res["activities"] = res["feeds"]["result"]
+        res["perPage"] = res["feeds"]["perPage"]
+        res["count"] = res["feeds"]["count"]
+        return ActivityRequestResponse(res)
+
+    def iter_activities(self, uid: int, start: int = 1, prefetch: bool = True) -> AsyncIterator[Activity]:
+        return aiter_pages(lambda page: self.get_activity(uid, page), lambda res: res.activities, start, prefetch)
     
     async def me(self) -> UserDetails:
         return (await self.get_user(self.cookies["_uid"].split("_")[0])).user
@@ -483,6 +479,9 @@ class asyncLuoguAPI:
         res["problems"] = res["problems"]["result"]
 
         return ProblemListRequestResponse(res)
+
+    def iter_created_problems(self, start: int = 1, prefetch: bool = True) -> AsyncIterator[ProblemSummary]:
+        return aiter_pages(self.get_created_problem_list, lambda res: res.problems, start, prefetch)
     
     async def get_created_problem_set_list(self, page: int | None = None):
         params = ListRequestParams(json={"page": page})
@@ -490,6 +489,9 @@ class asyncLuoguAPI:
 
         res["trainings"]["trainings"] = res["trainings"]["result"]
         return ProblemSetListRequestResponse(res["trainings"])
+
+    def iter_created_problem_sets(self, start: int = 1, prefetch: bool = True) -> AsyncIterator[ProblemSetSummary]:
+        return aiter_pages(self.get_created_problem_set_list, lambda res: res.trainings, start, prefetch)
     
     async def get_created_contest_list(self, page: int | None = None) -> ContestListRequestResponse:
         params = ListRequestParams(json={"page": page})
@@ -497,6 +499,9 @@ class asyncLuoguAPI:
         res["contests"]["contests"] = res["contests"]["result"]
         return ContestListRequestResponse(res["contests"])
 
+    def iter_created_contests(self, start: int = 1, prefetch: bool = True) -> AsyncIterator[ContestSummary]:
+        return aiter_pages(self.get_created_contest_list, lambda res: res.contests, start, prefetch)
+
     async def submit_code(
             self,
             pid: str,
@@ -0,0 +1,191 @@
+"""
+Concurrent read -> transform -> write pipeline over many problems' settings,
+behind ``luoguAPI.batch_update_problem_settings`` and its async counterpart.
+
+The selector (pids, or items with a ``pid`` such as ``api.iter_problems(tag=...)``)
+is listed in full before the first write: an update can move a problem out
+of the listing being walked, which would shift later pages under a lazy
+walk. Up to ``concurrency`` problems are then processed at once. Reads run
+freely, writes wait for a token from a bucket of ``write_rate`` per second
+(on top of the client's own rate limiter), so a migration runs at the write
+limit instead of one problem at a time. Each problem ends up as a
+``BatchResult``; a failure never stops the batch.
+"""
+__all__ = [
+    "BatchResult",
+    "BatchReport",
+    "batch_update",
+    "abatch_update",
+]
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List
+
+from .bits.ultility import json_dumps_bytes
+from .errors import AuthenticationError, ForbiddenError, LuoguAPIError, NeedCaptcha, NotFoundError
+from .ratelimit import DecorrelatedJitter, TokenBucket
+from .types import ProblemSettings
+from . import logger
+
+Transform = Callable[[ProblemSettings], ProblemSettings | None]
+
+# retrying cannot fix these
+PERMANENT_ERRORS = (NotFoundError, ForbiddenError, AuthenticationError, NeedCaptcha)
+
+class BatchResult:
+    """
+    Outcome for one problem. ``status`` is ``"updated"``, ``"unchanged"``
+    (the transform returned None or equal settings, nothing was written) or
+    ``"failed"``, with the last exception in ``error``.
+    """
+    __slots__ = ("pid", "status", "error", "attempts")
+
+    def __init__(self, pid: str, status: str, error: BaseException | None = None, attempts: int = 1):
+        self.pid = pid
+        self.status = status
+        self.error = error
+        self.attempts = attempts
+
+    def __repr__(self):
+        error = "" if self.error is None else f", error={self.error!r}"
+        return f"BatchResult<{self.pid}: {self.status}, attempts={self.attempts}{error}>"
+
+class BatchReport:
+    """Results of a batch, in selector order."""
+    def __init__(self, results: List[BatchResult], elapsed: float):
+        self.results = results
+        self.elapsed = elapsed
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(("updated", "unchanged", "failed"), 0)
+        for result in self.results:
+            counts[result.status] += 1
+        return counts
+
+    @property
+    def failed(self) -> List[BatchResult]:
+        return [result for result in self.results if result.status == "failed"]
+
+    def __str__(self):
+        counts = ", ".join(f"{count} {status}" for status, count in self.counts().items())
+        lines = [f"{len(self.results)} problems in {self.elapsed:.1f}s: {counts}"]
+        lines.extend(f"  {result.pid}: {result.error!r}" for result in self.failed)
+        return "\n".join(lines)
+
+def _pid(item: str | Any) -> str:
+    return item if isinstance(item, str) else item.pid
+
+def _apply(transform: Transform, settings: ProblemSettings) -> ProblemSettings | None:
+    """The settings to write, or None when the transform leaves them as they are."""
+    before = json_dumps_bytes(settings)
+    after = transform(settings)
+    if after is None or json_dumps_bytes(after) == before:
+        return None
+    return after
+
+class _Pipeline:
+    """Write bucket, retry policy and result callback shared by the sync and async runners."""
+    def __init__(self, write_rate: float | None, retries: int, retry_delay: float, on_result):
+        self.bucket = None if write_rate is None else TokenBucket(write_rate)
+        self.retries = retries
+        self.on_result = on_result
+        self.backoff = DecorrelatedJitter(retry_delay, cap=60)
+
+    def failed(self, pid: str, error: BaseException, attempt: int, delay: float | None) -> float | None:
+        """Log ``error``; return the delay before retrying, None to give up."""
+        if isinstance(error, LuoguAPIError) and not isinstance(error, PERMANENT_ERRORS) and attempt < self.retries:
+            logger.warning(f"{pid}: attempt {attempt + 1} failed - {error!r}")
+            return self.backoff.next(delay)
+        logger.error(f"{pid}: {error!r}")
+        return None
+
+    def done(self, result: BatchResult) -> BatchResult:
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
+
+def batch_update(
+        api,
+        problems: Iterable[str | Any],
+        transform: Transform,
+        concurrency: int = 4,
+        write_rate: float | None = 0.5,
+        retries: int = 2,
+        retry_delay: float = 1,
+        on_result: Callable[[BatchResult], None] | None = None,
+) -> BatchReport:
+    """
+    Fetch the settings of every problem of ``problems`` with ``api``
+    (a ``luoguAPI``), pass them to ``transform`` and write back what it
+    returns. ``transform`` may edit and return its argument. A problem is
+    re-run up to ``retries`` more times after an API error that is not
+    permanent (not found, forbidden, ...), after a jittered delay of at
+    least ``retry_delay`` seconds; errors raised by ``transform`` fail it
+    at once. ``on_result`` is called as each problem finishes.
+    """
+    begin = time.perf_counter()
+    pids = [_pid(item) for item in problems]
+    pipeline = _Pipeline(write_rate, retries, retry_delay, on_result)
+
+    def run(pid: str) -> BatchResult:
+        delay = None
+        for attempt in range(retries + 1):
+            try:
+                settings = _apply(transform, api.get_problem_settings_legacy(pid).problemSettings)
+                if settings is None:
+                    return pipeline.done(BatchResult(pid, "unchanged", attempts=attempt + 1))
+                if pipeline.bucket is not None:
+                    time.sleep(pipeline.bucket.reserve())
+                api.update_problem_settings(pid, settings)
+                return pipeline.done(BatchResult(pid, "updated", attempts=attempt + 1))
+            except Exception as e:
+                delay = pipeline.failed(pid, e, attempt, delay)
+                if delay is None:
+                    return pipeline.done(BatchResult(pid, "failed", e, attempt + 1))
+                time.sleep(delay)
+
+    with ThreadPoolExecutor(max(1, min(concurrency, len(pids))), thread_name_prefix="pyLuogu-batch") as executor:
+        results = list(executor.map(run, pids))
+    return BatchReport(results, time.perf_counter() - begin)
+
+async def abatch_update(
+        api,
+        problems: Iterable[str | Any] | AsyncIterable[str | Any],
+        transform: Transform,
+        concurrency: int = 4,
+        write_rate: float | None = 0.5,
+        retries: int = 2,
+        retry_delay: float = 1,
+        on_result: Callable[[BatchResult], None] | None = None,
+) -> BatchReport:
+    """Async counterpart of ``batch_update`` for an ``asyncLuoguAPI``."""
+    begin = time.perf_counter()
+    if hasattr(problems, "__aiter__"):
+        pids = [_pid(item) async for item in problems]
+    else:
+        pids = [_pid(item) for item in problems]
+    pipeline = _Pipeline(write_rate, retries, retry_delay, on_result)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(pid: str) -> BatchResult:
+        delay = None
+        async with semaphore:
+            for attempt in range(retries + 1):
+                try:
+                    settings = _apply(transform, (await api.get_problem_settings(pid)).problemSettings)
+                    if settings is None:
+                        return pipeline.done(BatchResult(pid, "unchanged", attempts=attempt + 1))
+                    if pipeline.bucket is not None:
+                        await asyncio.sleep(pipeline.bucket.reserve())
+                    await api.update_problem_settings(pid, settings)
+                    return pipeline.done(BatchResult(pid, "updated", attempts=attempt + 1))
+                except Exception as e:
+                    delay = pipeline.failed(pid, e, attempt, delay)
+                    if delay is None:
+                        return pipeline.done(BatchResult(pid, "failed", e, attempt + 1))
+                    await asyncio.sleep(delay)
+
+    results = await asyncio.gather(*[run(pid) for pid in pids])
+    return BatchReport(list(results), time.perf_counter() - begin)
@@ -0,0 +1,73 @@
+"""
+Append-only JSON-lines key/value file backing ``Checkpoint`` and ``SyncSnapshot``.
+
+Every change appends one line: ``[key, *fields]`` sets ``key`` and ``[key]``
+deletes it; the last line of a key wins. Lines are flushed to the OS as
+they are written, and a line cut short by a crash is ignored. The file is
+compacted to one line per live key when opened.
+"""
+__all__ = [
+    "Journal",
+]
+
+import os
+from typing import Dict, List
+
+from . import jsonlib
+from .ultility import json_dumps_bytes
+
+class Journal:
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.entries: Dict[str, List] = {}
+        if self._load() > len(self.entries):
+            self._compact()
+        self._file = open(path, "ab")
+
+    def _load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as file:
+            lines = file.read().splitlines()
+        entries = self.entries
+        for line in lines:
+            try:
+                entry = jsonlib.loads(line)
+            except ValueError:
+                break  # a line cut short by a crash
+            if len(entry) == 1:
+                entries.pop(entry[0], None)
+            else:
+                entries[entry[0]] = entry[1:]
+        return len(lines)
+
+    def _compact(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(b"".join(json_dumps_bytes([key, *fields]) + b"\n" for key, fields in self.entries.items()))
+        os.replace(temp_path, self.path)
+
+    def get(self, key: str) -> List | None:
+        return self.entries.get(key)
+
+    def put(self, key: str, *fields):
+        self.entries[key] = list(fields)
+        self._file.write(json_dumps_bytes([key, *fields]) + b"\n")
+        self._file.flush()
+
+    def delete(self, key: str):
+        if self.entries.pop(key, None) is not None:
+            self._file.write(json_dumps_bytes([key]) + b"\n")
+            self._file.flush()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        self._file.close()
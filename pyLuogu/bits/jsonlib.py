@@ -0,0 +1,95 @@
+"""
+JSON backend for response bodies, cached bodies and ``store``/``from_file``.
+
+The first installed of orjson, msgspec and ujson is used, falling back to
+the standard library. ``PYLUOGU_JSON=<name>`` or ``use(name)`` picks one
+explicitly. Callers go through ``jsonlib.loads``/``jsonlib.dumps`` as module
+attributes so a switch takes effect everywhere.
+"""
+__all__ = [
+    "BACKENDS",
+    "name",
+    "loads",
+    "dumps",
+    "use",
+]
+
+import json
+import os
+from typing import Any, Callable, Dict, Tuple
+
+Loads = Callable[[bytes | str], Any]
+Dumps = Callable[..., bytes]
+
+# ``dumps(obj, default=None)`` must return compact UTF-8 bytes and call
+# ``default`` for objects it cannot encode, like ``json.JSONEncoder`` does
+
+def _orjson() -> Tuple[Loads, Dumps]:
+    import orjson
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj, default=None) -> bytes:
+        return orjson.dumps(obj, default=default, option=option)
+    return orjson.loads, dumps
+
+def _msgspec() -> Tuple[Loads, Dumps]:
+    import msgspec
+    encoders = {}
+
+    def dumps(obj, default=None) -> bytes:
+        encoder = encoders.get(default)
+        if encoder is None:
+            encoder = encoders[default] = msgspec.json.Encoder(enc_hook=default)
+        return encoder.encode(obj)
+    return msgspec.json.Decoder().decode, dumps
+
+def _ujson() -> Tuple[Loads, Dumps]:
+    import ujson
+
+    def dumps(obj, default=None) -> bytes:
+        return ujson.dumps(obj, default=default, ensure_ascii=False, escape_forward_slashes=False).encode()
+    return ujson.loads, dumps
+
+def _stdlib() -> Tuple[Loads, Dumps]:
+    encoders = {}
+
+    def dumps(obj, default=None) -> bytes:
+        encoder = encoders.get(default)
+        if encoder is None:
+            encoder = encoders[default] = json.JSONEncoder(default=default, ensure_ascii=False, separators=(",", ":"))
+        return encoder.encode(obj).encode()
+    return json.loads, dumps
+
+# in order of preference
+BACKENDS: Dict[str, Callable[[], Tuple[Loads, Dumps]]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "ujson": _ujson,
+    "json": _stdlib,
+}
+
+name = "json"
+loads, dumps = _stdlib()
+
+def use(backend: str | None = None) -> str:
+    """
+    Switch to ``backend``, or to the first installed one when None, and
+    return its name. Naming a backend that is not installed raises ImportError.
+    Decoding errors of every backend are ``ValueError`` subclasses.
+    """
+    global name, loads, dumps
+    if backend is None:
+        for candidate, factory in BACKENDS.items():
+            try:
+                loads, dumps = factory()
+            except ImportError:
+                continue
+            name = candidate
+            return name
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {backend}, expected one of {', '.join(BACKENDS)}")
+    loads, dumps = BACKENDS[backend]()
+    name = backend
+    return name
+
+use(os.environ.get("PYLUOGU_JSON") or None)
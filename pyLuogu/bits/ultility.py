@@ -4,14 +4,30 @@ __all__ = [
     "Printable",
     "CacheItem",
     "CachePool",
+    "approximate_size",
+    "json_dumps",
+    "json_dumps_bytes",
+    "InternTable",
+    "msgpack_dumps",
+    "msgpack_loads",
 ]
 
-from typing import Generic, TypeVar, Dict, Any, Awaitable, Callable, Union
+from collections import OrderedDict
+from typing import Generic, TypeVar, Dict, Any, Awaitable, Callable, Union, Literal
 
+import contextvars
+import inspect
+import itertools
 import json
+import keyword
+import operator
+import sys
+import threading
 import time
+import types
 
 from .strings import str_type_of, str_val, decorating, str_type
+from . import jsonlib
 
 
 def make_list(val) -> list:
@@ -21,119 +37,770 @@ def make_list(val) -> list:
         return [val]
 
 
-class JsonSerializable:
-    __type_dict__ = {}  # 子类应定义属性名与类型的映射
+def _trusted(_key, _value):
+    """Converter for values used as they are: TypeVars, and plain types when not validating."""
+    return _value
 
-    def __init__(self, json=None):
-        if json is None:
-            json = {}
-        self.parse(json)
+# (lazy, validate) -> class attribute caching the matching compiled parser
+_PARSER_NAMES = {
+    (False, True): "__parser__",
+    (True, True): "__lazy_parser__",
+    (False, False): "__trusted_parser__",
+    (True, False): "__trusted_lazy_parser__",
+}
 
-    def parse(self, json):
-        """
-        初始化对象，将 JSON 数据映射到对象属性
-        """
+def _compile_converter(expected_type, lazy: bool = False, validate: bool = True) -> Callable[[Any, Any], Any]:
+    """
+    Build a ``convert(key, value)`` function for one ``__type_dict__`` entry.
+    The shape of ``expected_type`` is inspected here once instead of on
+    every value; ``key`` is only used in error messages. With ``lazy`` the
+    objects built parse their own nested fields lazily. Without ``validate``
+    types and lengths are trusted and values only reshaped (lists to tuples,
+    dicts to objects).
+    """
+    if isinstance(expected_type, list):
+        if len(expected_type) != 1:
+            def convert(_key, _value):
+                if _value is None:
+                    return None
+                raise TypeError(f"List type must have exactly one element type: {expected_type}")
+            return convert
+        inner_type = expected_type[0]
+        inner = _compile_converter(inner_type, lazy, validate)
+
+        if not validate:
+            if inner is _trusted:
+                return lambda _key, _value: None if _value is None else list(_value)
+            return lambda _key, _value: None if _value is None else [inner(None, v) for v in _value]
+
+        def convert(_key, _value):
+            if _value is None:
+                return None
+            if not isinstance(_value, list):
+                raise TypeError(f"{_key} Expected a list of {inner_type}, got {type(_value)}")
+            return [inner(None, v) for v in _value]
+        return convert
+
+    if isinstance(expected_type, tuple):
+        inners = tuple(_compile_converter(t, lazy, validate) for t in expected_type)
+        length = len(expected_type)
 
-        def handle_nested_type(_key, _value, _expected_type):
-            """
-            处理嵌套类型的转换
-            """
+        if not validate:
+            if all(c is _trusted for c in inners):
+                return lambda _key, _value: None if _value is None else tuple(_value)
+            return lambda _key, _value: None if _value is None else tuple(c(None, v) for c, v in zip(inners, _value))
+
+        def convert(_key, _value):
+            if _value is None:
+                return None
+            if not isinstance(_value, (list, tuple)) or len(_value) != length:
+                raise TypeError(f"{_key} Expected a tuple of {expected_type}, got {type(_value)} with value {_value}")
+            return tuple(c(None, v) for c, v in zip(inners, _value))
+        return convert
+
+    if isinstance(expected_type, dict):
+        key_type, val_type = next(iter(expected_type.items()))
+        convert_key = _compile_converter(key_type, lazy, validate)
+        convert_val = _compile_converter(val_type, lazy, validate)
+
+        def convert(_key, _value):
             if _value is None:
                 return None
+            if isinstance(_value, dict):
+                return {convert_key(None, k): convert_val(None, v) for k, v in _value.items()}
+            if isinstance(_value, list):
+                return {convert_key(None, key_type(k)): convert_val(None, v) for k, v in enumerate(_value)}
+            raise TypeError(f"{_key} Expected a dict of {expected_type}, got {type(_value)}")
+        return convert
 
-            if isinstance(_expected_type, list):
-                if len(_expected_type) != 1:
-                    raise TypeError(f"List type must have exactly one element type: {_expected_type}")
-                inner_type = _expected_type[0]
-                if not isinstance(_value, list):
-                    raise TypeError(f"{_key} Expected a list of {inner_type}, got {type(_value)}")
-                return [handle_nested_type(None, v, inner_type) for v in _value]
-
-            elif isinstance(_expected_type, tuple):
-                if not isinstance(_value, (list, tuple)) or len(_value) != len(_expected_type):
-                    raise TypeError(f"{_key} Expected a tuple of {_expected_type}, got {type(_value)} with value {_value}")
-                return tuple(handle_nested_type(None, v, t) for v, t in zip(_value, _expected_type))
-
-            elif isinstance(_expected_type, dict):
-                if not isinstance(_value, dict) and not isinstance(_value, list):
-                    raise TypeError(f"{_key} Expected a dict of {_expected_type}, got {type(_value)}")
-                key_type, val_type = list(_expected_type.items())[0]
-                if isinstance(_value, list):
-                    return {handle_nested_type(None, key_type(k), key_type): handle_nested_type(None, v, val_type) for k, v in enumerate(_value)}
-                return {handle_nested_type(None, k, key_type): handle_nested_type(None, v, val_type) for k, v in _value.items()}
-
-            elif issubclass(_expected_type, JsonSerializable):
-                return _expected_type(json=_value)
-
-            elif not isinstance(_value, _expected_type):
-                raise TypeError(f"{_key} Expected {_expected_type}, got {type(_value)}")
+    if not isinstance(expected_type, type):
+        # e.g. a TypeVar: nothing to check against
+        return _trusted
 
+    if issubclass(expected_type, JsonSerializable):
+        if (
+            expected_type.__init__ is not JsonSerializable.__init__
+            or expected_type.parse is not JsonSerializable.parse
+            or expected_type.__new__ is not JsonSerializable.__new__
+        ):
+            # custom constructors (e.g. ``Provider``) must see the raw value
+            convert = lambda _key, _value: None if _value is None else expected_type(json=_value)
+        else:
+            name = _PARSER_NAMES[lazy, validate]
+            target = expected_type._lazy_class() if lazy else expected_type
+
+            def convert(_key, _value):
+                if _value is None:
+                    return None
+                obj = (target.__dict__.get("__blank__") or target._blank())(object.__new__(target))
+                (target.__dict__.get(name) or target._parser(lazy, validate))(obj, _value)
+                return obj
+
+        if expected_type.__intern_key__ is not None:
+            return _interning_converter(expected_type, convert)
+        return convert
+
+    if not validate:
+        return _trusted
+
+    def convert(_key, _value):
+        if _value is None or isinstance(_value, expected_type):
             return _value
+        raise TypeError(f"{_key} Expected {expected_type}, got {type(_value)}")
+    return convert
+
+# the ``InternTable`` in effect, set by ``with table:``
+_interning: contextvars.ContextVar = contextvars.ContextVar("pyLuogu_interning", default=None)
+
+def _interning_converter(cls, build: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """Wrap ``build`` so that, inside ``with InternTable()``, equal values of ``cls`` share one object."""
+    fields = cls.__intern_key__
+    if isinstance(fields, str):
+        identity = lambda value: value.get(fields)
+    else:
+        def identity(value):
+            ident = tuple(value.get(field) for field in fields)
+            return None if all(part is None for part in ident) else ident
+
+    def convert(_key, _value):
+        table = _interning.get()
+        if table is None or not isinstance(_value, dict):
+            return build(_key, _value)
+        ident = identity(_value)
+        if ident is None:
+            return build(_key, _value)
+        return table._intern(cls, ident, _value, _key, build)
+    return convert
+
+class InternTable:
+    """
+    Shares sub-objects while parsing: inside ``with table:``, nested objects
+    of classes with an ``__intern_key__`` (users by ``uid``, teams by ``id``,
+    forums by ``slug``, ...) are built once per identity and reused whenever
+    the same data appears again, in this response or any later one parsed
+    under the same table. Keep one table per response or per crawl.
+
+    Shared objects are the same instance everywhere they appear, so
+    modifying one shows through every place it appears. Data differing from
+    the stored copy (e.g. a renamed user) gets a fresh object, which then
+    replaces the stored one.
+    """
+    def __init__(self):
+        self._objects: Dict[tuple, tuple] = {}
+        self._tokens = []
+        self.hits = 0
+        self.misses = 0
+
+    def _intern(self, cls, ident, value: dict, key, build: Callable[[Any, Any], Any]):
+        entry = self._objects.get((cls, ident))
+        if entry is not None and entry[0] == value:
+            self.hits += 1
+            return entry[1]
+        obj = build(key, value)
+        self._objects[cls, ident] = (value, obj)
+        self.misses += 1
+        return obj
+
+    def __enter__(self):
+        self._tokens.append(_interning.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _interning.reset(self._tokens.pop())
+
+    def __len__(self):
+        return len(self._objects)
+
+    def clear(self):
+        self._objects.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._objects), "hits": self.hits, "misses": self.misses}
+
+def _holds_objects(expected_type) -> bool:
+    """Whether values of the ``__type_dict__`` shape ``expected_type`` contain ``JsonSerializable`` objects."""
+    if isinstance(expected_type, (list, tuple)):
+        return any(_holds_objects(t) for t in expected_type)
+    if isinstance(expected_type, dict):
+        return any(_holds_objects(t) for t in expected_type.values())
+    return isinstance(expected_type, type) and issubclass(expected_type, JsonSerializable)
+
+class _Deferred:
+    """
+    A field value kept as raw JSON until ``_LazyField`` materializes it. The
+    ``InternTable`` in effect when it was parsed is kept, and used again when
+    it is built, usually after the ``with`` block has been left.
+    """
+    __slots__ = ("convert", "key", "raw", "table")
+
+    def __init__(self, convert: Callable[[Any, Any], Any], key: str, raw):
+        self.convert = convert
+        self.key = key
+        self.raw = raw
+        self.table = _interning.get()
+
+    def build(self):
+        if self.table is _interning.get():
+            return self.convert(self.key, self.raw)
+        token = _interning.set(self.table)
+        try:
+            return self.convert(self.key, self.raw)
+        finally:
+            _interning.reset(token)
+
+class _LazyField:
+    """
+    Data descriptor in front of a field's slot, or of its ``__dict__`` entry
+    when ``storage`` is None. Reading a ``_Deferred`` value converts it and
+    stores the result, so each nested field is built at most once.
+    """
+    __slots__ = ("name", "storage")
+
+    def __init__(self, name: str, storage):
+        self.name = name
+        self.storage = storage
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        if self.storage is None:
+            try:
+                value = obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name) from None
+        else:
+            value = self.storage.__get__(obj, cls)
+        if type(value) is _Deferred:
+            value = value.build()
+            self.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        if self.storage is None:
+            obj.__dict__[self.name] = value
+        else:
+            self.storage.__set__(obj, value)
+
+    def __delete__(self, obj):
+        if self.storage is None:
+            try:
+                del obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name) from None
+        else:
+            self.storage.__delete__(obj)
 
+def _install_lazy_field(cls, key: str) -> bool:
+    """
+    Put a ``_LazyField`` in front of ``key`` on ``cls``, a class made by
+    ``JsonSerializable._lazy_class``. Returns False when the field is stored
+    some other way (e.g. a property) and cannot be deferred.
+    """
+    for klass in cls.__mro__:
+        if key in klass.__dict__:
+            attr = klass.__dict__[key]
+            break
+    else:
+        attr = None
+    if isinstance(attr, _LazyField):
+        return True
+    if attr is None and cls.__dictoffset__:
+        storage = None
+    elif type(attr) is types.MemberDescriptorType:
+        storage = attr
+    else:
+        return False
+    setattr(cls, key, _LazyField(key, storage))
+    return True
+
+def _compile_parser(cls, lazy: bool = False, validate: bool = True) -> Callable[[Any, dict], None]:
+    """
+    Specialize ``JsonSerializable.parse`` for ``cls.__type_dict__``. With
+    ``lazy``, and ``cls`` being a lazy class (see
+    ``JsonSerializable._lazy_class``), the fields holding ``JsonSerializable``
+    objects keep their raw value in a ``_Deferred`` and are only converted
+    when first read. Without ``validate`` plain fields are assigned unchecked.
+    """
+    # plain types are checked inline; everything else goes through a converter
+    primitives = {}
+    converters = {}
+    deferred = {}
+    for key, expected_type in cls.__type_dict__.items():
+        if isinstance(expected_type, type) and not issubclass(expected_type, JsonSerializable):
+            primitives[key] = expected_type
+        elif (
+            lazy and "__lazy_base__" in cls.__dict__
+            and _holds_objects(expected_type) and _install_lazy_field(cls, key)
+        ):
+            deferred[key] = _compile_converter(expected_type, lazy, validate)
+        else:
+            converters[key] = _compile_converter(expected_type, lazy, validate)
+
+    # missing keys need no work: ``JsonSerializable.__new__`` sets every field to None
+    if not validate:
+        def parse(obj, json):
+            for key, value in json.items():
+                if key in primitives:
+                    setattr(obj, key, value)
+                    continue
+                convert = converters.get(key)
+                if convert is not None:
+                    setattr(obj, key, None if value is None else convert(key, value))
+                    continue
+                convert = deferred.get(key)
+                if convert is not None:
+                    setattr(obj, key, None if value is None else _Deferred(convert, key, value))
+        return parse
+
+    def parse(obj, json):
         if not isinstance(json, dict):
             raise TypeError(f"Expected a dictionary, got {type(json)}")
-
         for key, value in json.items():
-            expected_type = self.__type_dict__.get(key)
+            expected_type = primitives.get(key)
+            if expected_type is not None:
+                if value is not None and not isinstance(value, expected_type):
+                    raise TypeError(f"{key} Expected {expected_type}, got {type(value)}")
+                setattr(obj, key, value)
+                continue
+            convert = converters.get(key)
+            if convert is not None:
+                setattr(obj, key, None if value is None else convert(key, value))
+                continue
+            convert = deferred.get(key)
+            if convert is not None:
+                setattr(obj, key, None if value is None else _Deferred(convert, key, value))
+
+    return parse
+
+# shared by every sampled parse, so one in N top-level parses (of any class)
+# is validated; nested objects are validated along with their parent
+_sample_counter = itertools.count()
+
+def _should_validate(validate: bool | int) -> bool:
+    """``validate`` is a bool, or N >= 1 to validate one parse in every N."""
+    if validate is True or validate is False:
+        return validate
+    if not isinstance(validate, int) or validate < 1:
+        raise ValueError(f"validate must be a bool or a positive integer, got {validate!r}")
+    return next(_sample_counter) % validate == 0
+
+def _compile_blank(cls) -> Callable[[Any], Any]:
+    """
+    Build a function setting every field of ``cls`` to None. It is generated
+    as straight-line attribute stores, the fastest way to fill slots.
+    """
+    lines = ["def blank(obj):"]
+    for key in cls.__type_dict__:
+        if key.isidentifier() and not keyword.iskeyword(key):
+            lines.append(f"    obj.{key} = None")
+        else:
+            lines.append(f"    setattr(obj, {key!r}, None)")
+    lines.append("    return obj")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["blank"]
+
+def _slots_for(bases: tuple, type_dict: dict) -> tuple:
+    """``__slots__`` for a class with ``type_dict`` deriving from ``bases``."""
+    inherited = set()
+    for base in bases:
+        for klass in base.__mro__:
+            own = klass.__dict__.get("__slots__", ())
+            inherited.update((own,) if isinstance(own, str) else own)
+    has_dict = any(base.__dictoffset__ for base in bases)
+    slots = []
+    for key in type_dict:
+        if key in inherited:
+            continue
+        # names like ``__client_id`` would be mangled as slots; keep them in a __dict__
+        if key.isidentifier() and not (key.startswith("__") and not key.endswith("__")):
+            slots.append(key)
+        elif not has_dict:
+            slots.append("__dict__")
+            has_dict = True
+    return tuple(slots)
+
+
+_SCALARS = frozenset((str, int, float, bool))
+
+def _serialize(value):
+    if type(value) in _SCALARS:
+        return value
+    if isinstance(value, JsonSerializable):
+        return value.to_json()  # 递归处理嵌套对象
+    if isinstance(value, (list, tuple)):
+        return [_serialize(v) for v in value]  # 递归处理列表，元组转换为列表
+    if isinstance(value, dict):
+        return {_serialize(k): _serialize(v) for k, v in value.items()}  # 递归处理字典
+    return value
 
-            if expected_type is None:
+def _values_getter(keys: tuple) -> Callable[[Any], tuple]:
+    """Function returning the values of ``keys`` on an object as a tuple, None where unset."""
+    if len(keys) > 1 and not any("." in key for key in keys):
+        getter = operator.attrgetter(*keys)
+    else:
+        getter = lambda obj: tuple(getattr(obj, key) for key in keys)
+
+    def values(obj) -> tuple:
+        try:
+            return getter(obj)
+        except AttributeError:
+            # e.g. a field deleted with ``del``
+            return tuple(getattr(obj, key, None) for key in keys)
+    return values
+
+def _compile_serializer(cls):
+    """
+    Specialize serialization for ``cls.__type_dict__``. Returns ``to_json``,
+    building the full dict tree, ``fields``, a shallow dict of the set
+    fields that a ``json.JSONEncoder`` walks itself (see ``json_dumps``),
+    and ``values``, every field as a tuple in ``__type_dict__`` order (the
+    positional form used by pickling and msgpack).
+    """
+    keys = tuple(cls.__type_dict__)
+    values = _values_getter(keys)
+
+    def to_json(obj) -> dict:
+        json_data = {}
+        for key, value in zip(keys, values(obj)):
+            if value is None:
                 continue
+            json_data[key] = value if type(value) in _SCALARS else _serialize(value)
+        return json_data
 
-            if value is not None:
-                value = handle_nested_type(key, value, expected_type)
+    def fields(obj) -> dict:
+        return {key: value for key, value in zip(keys, values(obj)) if value is not None}
+
+    if cls.to_json is not JsonSerializable.to_json:
+        # a custom to_json decides the encoding too
+        fields = cls.to_json
+
+    return to_json, fields, values
+
+# class -> its compiled ``fields``; the encoder calls ``_json_default`` once per object
+_fields_of: Dict[type, Callable[[Any], dict]] = {}
+
+def _json_default(obj):
+    fields = _fields_of.get(type(obj))
+    if fields is None:
+        if not isinstance(obj, JsonSerializable):
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+        fields = _fields_of[type(obj)] = type(obj)._serializer()[1]
+    return fields(obj)
+
+_encoder = json.JSONEncoder(default=_json_default)
+
+def json_dumps(obj) -> str:
+    """
+    ``json.dumps`` that also accepts ``JsonSerializable`` objects anywhere in
+    ``obj``. The C encoder walks the objects' fields directly, so no
+    intermediate ``to_json`` tree is built.
+    """
+    return _encoder.encode(obj)
+
+def json_dumps_bytes(obj) -> bytes:
+    """
+    Compact UTF-8 encoding of ``obj``, accepting objects as ``json_dumps``
+    does; meant for request bodies and files. Uses the ``jsonlib`` backend.
+    """
+    return jsonlib.dumps(obj, _json_default)
+
+def _compile_assigner(cls) -> Callable[[Any, Any], None]:
+    """
+    Build ``assign(obj, values)`` setting the fields of ``cls`` from a
+    sequence in ``__type_dict__`` order, as one unpacking assignment.
+    """
+    keys = list(cls.__type_dict__)
+    if keys and all(key.isidentifier() and not keyword.iskeyword(key) for key in keys):
+        targets = ", ".join(f"obj.{key}" for key in keys)
+        source = f"def assign(obj, values):\n    {targets}, = values\n"
+    else:
+        source = "def assign(obj, values):\n"
+        source += "".join(f"    setattr(obj, {key!r}, values[{i}])\n" for i, key in enumerate(keys))
+        source += "    pass\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace["assign"]
+
+def _restore(cls, values):
+    """Rebuild an object from its positional ``values``; the target of ``JsonSerializable.__reduce__``."""
+    obj = object.__new__(cls)
+    (cls.__dict__.get("__assign__") or cls._assigner())(obj, values)
+    return obj
+
+def _compile_unpacker(expected_type) -> Callable[[Any], Any] | None:
+    """
+    Converter from the positional form of ``expected_type`` (objects as
+    arrays of field values) back to objects, or None when values are kept
+    as they are.
+    """
+    if isinstance(expected_type, list):
+        inner = _compile_unpacker(expected_type[0]) if len(expected_type) == 1 else None
+        if inner is None:
+            return None
+        return lambda value: None if value is None else [inner(v) for v in value]
+    if isinstance(expected_type, tuple):
+        inners = tuple(_compile_unpacker(t) or (lambda v: v) for t in expected_type)
+        return lambda value: None if value is None else tuple(c(v) for c, v in zip(inners, value))
+    if isinstance(expected_type, dict):
+        inner = _compile_unpacker(next(iter(expected_type.values())))
+        if inner is None:
+            return None
+        return lambda value: None if value is None else {k: inner(v) for k, v in value.items()}
+    if isinstance(expected_type, type) and issubclass(expected_type, JsonSerializable):
+        return lambda value: None if value is None else (
+            expected_type.__dict__.get("__unpacker__") or expected_type._unpacker()
+        )(value)
+    return None
+
+def _compile_class_unpacker(cls) -> Callable[[Any], Any]:
+    """Build ``unpack(values)`` turning the positional form of a ``cls`` object back into one."""
+    converters = []
+    for i, expected_type in enumerate(cls.__type_dict__.values()):
+        convert = _compile_unpacker(expected_type)
+        if convert is not None:
+            converters.append((i, convert))
+    assign = cls._assigner()
 
-            setattr(self, key, value)
+    def unpack(values):
+        if converters:
+            values = list(values)
+            for i, convert in converters:
+                values[i] = convert(values[i])
+        obj = object.__new__(cls)
+        assign(obj, values)
+        return obj
+    return unpack
 
-        for key, expected_type in self.__type_dict__.items():
-            if not hasattr(self, key):
-                setattr(self, key, None)  # 默认值为 None
+# class -> its compiled ``values``; the msgpack packer calls ``_msgpack_default`` once per object
+_values_of: Dict[type, Callable[[Any], tuple]] = {}
+
+def _msgpack_default(obj):
+    values = _values_of.get(type(obj))
+    if values is None:
+        if not isinstance(obj, JsonSerializable):
+            raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+        values = _values_of[type(obj)] = type(obj)._serializer()[2]
+    return values(obj)
+
+def msgpack_dumps(obj) -> bytes:
+    """
+    Encode ``obj`` with msgpack (an optional dependency), writing every
+    ``JsonSerializable`` as an array of its field values in
+    ``__type_dict__`` order instead of a map of names. Decode with
+    ``msgpack_loads`` and the same shape; both sides must share the same
+    ``__type_dict__``, so this is meant for caches and inter-process use.
+    """
+    import msgpack
+    return msgpack.packb(obj, default=_msgpack_default)
+
+def msgpack_loads(data: bytes, shape):
+    """
+    Decode ``msgpack_dumps`` output. ``shape`` is written like a
+    ``__type_dict__`` entry, e.g. ``ProblemSummary`` or ``[ProblemSummary]``.
+    """
+    import msgpack
+    value = msgpack.unpackb(data, strict_map_key=False)
+    convert = _compile_unpacker(shape)
+    return value if convert is None else convert(value)
+
+
+class JsonSerializableMeta(type):
+    """
+    Classes created with ``slots=True``, and their subclasses, get
+    ``__slots__`` generated from ``__type_dict__``, so their instances have
+    no per-instance ``__dict__``. A class body that defines ``__slots__``
+    itself is left as written (add ``"__dict__"`` to allow extra attributes).
+    """
+    def __new__(mcs, name, bases, namespace, slots: bool | None = None, **kwargs):
+        if slots is None:
+            slots = any(getattr(base, "__use_slots__", False) for base in bases)
+        namespace["__use_slots__"] = slots
+        if slots and "__slots__" not in namespace:
+            namespace["__slots__"] = _slots_for(bases, namespace.get("__type_dict__", {}))
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class JsonSerializable(metaclass=JsonSerializableMeta):
+    __slots__ = ()
+    __type_dict__ = {}  # 子类应定义属性名与类型的映射
+    __lazy__ = False  # 构造时 lazy 参数的默认值，子类可覆盖
+    __validate__ = True  # 构造时 validate 参数的默认值：True、False 或正整数 N（每 N 次顶层解析校验一次）
+    __intern_key__ = None  # 标识字段名（或字段名元组），在 InternTable 中按此共享相同的子对象
+
+    def __new__(cls, *args, **kwargs):
+        # 所有字段默认值为 None
+        obj = object.__new__(cls)
+        (cls.__dict__.get("__blank__") or cls._blank())(obj)
+        return obj
+
+    def __init__(self, json=None, lazy: bool | None = None, validate: bool | int | None = None):
+        if json is None:
+            json = {}
+        if lazy is None:
+            lazy = self.__lazy__
+        if validate is None:
+            validate = self.__validate__
+        self.parse(json, lazy, validate)
+
+    @classmethod
+    def _blank(cls) -> Callable[[Any], Any]:
+        blank = cls.__dict__.get("__blank__")
+        if blank is None:
+            blank = _compile_blank(cls)
+            cls.__blank__ = blank
+        return blank
+
+    @classmethod
+    def _lazy_class(cls):
+        """
+        惰性解析的对象所属的子类，首次使用时生成并缓存在类上
+
+        延迟字段的描述符只装在这个子类上，本类的槽描述符保持不变，
+        因此惰性解析不会拖慢其他对象的属性读取；子类与本类同名、同布局，
+        序列化与 pickle 时视同本类
+        """
+        lazy_cls = cls.__dict__.get("__lazy_class__")
+        if lazy_cls is None:
+            lazy_cls = type(cls)(cls.__name__, (cls,), {
+                "__slots__": (),
+                "__module__": cls.__module__,
+                "__qualname__": cls.__qualname__,
+                "__lazy_base__": cls,
+            })
+            lazy_cls.__lazy_class__ = lazy_cls
+            cls.__lazy_class__ = lazy_cls
+        return lazy_cls
+
+    @classmethod
+    def _parser(cls, lazy: bool = False, validate: bool = True) -> Callable[[Any, dict], None]:
+        """该类专用的解析函数，首次使用时由 ``__type_dict__`` 编译并缓存在类上"""
+        name = _PARSER_NAMES[lazy, validate]
+        parser = cls.__dict__.get(name)
+        if parser is None:
+            parser = _compile_parser(cls, lazy, validate)
+            setattr(cls, name, parser)
+        return parser
+
+    def parse(self, json, lazy: bool = False, validate: bool | int = True):
+        """
+        初始化对象，将 JSON 数据映射到对象属性
+
+        lazy 为真时，含 JsonSerializable 对象的字段先保留原始 JSON，
+        首次访问时才构建并缓存，类型错误也推迟到那时抛出
+
+        validate 为 False 时跳过类型与长度校验，只适用于可信数据（如自己缓存的结果）；
+        为正整数 N 时每 N 次顶层解析校验一次（嵌套对象随其父对象一起校验或跳过），
+        用于低成本地发现接口结构变化
+        """
+        cls = type(self)
+        if lazy is False and validate is True:
+            (cls.__dict__.get("__parser__") or cls._parser())(self, json)
+        else:
+            validate = _should_validate(validate)
+            if lazy:
+                cls = cls.__dict__.get("__lazy_class__") or cls._lazy_class()
+                self.__class__ = cls
+            (cls.__dict__.get(_PARSER_NAMES[lazy, validate]) or cls._parser(lazy, validate))(self, json)
+
+    @classmethod
+    def _serializer(cls):
+        """该类专用的序列化函数，首次使用时编译并缓存在类上"""
+        serializer = cls.__dict__.get("__serializer__")
+        if serializer is None:
+            serializer = _compile_serializer(cls)
+            cls.__serializer__ = serializer
+        return serializer
 
     def to_json(self):
         """
         转换对象为 JSON 格式（字典）
         """
+        cls = type(self)
+        return (cls.__dict__.get("__serializer__") or cls._serializer())[0](self)
 
-        def serialize(_value):
-            if isinstance(_value, JsonSerializable):
-                return _value.to_json()  # 递归处理嵌套对象
-            elif isinstance(_value, list):
-                return [serialize(v) for v in _value]  # 递归处理列表
-            elif isinstance(_value, tuple):
-                return [serialize(v) for v in _value]  # 元组转换为列表
-            elif isinstance(_value, dict):
-                return {serialize(k): serialize(v) for k, v in _value.items()}  # 递归处理字典
-            else:
-                return _value
+    @classmethod
+    def _assigner(cls) -> Callable[[Any, Any], None]:
+        assign = cls.__dict__.get("__assign__")
+        if assign is None:
+            assign = _compile_assigner(cls)
+            cls.__assign__ = assign
+        return assign
 
-        json_data = {}
-        for key, value in self.__type_dict__.items():
-            attr_value = getattr(self, key, None)
-            if attr_value is None:
-                continue
-            json_data[key] = serialize(attr_value)
+    @classmethod
+    def _unpacker(cls) -> Callable[[Any], Any]:
+        unpack = cls.__dict__.get("__unpacker__")
+        if unpack is None:
+            unpack = _compile_class_unpacker(cls)
+            cls.__unpacker__ = unpack
+        return unpack
 
-        return json_data
+    def __reduce__(self):
+        # 按 __type_dict__ 顺序保存字段值，不保存字段名，也不经过 parse
+        cls = type(self)
+        values = (cls.__dict__.get("__serializer__") or cls._serializer())[2](self)
+        # 惰性子类的对象还原为本类（读取字段时延迟的值已全部构建）
+        cls = cls.__dict__.get("__lazy_base__", cls)
+        extra = getattr(self, "__dict__", None)
+        if extra:
+            extra = {key: value for key, value in extra.items() if key not in cls.__type_dict__}
+            if extra:
+                return _restore, (cls, values), extra
+        return _restore, (cls, values)
+
+    def to_msgpack(self) -> bytes:
+        """
+        编码为 msgpack（需安装 msgpack），字段按 __type_dict__ 顺序存为数组
+        """
+        return msgpack_dumps(self)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes):
+        return msgpack_loads(data, cls)
+
+    def to_json_str(self) -> str:
+        """
+        直接编码为 JSON 文本，不构建中间字典
+        """
+        return json_dumps(self)
+
+    def to_json_bytes(self) -> bytes:
+        """
+        直接编码为紧凑的 UTF-8 JSON 字节串，不构建中间字典
+        """
+        return json_dumps_bytes(self)
 
     @classmethod
-    def from_file(cls, path: str):
-        with open(path, 'r') as json_file:
-            data = json.load(json_file)
+    def from_file(cls, path: str, validate: bool | int | None = None):
+        with open(path, 'rb') as json_file:
+            data = jsonlib.loads(json_file.read())
 
-        return cls(json=data)
+        if validate is None:
+            return cls(json=data)
+        return cls(json=data, validate=validate)
 
     def store(self, path: str):
-        with open(path, 'w') as json_file:
-            json_file.write(json.dumps(self.to_json()))
+        with open(path, 'wb') as json_file:
+            json_file.write(json_dumps_bytes(self))
 
 
 class Printable:
+    __slots__ = ()
     __type_dict__ = {}
 
+    def __fields__(self) -> Dict[str, Any]:
+        fields = {key: getattr(self, key, None) for key in self.__type_dict__}
+        for key, value in getattr(self, "__dict__", {}).items():
+            fields.setdefault(key, value)
+        return fields
+
     def __tree__(self, offset=""):
         s = ""
-        for x, y in self.__dict__.items():
-            tail = "├─ " if x != list(self.__dict__.keys())[-1] else "└─ "
-            addi = "│  " if x != list(self.__dict__.keys())[-1] else "   "
+        fields = self.__fields__()
+        last = list(fields.keys())[-1] if fields else None
+        for x, y in fields.items():
+            tail = "├─ " if x != last else "└─ "
+            addi = "│  " if x != last else "   "
             if y is None:
                 s += offset + tail + f"{str_type(self.__type_dict__[x])} {x}: {decorating("None", 31)}\n"
             elif isinstance(y, list):
@@ -169,6 +836,13 @@ class Printable:
 _T = TypeVar("T")
 LoadFunctionType = Union[Callable[[str], _T], Callable[[str], Awaitable[_T]]]
 
+def _ensure_sync(value, resource_id: str):
+    if inspect.isawaitable(value):
+        if inspect.iscoroutine(value):
+            value.close()
+        raise TypeError(f"Load function for {resource_id} is asynchronous, use async_load instead")
+    return value
+
 class CacheItem(Generic[_T]):
     def __init__(self, 
             id: str, 
@@ -182,18 +856,34 @@ class CacheItem(Generic[_T]):
         self.cache_duration: float = cache_duration
         self.last_loaded_time: float = time.time()
         self.load_function: LoadFunctionType | None = load_function
+        self.size: int = 0
+        self.hits: int = 1
     
     def refresh( self,
             new_value: _T | None = None,
             new_cache_duration: float | None = None,
             new_load_function: LoadFunctionType = None
     ):
-        self.value = new_value or self.value
         self.load_function = new_load_function or self.load_function
         if new_value is None and self.load_function is None:
             raise ValueError("No new value load function provided")
         if new_value is None:
-            self.value = self.load_function(self.id)
+            new_value = _ensure_sync(self.load_function(self.id), self.id)
+        self.value = new_value
+        self.cache_duration = new_cache_duration or self.cache_duration
+        self.last_loaded_time = time.time()
+
+    async def async_refresh(self,
+            new_cache_duration: float | None = None,
+            new_load_function: LoadFunctionType = None
+    ):
+        self.load_function = new_load_function or self.load_function
+        if self.load_function is None:
+            raise ValueError("No new value load function provided")
+        value = self.load_function(self.id)
+        if inspect.isawaitable(value):
+            value = await value
+        self.value = value
         self.cache_duration = new_cache_duration or self.cache_duration
         self.last_loaded_time = time.time()
     
@@ -211,25 +901,190 @@ class CacheItem(Generic[_T]):
     def __repr__(self):
         return f"CacheItem<{self.type.__name__}, id={self.id}, {self._state()}> : {self.value}"
 
+def approximate_size(obj, _seen: set | None = None) -> int:
+    """
+    Approximate the memory held by ``obj`` in bytes, following containers,
+    instance ``__dict__``s and ``__slots__``. Shared objects count once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None), type)):
+        return size
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approximate_size(k, _seen) + approximate_size(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += approximate_size(v, _seen)
+    else:
+        if hasattr(obj, "__dict__"):
+            size += approximate_size(obj.__dict__, _seen)
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                if slot != "__dict__" and hasattr(obj, slot):
+                    size += approximate_size(getattr(obj, slot), _seen)
+    return size
+
 class CachePool(Generic[_T]):
+    """
+    In-process cache of ``CacheItem``s.
+
+    ``max_entries`` and ``max_bytes`` (measured with ``size_function``) bound
+    the pool; when exceeded, items are evicted by ``eviction`` policy, either
+    least recently used (``"lru"``) or least frequently used (``"lfu"``).
+    Sizing walks the whole value, so it is skipped (and ``bytes`` stays 0)
+    when ``max_bytes`` is None.
+    Expired items are swept at most once per ``sweep_interval`` seconds as
+    part of normal ``load``/``store`` calls.
+
+    ``async_load`` awaits asynchronous load functions and runs at most one
+    load per key at a time. An item expired by less than ``stale_grace``
+    seconds is returned as is while it is refreshed in the background.
+
+    The pool may be shared between threads; load functions run outside of
+    its lock.
+    """
     def __init__(self, 
             default_cache_duration: int = 60, 
-            default_load_function: LoadFunctionType | None = None
+            default_load_function: LoadFunctionType | None = None,
+            max_entries: int | None = None,
+            max_bytes: int | None = None,
+            eviction: Literal["lru", "lfu"] = "lru",
+            sweep_interval: float | None = 60,
+            size_function: Callable[[Any], int] = approximate_size,
+            stale_grace: float = 0
     ):
-        self._cache: Dict[str, CacheItem[_T]] = {}
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self._cache: OrderedDict[str, CacheItem[_T]] = OrderedDict()
         self._default_cache_duration: int = default_cache_duration
         self._default_load_function: LoadFunctionType | None = default_load_function
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.sweep_interval = sweep_interval
+        self._size_function = size_function
+        self._bytes = 0
+        # lfu: use count -> resource ids with that count, oldest first
+        self._frequencies: Dict[int, OrderedDict[str, None]] = {}
+        self._last_sweep = time.time()
+        self.stale_grace = stale_grace
+        self._loading: Dict[str, "asyncio.Future"] = {}
+        # guards _cache, _frequencies, _bytes and the counters; reentrant
+        # since the public methods call one another
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, resource_id: str):
+        return resource_id in self._cache
+
+    def _touch(self, resource_id: str, item: CacheItem[_T]):
+        if self.eviction == "lru":
+            self._cache.move_to_end(resource_id)
+            return
+        bucket = self._frequencies[item.hits]
+        del bucket[resource_id]
+        if not bucket:
+            del self._frequencies[item.hits]
+        item.hits += 1
+        self._frequencies.setdefault(item.hits, OrderedDict())[resource_id] = None
+
+    def _discard(self, resource_id: str) -> CacheItem[_T] | None:
+        item = self._cache.pop(resource_id, None)
+        if item is None:
+            return None
+        self._bytes -= item.size
+        if self.eviction == "lfu":
+            bucket = self._frequencies[item.hits]
+            del bucket[resource_id]
+            if not bucket:
+                del self._frequencies[item.hits]
+        return item
+
+    def _victim(self, keep: str | None) -> str | None:
+        if self.eviction == "lru":
+            candidates = iter(self._cache)
+        else:
+            candidates = (
+                key for frequency in sorted(self._frequencies) for key in self._frequencies[frequency]
+            )
+        for key in candidates:
+            if key != keep:
+                return key
+        return None
+
+    def _enforce_limits(self, keep: str | None = None):
+        while (
+            (self.max_entries is not None and len(self._cache) > self.max_entries) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            victim = self._victim(keep)
+            if victim is None:
+                break
+            self._discard(victim)
+            self.evictions += 1
+
+    def _resize(self, resource_id: str, item: CacheItem[_T]):
+        """Account for the new value of ``item`` if it is still cached."""
+        if self._cache.get(resource_id) is item:
+            size = self._size(item.value)
+            self._bytes += size - item.size
+            item.size = size
+            self._enforce_limits(keep=resource_id)
+
+    def _size(self, value) -> int:
+        return 0 if self.max_bytes is None else self._size_function(value)
+
+    def _maybe_sweep(self):
+        if self.sweep_interval is not None and time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Drop every expired item and return how many were dropped."""
+        with self._lock:
+            self._last_sweep = time.time()
+            expired = [key for key, item in self._cache.items() if item.check_expired()]
+            for key in expired:
+                self._discard(key)
+            self.expirations += len(expired)
+            return len(expired)
 
     def try_refresh(self, resource_id: str) -> bool:
         item = self._cache.get(resource_id)
         if item is None:
             return False
         try:
-            item.refresh()
-            return True
+            if item.load_function is None:
+                raise ValueError("No new value load function provided")
+            value = _ensure_sync(item.load_function(resource_id), resource_id)
         except ValueError:
-            self._cache.pop(resource_id)
+            with self._lock:
+                if self._discard_item(resource_id, item):
+                    self.expirations += 1
+            return False
+        with self._lock:
+            item.value = value
+            item.last_loaded_time = time.time()
+            self._resize(resource_id, item)
+        return True
+
+    def _discard_item(self, resource_id: str, item: CacheItem[_T]) -> bool:
+        """Discard ``item`` unless another thread already replaced or dropped it."""
+        if self._cache.get(resource_id) is not item:
             return False
+        self._discard(resource_id)
+        return True
 
     def check_expired(self, resource_id: str) -> bool:
         item = self._cache.get(resource_id)
@@ -240,16 +1095,78 @@ class CachePool(Generic[_T]):
         return False
 
     def load(self, resource_id: str) -> _T | None:
-        if self._cache.get(resource_id) is None:
+        with self._lock:
+            self._maybe_sweep()
+            item = self._cache.get(resource_id)
+            if item is not None and not item.check_expired():
+                self.hits += 1
+                self._touch(resource_id, item)
+                return item.value
+            self.misses += 1
+        if item is None:
             if self._default_load_function is None:
                 return None
             self.store(resource_id, None)
         if self.check_expired(resource_id):
             return None
-        return self._cache[resource_id].value
+        item = self._cache.get(resource_id)
+        return None if item is None else item.value
     
     async def async_load(self, resource_id: str) -> _T | None:
-        return self.load(resource_id)
+        import asyncio  # deferred: asyncio is slow to import and sync users never need it
+        with self._lock:
+            self._maybe_sweep()
+            item = self._cache.get(resource_id)
+            if item is not None:
+                age = time.time() - item.last_loaded_time
+                if age <= item.cache_duration:
+                    self.hits += 1
+                    self._touch(resource_id, item)
+                    return item.value
+                if age <= item.cache_duration + self.stale_grace and item.load_function is not None:
+                    self.stale_hits += 1
+                    self._touch(resource_id, item)
+                    self._async_reload(resource_id)
+                    return item.value
+            self.misses += 1
+            if (item is None or item.load_function is None) and self._default_load_function is None:
+                if item is not None and self._discard_item(resource_id, item):
+                    self.expirations += 1
+                return None
+        return await asyncio.shield(self._async_reload(resource_id))
+
+    def _async_reload(self, resource_id: str) -> "asyncio.Future":
+        """Start loading ``resource_id`` unless a load is already running, and return that load."""
+        import asyncio
+        task = self._loading.get(resource_id)
+        if task is not None:
+            return task
+
+        async def reload():
+            item = self._cache.get(resource_id)
+            if item is not None and item.load_function is not None:
+                await item.async_refresh()
+                with self._lock:
+                    self._resize(resource_id, item)
+                return item.value
+            value = self._default_load_function(resource_id)
+            if inspect.isawaitable(value):
+                value = await value
+            if value is not None:
+                self.store(resource_id, value)
+            return value
+
+        def done(t: asyncio.Future):
+            if self._loading.get(resource_id) is t:
+                del self._loading[resource_id]
+            if not t.cancelled():
+                # a failed background refresh keeps the stale value; mark the error as seen
+                t.exception()
+
+        task = asyncio.ensure_future(reload())
+        self._loading[resource_id] = task
+        task.add_done_callback(done)
+        return task
 
     def store(self, 
             resource_id: str, 
@@ -264,12 +1181,42 @@ class CachePool(Generic[_T]):
         if value is None and load_function is None:
             raise ValueError("No new value load function provided")
         if value is None:
-            value = load_function(resource_id)
-        self._cache[resource_id] = CacheItem(resource_id, value, cache_duration, load_function)
-        return self._cache[resource_id]
+            value = _ensure_sync(load_function(resource_id), resource_id)
+        item = CacheItem(resource_id, value, cache_duration, load_function)
+        item.size = self._size(value)
+        with self._lock:
+            self._maybe_sweep()
+            self._discard(resource_id)
+            self._cache[resource_id] = item
+            self._bytes += item.size
+            if self.eviction == "lfu":
+                self._frequencies.setdefault(item.hits, OrderedDict())[resource_id] = None
+            self._enforce_limits(keep=resource_id)
+        return item
+
+    def remove(self, resource_id: str) -> bool:
+        with self._lock:
+            return self._discard(resource_id) is not None
 
     def clear(self):
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._frequencies.clear()
+            self._bytes = 0
+            self._loading.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "loading": len(self._loading),
+            }
 
 class LazyType:
     def __init__(self, load_function: LoadFunctionType, cache_duration=60):
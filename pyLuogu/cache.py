@@ -0,0 +1,229 @@
+__all__ = [
+    "CachePolicy",
+    "SQLiteCache",
+    "FOREVER",
+    "DEFAULT_CACHE_RULES",
+    "DEFAULT_INVALIDATION_RULES",
+]
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from .transport import RequestContext
+
+FOREVER = math.inf
+
+TTL = float | None | Callable[[dict], float | None]
+
+def _record_ttl(res: dict) -> float | None:
+    # 0: waiting, 1: judging; anything else is a final verdict
+    status = (res.get("record") or {}).get("status")
+    if status is None or status in (0, 1):
+        return None
+    return FOREVER
+
+DEFAULT_CACHE_RULES: List[Tuple[str, TTL]] = [
+    (r"_lfe/tags", 86400),
+    (r"problem/list", 600),
+    (r"problem/solution/[^/]+", 1200),
+    (r"problem/[^/]+", 1200),
+    (r"record/[^/]+", _record_ttl),
+    (r"training/[^/]+", 1200),
+    (r"contest/[^/]+", 600),
+    (r"user/[^/]+", 600),
+]
+
+# problem edit payloads are private and change under our own writes, so
+# they are left out of DEFAULT_CACHE_RULES
+
+# write endpoint -> reads it makes stale, "{0}" being the pattern's first group
+DEFAULT_INVALIDATION_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    (r"fe/api/problem/[^/]+/([^/]+)", ("problem/{0}", "problem/edit/{0}", "problem/{0}/edit")),
+]
+
+class CachePolicy:
+    """
+    Maps endpoints to cache lifetimes.
+
+    ``rules`` are ``(pattern, ttl)`` pairs tried in order against the whole
+    endpoint; ``ttl`` is a number of seconds, ``FOREVER``, ``None`` (do not
+    cache) or a callable deciding from the unwrapped response. Endpoints no
+    rule matches use ``default_ttl``.
+
+    ``invalidations`` are ``(pattern, endpoints)`` pairs: a successful write
+    to an endpoint matching ``pattern`` drops the cached ``endpoints``,
+    formatted with the groups of the match.
+    """
+    def __init__(
+            self,
+            rules: List[Tuple[str, TTL]] | None = None,
+            default_ttl: float | None = None,
+            invalidations: List[Tuple[str, Tuple[str, ...]]] | None = None,
+    ):
+        if rules is None:
+            rules = DEFAULT_CACHE_RULES
+        if invalidations is None:
+            invalidations = DEFAULT_INVALIDATION_RULES
+        self.rules = [(re.compile(pattern), ttl) for pattern, ttl in rules]
+        self.default_ttl = default_ttl
+        self.invalidations = [(re.compile(pattern), tuple(endpoints)) for pattern, endpoints in invalidations]
+
+    def _match(self, endpoint: str) -> TTL:
+        for pattern, ttl in self.rules:
+            if pattern.fullmatch(endpoint):
+                return ttl
+        return self.default_ttl
+
+    def cacheable(self, ctx: RequestContext) -> bool:
+        return ctx.method == "GET" and self._match(ctx.endpoint) is not None
+
+    def ttl(self, ctx: RequestContext, res: dict) -> float | None:
+        ttl = self._match(ctx.endpoint)
+        if callable(ttl):
+            ttl = ttl(res)
+        return ttl
+
+    def invalidated(self, ctx: RequestContext) -> List[str]:
+        """Endpoints whose cached responses a successful ``ctx`` makes stale."""
+        if ctx.method == "GET":
+            return []
+        stale = []
+        for pattern, endpoints in self.invalidations:
+            match = pattern.fullmatch(ctx.endpoint)
+            if match is not None:
+                stale.extend(endpoint.format(*match.groups()) for endpoint in endpoints)
+        return stale
+
+class SQLiteCache:
+    """
+    Response cache stored in a SQLite file, safe to share between threads,
+    processes and runs. Exposes the same ``load``/``store``/``remove`` interface as
+    ``CachePool`` so it can back ``CacheMiddleware``.
+
+    ``max_entries`` and ``max_bytes`` cap the store; when exceeded, expired
+    rows go first and then the least recently used ones. Limits are enforced
+    every ``evict_interval`` stores to keep writes cheap.
+    """
+    def __init__(
+            self,
+            path: str = ".cache/luogu.sqlite",
+            default_cache_duration: float = 60,
+            max_entries: int | None = None,
+            max_bytes: int | None = None,
+            evict_interval: int = 64,
+            timeout: float = 30,
+    ):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._default_cache_duration = default_cache_duration
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self._stores = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, resource_id: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (resource_id,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, resource_id))
+            self.hits += 1
+            return row[0]
+
+    def store(
+            self,
+            resource_id: str,
+            value: bytes,
+            cache_duration: float | None = None
+    ):
+        if cache_duration is None:
+            cache_duration = self._default_cache_duration
+        now = time.time()
+        expires = None if cache_duration == FOREVER else now + cache_duration
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (resource_id, value, expires, len(value), now)
+            )
+            self._stores += 1
+            if self._stores % self.evict_interval == 0:
+                self._evict(now)
+
+    def remove(self, resource_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (resource_id,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def evict(self):
+        with self._lock:
+            self._evict(time.time())
+
+    def _evict(self, now: float):
+        cursor = self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (now,))
+        self.evictions += cursor.rowcount
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if self.max_entries is not None and count > self.max_entries:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.evictions += cursor.rowcount
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if self.max_bytes is not None and size > self.max_bytes:
+            excess = size - self.max_bytes
+            freed = 0
+            victims = []
+            cursor = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed")
+            for key, row_size in cursor:
+                if freed >= excess:
+                    break
+                victims.append((key,))
+                freed += row_size
+            cursor.close()
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+            self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {
+            "entries": count,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self):
+        return f"SQLiteCache<{self.path}>"
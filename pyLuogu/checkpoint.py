@@ -0,0 +1,103 @@
+__all__ = [
+    "Checkpoint",
+]
+
+from typing import Any, AsyncIterator, Callable, Iterator, Tuple
+
+from .bits.journal import Journal
+from .pagination import AsyncPageIterator, PageIterator
+
+# journal entries are ``[name, page, offset]``, the first item not finished
+# yet, or ``[name, null, null]`` once the walk has finished
+FINISHED = [None, None]
+
+class Checkpoint:
+    """
+    Journal of paged walks, so that a crawl interrupted by a crash or a
+    restart picks up at the exact page and item it stopped at, instead of
+    listing everything again.
+
+    ``walk(name, api.iter_problems, _type="P")`` (or ``awalk`` for the async
+    client) runs an ``iter_*`` method from the journaled position of
+    ``name`` and records the position as items are consumed. An item counts
+    as finished once the next one is asked for, so after a crash the item
+    being processed is yielded again: processing should tolerate seeing an
+    item twice. A walk that ran to its end yields nothing until ``reset``.
+
+    A position is written for every item, flushed to the OS but not
+    fsynced, so it survives the process dying but not necessarily the
+    machine. Not thread-safe; give concurrent walks separate names.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.journal = Journal(path)
+
+    def position(self, name: str) -> Tuple[int, int] | None:
+        """``(page, offset)`` to resume ``name`` at, None if it never started or has finished."""
+        position = self.journal.get(name)
+        return None if position is None or position == FINISHED else tuple(position)
+
+    def finished(self, name: str) -> bool:
+        return self.journal.get(name) == FINISHED
+
+    def record(self, name: str, page: int, offset: int):
+        self.journal.put(name, page, offset)
+
+    def finish(self, name: str):
+        self.journal.put(name, *FINISHED)
+
+    def reset(self, name: str):
+        """Forget ``name``, so that the next walk starts over."""
+        self.journal.delete(name)
+
+    def _resume(self, name: str, kwargs: dict) -> Tuple[int, int]:
+        position = self.position(name)
+        if position is None:
+            return kwargs.pop("start", 1), 0
+        kwargs.pop("start", None)
+        return position
+
+    def walk(self, name: str, iterate: Callable[..., PageIterator], *args, **kwargs) -> Iterator[Any]:
+        """
+        Yield the items of ``iterate(*args, **kwargs)``, a paged walk such as
+        ``luoguAPI.iter_problems``, from where ``name`` stopped.
+        """
+        if self.finished(name):
+            return
+        page, offset = self._resume(name, kwargs)
+        pages = iterate(*args, start=page, **kwargs)
+        try:
+            for index, item in enumerate(pages):
+                if index < offset:
+                    continue  # finished before the restart
+                self.record(name, pages.page, pages.offset)
+                yield item
+        finally:
+            pages.close()
+        self.finish(name)
+
+    async def awalk(self, name: str, iterate: Callable[..., AsyncPageIterator], *args, **kwargs) -> AsyncIterator[Any]:
+        """Async counterpart of ``walk`` for the ``iter_*`` methods of ``asyncLuoguAPI``."""
+        if self.finished(name):
+            return
+        page, offset = self._resume(name, kwargs)
+        pages = iterate(*args, start=page, **kwargs)
+        try:
+            index = 0
+            async for item in pages:
+                if index >= offset:
+                    self.record(name, pages.page, pages.offset)
+                    yield item
+                index += 1
+        finally:
+            await pages.aclose()
+        self.finish(name)
+
+    def close(self):
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
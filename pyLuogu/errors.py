@@ -18,7 +18,9 @@ class NotFoundError(LuoguAPIError):
 
 class RateLimitError(LuoguAPIError):
     """Exception raised when the rate limit is exceeded."""
-    pass
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 class ServerError(LuoguAPIError):
     """Exception raised for server errors."""
@@ -0,0 +1,306 @@
+__all__ = [
+    "Middleware",
+    "AuthMiddleware",
+    "RetryMiddleware",
+    "RateLimitMiddleware",
+    "CacheMiddleware",
+    "SingleFlightMiddleware",
+    "MetricsMiddleware",
+    "default_middlewares",
+]
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from .errors import *
+from .transport import Flow, RequestContext, Wait, C3VKChallenge, CSRFTokenExpired, RetryRequest
+from .ratelimit import DecorrelatedJitter
+from .cache import CachePolicy, SQLiteCache
+from .bits.ultility import CachePool
+from .bits import jsonlib
+from . import logger
+
+Handler = Callable[[RequestContext], Flow]
+
+class Middleware:
+    """
+    A pipeline stage. ``handle`` is a generator: it may yield effects, must
+    delegate to ``call_next`` with ``yield from`` and returns the result.
+    """
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        return (yield from call_next(ctx))
+
+class AuthMiddleware(Middleware):
+    """Attaches the CSRF token to writes and answers C3VK / stale-CSRF challenges."""
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        transport = ctx.transport
+        if ctx.method != "GET":
+            if not transport.x_csrf_token:
+                yield from transport.csrf_flow()
+            ctx.headers.update({
+                "Content-Type": "application/json",
+                "referer": "https://www.luogu.com.cn/",
+                "x-csrf-token": transport.x_csrf_token
+            })
+        try:
+            return (yield from call_next(ctx))
+        except C3VKChallenge as e:
+            transport.set_cookie("C3VK", e.token)
+            raise RetryRequest("C3VK challenge answered") from None
+        except CSRFTokenExpired:
+            logger.warning("CSRF token expired, refreshing token...")
+            yield from transport.csrf_flow()
+            raise RetryRequest("CSRF token refreshed") from None
+
+class RetryMiddleware(Middleware):
+    """
+    Re-runs the inner stages on timeouts, throttling and auth challenges.
+    Delays follow ``backoff`` (decorrelated jitter); a throttle's
+    ``retry_after`` is used as the lower bound of its delay.
+    """
+    def __init__(
+            self,
+            max_retries: int = 5,
+            timeout_delay: float = 1,
+            rate_limit_delay: float = 5,
+            backoff: DecorrelatedJitter | None = None,
+    ):
+        self.max_retries = max_retries
+        self.timeout_delay = timeout_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.backoff = DecorrelatedJitter(cap=60) if backoff is None else backoff
+
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        last_error = None
+        delay = None
+        for attempt in range(self.max_retries):
+            ctx.attempt = attempt
+            try:
+                return (yield from call_next(ctx))
+            except httpx.TimeoutException as e:
+                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
+                delay = self.backoff.next(delay, self.timeout_delay)
+                last_error = e
+            except RateLimitError as e:
+                logger.warning(f"Attempt {attempt + 1}: {e}")
+                base = self.rate_limit_delay if e.retry_after is None else e.retry_after
+                delay = self.backoff.next(delay, base)
+                last_error = e
+            except RetryRequest as e:
+                last_error = e
+                yield from ctx.sleep(e.delay)
+                continue
+            yield from ctx.sleep(delay)
+
+        logger.error(f"Failed to send request after {self.max_retries} attempts")
+        if isinstance(last_error, RateLimitError):
+            raise last_error
+        raise RequestError(f"Failed to send request after {self.max_retries} attempts") from last_error
+
+class RateLimitMiddleware(Middleware):
+    """
+    Waits for a slot from ``limiter`` before every attempt. ``limiter`` must
+    provide ``reserve(ctx) -> float`` returning the number of seconds to wait,
+    and may provide ``feedback(ctx, throttled)`` to learn from the outcome.
+    """
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self._feedback = getattr(limiter, "feedback", None)
+
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        yield from ctx.sleep(self.limiter.reserve(ctx))
+        if self._feedback is None:
+            return (yield from call_next(ctx))
+        try:
+            result = yield from call_next(ctx)
+        except RateLimitError:
+            self._feedback(ctx, True)
+            raise
+        self._feedback(ctx, False)
+        return result
+
+class CacheMiddleware(Middleware):
+    """
+    Serves repeated GETs from ``pool``, keyed on base URL, account, endpoint
+    and params. ``pool`` is anything with ``CachePool``'s ``load``/``store``/
+    ``remove``, e.g. an in-process ``CachePool`` or a persistent
+    ``SQLiteCache``. With a ``policy`` only matching endpoints are cached,
+    each with its own TTL; without one every GET is kept for the pool's
+    default duration. Successful writes drop the reads they make stale
+    (see ``CachePolicy.invalidated``).
+    """
+    def __init__(self, pool: CachePool[bytes] | SQLiteCache | None = None, policy: CachePolicy | None = None):
+        if pool is None:
+            pool = CachePool[bytes](default_cache_duration=60)
+        self.pool = pool
+        self.policy = policy
+        self._invalidation = CachePolicy() if policy is None else policy
+
+    @staticmethod
+    def _key(ctx: RequestContext, request: str) -> str:
+        # the pool may be shared between clients, so responses are scoped to
+        # the site and the logged-in account (hashed: keys may end up on disk)
+        cookies = ctx.transport.cookies
+        account = f"{cookies.get('_uid', '')}:{cookies.get('__client_id', '')}".encode()
+        return f"{ctx.transport.base_url}|{hashlib.blake2b(account, digest_size=8).hexdigest()}|{request}"
+
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        if ctx.method != "GET":
+            result = yield from call_next(ctx)
+            for endpoint in self._invalidation.invalidated(ctx):
+                self.pool.remove(self._key(ctx, endpoint))
+            return result
+        if self.policy is not None and not self.policy.cacheable(ctx):
+            return (yield from call_next(ctx))
+
+        key = self._key(ctx, ctx.cache_key())
+        body = self.pool.load(key)
+        if body is not None:
+            ctx.from_cache = True
+            return ctx.transport.unwrap(jsonlib.loads(body))
+
+        result = yield from call_next(ctx)
+        body = ctx.extensions.get("body")
+        if body is not None:
+            if self.policy is None:
+                self.pool.store(key, body)
+            else:
+                ttl = self.policy.ttl(ctx, result)
+                if ttl is not None:
+                    self.pool.store(key, body, ttl)
+        return result
+
+class _LeaderGone(Exception):
+    """Set on a single-flight future whose leader was cancelled; followers try again."""
+    pass
+
+class SingleFlightMiddleware(Middleware):
+    """
+    Collapses identical in-flight GETs (same endpoint and params) onto the
+    first one. Followers wait for the leader's response body and decode
+    their own copy, since callers reshape the returned payload in place.
+    Errors of the leader are shared; if the leader is cancelled instead, a
+    follower takes over the request.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        if ctx.method != "GET":
+            return (yield from call_next(ctx))
+
+        key = ctx.cache_key()
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = ctx.transport.create_future()
+            if leader:
+                break
+            try:
+                body = yield Wait(future)
+            except _LeaderGone:
+                continue
+            ctx.coalesced = True
+            return ctx.transport.unwrap(jsonlib.loads(body))
+
+        def settle():
+            # unregister before waking followers so none of them finds this future again
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+        try:
+            result = yield from call_next(ctx)
+        except Exception as e:
+            settle()
+            future.set_exception(e)
+            # mark as retrieved so an unobserved asyncio future does not warn
+            future.exception()
+            raise
+        except BaseException:
+            settle()
+            future.set_exception(_LeaderGone())
+            future.exception()
+            raise
+        settle()
+        future.set_result(ctx.extensions.get("body"))
+        return result
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+class MetricsMiddleware(Middleware):
+    """Counts requests and splits their wall time into network, wait and overhead."""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.sends = 0
+        self.total_time = 0.0
+        self.network_time = 0.0
+        self.wait_time = 0.0
+
+    def handle(self, ctx: RequestContext, call_next: Handler) -> Flow:
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            return (yield from call_next(ctx))
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.total_time += time.perf_counter() - start
+            self.cache_hits += ctx.from_cache
+            self.coalesced += ctx.coalesced
+            self.sends += ctx.sends
+            self.network_time += ctx.network_time
+            self.wait_time += ctx.wait_time
+
+    def stats(self) -> dict:
+        overhead = self.total_time - self.network_time - self.wait_time
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "sends": self.sends,
+            "total_time": self.total_time,
+            "network_time": self.network_time,
+            "wait_time": self.wait_time,
+            "overhead_time": overhead,
+            "overhead_per_request": overhead / self.requests if self.requests else 0.0,
+        }
+
+def default_middlewares(
+        max_retries: int = 5,
+        cache: CachePool | SQLiteCache | None = None,
+        cache_policy: CachePolicy | None = None,
+        rate_limiter=None,
+        coalesce: bool = False,
+) -> List[Middleware]:
+    """
+    Builds the standard pipeline, outermost first:
+    metrics -> cache -> single-flight -> retry -> rate limit -> auth -> network.
+    """
+    middlewares: List[Middleware] = [MetricsMiddleware()]
+    if cache is not None:
+        middlewares.append(CacheMiddleware(cache, cache_policy))
+    if coalesce:
+        middlewares.append(SingleFlightMiddleware())
+    middlewares.append(RetryMiddleware(max_retries))
+    if rate_limiter is not None:
+        middlewares.append(RateLimitMiddleware(rate_limiter))
+    middlewares.append(AuthMiddleware())
+    return middlewares
@@ -0,0 +1,238 @@
+"""
+Lazy iteration over paged list endpoints, used by the ``iter_*`` methods of
+``luoguAPI`` and ``asyncLuoguAPI``.
+
+A listing is walked one page at a time: while the items of a page are being
+consumed, the next page is already being fetched (on a worker thread for the
+sync client, as a task for the async one), so at most two pages are held at
+once and network time overlaps with processing. The number of pages comes
+from the ``count``/``perPage`` of the first response; endpoints without them
+end at the first page shorter than the first one.
+
+``fetch_pages``/``afetch_pages`` instead fetch every page of a listing of
+known size: page 1 first, then all the others concurrently, bounded by
+``concurrency`` requests in flight and by the client's rate limiter.
+"""
+__all__ = [
+    "PageCursor",
+    "PageIterator",
+    "AsyncPageIterator",
+    "iter_pages",
+    "aiter_pages",
+    "fetch_pages",
+    "afetch_pages",
+]
+
+import asyncio
+import contextvars
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Tuple
+
+def _page_count(res: Any) -> int | None:
+    count = getattr(res, "count", None)
+    per_page = getattr(res, "perPage", None)
+    if count is None or not per_page:
+        return None
+    return max(1, (count - 1) // per_page + 1)
+
+def _has_next(page: int, res: Any, items: List[Any], page_size: int) -> bool:
+    pages = _page_count(res)
+    if pages is not None:
+        return page < pages
+    return 0 < page_size <= len(items)
+
+class PageCursor:
+    """
+    Position of a paged walk: ``offset`` items into ``page`` is the first
+    item not finished yet, i.e. the one last yielded until the next one is
+    asked for. ``Checkpoint`` journals it to resume an interrupted walk.
+    """
+    def __init__(self, start: int):
+        self.page = start
+        self.offset = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}<page={self.page}, offset={self.offset}>"
+
+class PageIterator(PageCursor):
+    """Iterator returned by ``iter_pages``."""
+    def __init__(self, start: int, walk: Callable[["PageIterator"], Iterator[Any]]):
+        super().__init__(start)
+        self._items = walk(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        self._items.close()
+
+class AsyncPageIterator(PageCursor):
+    """Async iterator returned by ``aiter_pages``."""
+    def __init__(self, start: int, walk: Callable[["AsyncPageIterator"], AsyncIterator[Any]]):
+        super().__init__(start)
+        self._items = walk(self)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self) -> Awaitable[Any]:
+        return self._items.__anext__()
+
+    async def aclose(self):
+        await self._items.aclose()
+
+def iter_pages(
+        fetch: Callable[[int], Any],
+        items: Callable[[Any], List[Any]],
+        start: int = 1,
+        prefetch: bool = True,
+) -> PageIterator:
+    """
+    Yield ``items(fetch(page))`` item by item for ``page = start, start + 1, ...``.
+    An error fetching a page is raised once the previous page is consumed.
+    """
+    return PageIterator(start, lambda cursor: _walk(cursor, fetch, items, prefetch))
+
+def _walk(cursor: PageCursor, fetch: Callable[[int], Any], items: Callable[[Any], List[Any]], prefetch: bool):
+    executor = ThreadPoolExecutor(1, thread_name_prefix="pyLuogu-prefetch") if prefetch else None
+    try:
+        res = fetch(cursor.page)
+        page_size = None
+        while True:
+            batch = items(res) or []
+            if page_size is None:
+                page_size = len(batch)
+            more = _has_next(cursor.page, res, batch, page_size)
+            res = None
+            if more and executor is not None:
+                # in the caller's context, e.g. to parse under its ``InternTable``
+                res = executor.submit(contextvars.copy_context().run, fetch, cursor.page + 1)
+            for item in batch:
+                yield item
+                cursor.offset += 1
+            if not more:
+                return
+            cursor.page += 1
+            cursor.offset = 0
+            res = fetch(cursor.page) if res is None else res.result()
+    finally:
+        if executor is not None:
+            # a generator closed early does not wait for a page it will never use
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def aiter_pages(
+        fetch: Callable[[int], Awaitable[Any]],
+        items: Callable[[Any], List[Any]],
+        start: int = 1,
+        prefetch: bool = True,
+) -> AsyncPageIterator:
+    """Async counterpart of ``iter_pages``; ``fetch`` is a coroutine function."""
+    return AsyncPageIterator(start, lambda cursor: _awalk(cursor, fetch, items, prefetch))
+
+async def _awalk(cursor: PageCursor, fetch: Callable[[int], Awaitable[Any]], items: Callable[[Any], List[Any]], prefetch: bool):
+    task = None
+    try:
+        res = await fetch(cursor.page)
+        page_size = None
+        while True:
+            batch = items(res) or []
+            if page_size is None:
+                page_size = len(batch)
+            more = _has_next(cursor.page, res, batch, page_size)
+            if more and prefetch:
+                task = asyncio.ensure_future(fetch(cursor.page + 1))
+            for item in batch:
+                yield item
+                cursor.offset += 1
+            if not more:
+                return
+            cursor.page += 1
+            cursor.offset = 0
+            if task is None:
+                res = await fetch(cursor.page)
+            else:
+                res, task = await task, None
+    finally:
+        if task is not None:
+            task.cancel()
+
+def _remaining_pages(first: Any, start: int) -> range:
+    pages = _page_count(first)
+    if pages is None:
+        raise ValueError(f"{type(first).__name__} does not report count and perPage, walk it with iter_pages")
+    return range(start + 1, pages + 1)
+
+def fetch_pages(
+        fetch: Callable[[int], Any],
+        concurrency: int = 8,
+        ordered: bool = True,
+        start: int = 1,
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield ``(page, fetch(page))`` for every page from ``start`` on, in page
+    order or, with ``ordered=False``, as they complete. The first error
+    cancels the pages not yet started and is raised.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    first = fetch(start)
+    pages = _remaining_pages(first, start)
+    yield start, first
+    del first
+    if not pages:
+        return
+    executor = ThreadPoolExecutor(min(concurrency, len(pages)), thread_name_prefix="pyLuogu-fetch")
+    try:
+        # every page is fetched in a copy of the caller's context, e.g. to parse under its ``InternTable``
+        submit = lambda page: executor.submit(contextvars.copy_context().run, fetch, page)
+        # nothing keeps a future once its page is yielded, so consumed pages can be freed
+        if ordered:
+            futures = {page: submit(page) for page in pages}
+            for page in pages:
+                yield page, futures.pop(page).result()
+        else:
+            done = queue.SimpleQueue()
+            for page in pages:
+                submit(page).add_done_callback(lambda future, page=page: done.put((page, future)))
+            for _ in pages:
+                page, future = done.get()
+                yield page, future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def afetch_pages(
+        fetch: Callable[[int], Awaitable[Any]],
+        concurrency: int = 8,
+        ordered: bool = True,
+        start: int = 1,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Async counterpart of ``fetch_pages``; ``fetch`` is a coroutine function."""
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    first = await fetch(start)
+    pages = _remaining_pages(first, start)
+    yield start, first
+    del first
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(page: int) -> Tuple[int, Any]:
+        async with semaphore:
+            return page, await fetch(page)
+
+    tasks = {page: asyncio.ensure_future(fetch_one(page)) for page in pages}
+    try:
+        if ordered:
+            for page in pages:
+                yield await tasks.pop(page)
+        else:
+            for next_done in asyncio.as_completed(list(tasks.values())):
+                page, res = await next_done
+                del tasks[page]
+                yield page, res
+    finally:
+        for task in tasks.values():
+            task.cancel()
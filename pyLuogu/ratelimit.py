@@ -0,0 +1,194 @@
+__all__ = [
+    "TokenBucket",
+    "AdaptiveTokenBucket",
+    "EndpointRateLimiter",
+    "EndpointClass",
+    "DecorrelatedJitter",
+]
+
+import random
+import threading
+import time
+from typing import Dict, Literal
+
+from .transport import RequestContext
+
+EndpointClass = Literal["read", "write", "submit"]
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second, holding at most
+    ``capacity`` tokens.
+
+    ``reserve`` never blocks: it takes a token immediately, letting the
+    balance go negative, and returns how long the caller has to wait before
+    the token is really available. Concurrent callers therefore queue up
+    behind each other instead of all waking up at the same moment.
+    """
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def on_success(self):
+        pass
+
+    def on_throttle(self):
+        pass
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def __repr__(self):
+        return f"TokenBucket<rate={self.rate}/s, capacity={self.capacity}>"
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Token bucket whose rate follows an AIMD controller.
+
+    Every success adds ``increase / rate`` to the rate, i.e. the rate climbs
+    by about ``increase`` requests per second for each second of traffic.
+    A throttling response multiplies it by ``decrease``. Throttles arriving
+    within ``cooldown`` seconds of the last cut are ignored, so a burst of
+    concurrent 429s counts as one signal. Above the rate that last got
+    throttled the climb slows down by ``probe_factor``, which lets long
+    crawls settle just below the server's limit instead of sawing through it.
+    """
+    def __init__(
+            self,
+            rate: float,
+            capacity: float = 1,
+            min_rate: float = 0.05,
+            max_rate: float | None = None,
+            increase: float = 0.05,
+            decrease: float = 0.5,
+            cooldown: float = 1,
+            probe_factor: float = 0.25,
+    ):
+        super().__init__(rate, capacity)
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be in (0, 1)")
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.probe_factor = probe_factor
+        self.ceiling: float | None = None
+        self.throttles = 0
+        self._last_cut = float("-inf")
+
+    def on_success(self):
+        with self._lock:
+            step = self.increase / self.rate
+            if self.ceiling is not None and self.rate >= self.ceiling:
+                step *= self.probe_factor
+            self.rate += step
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            if now - self._last_cut < self.cooldown:
+                return
+            self._refill(now)
+            self._last_cut = now
+            self.ceiling = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0)
+
+    def __repr__(self):
+        return f"AdaptiveTokenBucket<rate={self.rate:.3f}/s, capacity={self.capacity}, ceiling={self.ceiling}>"
+
+class DecorrelatedJitter:
+    """
+    Decorrelated jitter backoff: each delay is drawn uniformly from
+    ``[base, previous * 3]`` and clipped to ``cap``, so concurrent clients
+    spread out instead of retrying in lockstep.
+    """
+    def __init__(self, base: float = 1, cap: float = 60):
+        self.base = base
+        self.cap = cap
+
+    def next(self, previous: float | None = None, base: float | None = None) -> float:
+        base = self.base if base is None else base
+        if previous is None or previous < base:
+            previous = base
+        return max(base, min(self.cap, random.uniform(base, previous * 3)))
+
+class EndpointRateLimiter:
+    """
+    Separate token buckets for reads, problem writes (``fe/api/problem/*``)
+    and code submissions. Rates are in requests per second; a rate of
+    ``None`` leaves that class unlimited. With ``adaptive=True`` each rate is
+    only a starting point and is tuned by ``AdaptiveTokenBucket``.
+    """
+    def __init__(
+            self,
+            read_rate: float | None = 2,
+            write_rate: float | None = 0.5,
+            submit_rate: float | None = 0.04,
+            read_burst: float = 5,
+            write_burst: float = 1,
+            submit_burst: float = 1,
+            adaptive: bool = False,
+    ):
+        bucket_type = AdaptiveTokenBucket if adaptive else TokenBucket
+        self.buckets: Dict[EndpointClass, TokenBucket | None] = {
+            "read": None if read_rate is None else bucket_type(read_rate, read_burst),
+            "write": None if write_rate is None else bucket_type(write_rate, write_burst),
+            "submit": None if submit_rate is None else bucket_type(submit_rate, submit_burst),
+        }
+
+    @staticmethod
+    def classify(ctx: RequestContext) -> EndpointClass:
+        if ctx.endpoint.startswith("fe/api/problem/submit/"):
+            return "submit"
+        if ctx.method != "GET" or ctx.endpoint.startswith("fe/api/problem/"):
+            return "write"
+        return "read"
+
+    def reserve(self, ctx: RequestContext) -> float:
+        bucket = self.buckets[self.classify(ctx)]
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
+
+    def feedback(self, ctx: RequestContext, throttled: bool):
+        bucket = self.buckets[self.classify(ctx)]
+        if bucket is None:
+            return
+        if throttled:
+            bucket.on_throttle()
+        else:
+            bucket.on_success()
+
+    @property
+    def rates(self) -> Dict[EndpointClass, float | None]:
+        return {k: None if v is None else v.rate for k, v in self.buckets.items()}
+
+    def __repr__(self):
+        return f"EndpointRateLimiter<{self.buckets}>"
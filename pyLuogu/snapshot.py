@@ -0,0 +1,144 @@
+__all__ = [
+    "SyncSnapshot",
+    "LISTING_FIELDS",
+    "content_version",
+]
+
+import hashlib
+import time
+from typing import Any, AsyncIterable, Awaitable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from .bits.journal import Journal
+from .bits.ultility import json_dumps_bytes
+
+# listing fields an edit of the problem shows up in; totalSubmit and
+# totalAccepted are left out since they move with every submission
+LISTING_FIELDS = ("title", "difficulty", "type", "tags", "flag", "fullScore")
+
+def content_version(detail: Any) -> int | None:
+    """``problem.content.version`` of a ``get_problem`` response, None when absent."""
+    problem = getattr(detail, "problem", detail)
+    return getattr(getattr(problem, "content", None), "version", None)
+
+class SyncSnapshot:
+    """
+    Local snapshot of a listing for incremental mirroring: only items whose
+    listing entry changed since the last run have their details fetched.
+
+    ``changes(api.iter_problems(_type="P"), api.get_problem)`` walks the
+    listing, fingerprints the ``fields`` of every item and yields
+    ``(item, fetch(key))`` for the items that are new or whose fingerprint
+    differs from the snapshot. Sync traffic thus follows the rate of change
+    rather than the size of the catalog, plus one request per listing page.
+
+    Edits that do not show in the listing (e.g. to the statement) are caught
+    by ``refresh_after``: an item last fetched longer ago than that many
+    seconds is fetched again, and yielded only if ``version(detail)`` (the
+    content version by default) differs from the recorded one.
+
+    An item is recorded once the next one is asked for, so a run that dies
+    yields the item it was processing again next time. The snapshot is a
+    ``Journal`` of ``[key, fingerprint, version, fetched at]`` lines.
+    """
+    def __init__(
+            self,
+            path: str,
+            fields: Sequence[str] = LISTING_FIELDS,
+            refresh_after: float | None = None,
+            version: Callable[[Any], Any] | None = content_version,
+            key: Callable[[Any], str] = lambda item: item.pid,
+    ):
+        self.path = path
+        self.fields = tuple(fields)
+        self.refresh_after = refresh_after
+        self.version = version
+        self.key = key
+        self.journal = Journal(path)
+        self._seen = set()
+        self.counters: Dict[str, int] = dict.fromkeys(
+            ("seen", "fetched", "new", "changed", "refreshed", "unchanged"), 0
+        )
+
+    def fingerprint(self, item: Any) -> str:
+        values = []
+        for field in self.fields:
+            value = getattr(item, field, None)
+            values.append(sorted(value) if isinstance(value, list) else value)
+        return hashlib.blake2b(json_dumps_bytes(values), digest_size=8).hexdigest()
+
+    def _plan(self, item: Any) -> Tuple[str, str, str | None]:
+        """``(key, fingerprint, reason to fetch)``, the reason being None when up to date."""
+        key = self.key(item)
+        fingerprint = self.fingerprint(item)
+        self._seen.add(key)
+        self.counters["seen"] += 1
+        entry = self.journal.get(key)
+        if entry is None:
+            return key, fingerprint, "new"
+        if entry[0] != fingerprint:
+            return key, fingerprint, "changed"
+        if self.refresh_after is not None and time.time() - entry[2] >= self.refresh_after:
+            return key, fingerprint, "refreshed"
+        self.counters["unchanged"] += 1
+        return key, fingerprint, None
+
+    def _record(self, key: str, fingerprint: str, reason: str, detail: Any) -> Tuple[bool, Any]:
+        """Count the fetch of ``key``; return whether to yield it and the version to record."""
+        self.counters["fetched"] += 1
+        version = None if self.version is None else self.version(detail)
+        if reason == "refreshed" and version is not None and version == self.journal.get(key)[1]:
+            self.counters["unchanged"] += 1
+            self.journal.put(key, fingerprint, version, time.time())
+            return False, version
+        self.counters[reason] += 1
+        return True, version
+
+    def changes(self, items: Iterable[Any], fetch: Callable[[str], Any]) -> Iterator[Tuple[Any, Any]]:
+        """Yield ``(item, fetch(key))`` for every new or changed item of ``items``."""
+        for item in items:
+            key, fingerprint, reason = self._plan(item)
+            if reason is None:
+                continue
+            detail = fetch(key)
+            changed, version = self._record(key, fingerprint, reason, detail)
+            if changed:
+                yield item, detail
+                self.journal.put(key, fingerprint, version, time.time())
+
+    async def achanges(
+            self,
+            items: AsyncIterable[Any],
+            fetch: Callable[[str], Awaitable[Any]],
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """Async counterpart of ``changes``, e.g. over ``asyncLuoguAPI.iter_problems``."""
+        async for item in items:
+            key, fingerprint, reason = self._plan(item)
+            if reason is None:
+                continue
+            detail = await fetch(key)
+            changed, version = self._record(key, fingerprint, reason, detail)
+            if changed:
+                yield item, detail
+                self.journal.put(key, fingerprint, version, time.time())
+
+    def missing(self) -> List[str]:
+        """
+        Keys in the snapshot not seen by this object, i.e. gone from the
+        listing once a full walk is done. They stay until ``forget``.
+        """
+        return [key for key in self.journal.entries if key not in self._seen]
+
+    def forget(self, key: str):
+        self.journal.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    def close(self):
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
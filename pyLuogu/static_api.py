@@ -1,21 +1,168 @@
+from typing import Any, Callable, Dict
+
+import copy
+import threading
+
+import httpx
+
 from .api import luoguAPI
 from .types import *
+from .cache import FOREVER
 from .bits.ultility import CachePool
 
+# seconds each kind of resource stays cached, keyed like staticLuoguAPI.pools
+DEFAULT_CACHE_DURATIONS: Dict[str, float] = {
+    "problem": 1200,
+    "problem_settings": 1200,
+    "user": 600,
+    "contest": 600,
+    "training": 1200,
+    "tags": 86400,
+    "record": FOREVER,
+}
+
 class staticLuoguAPI:
+    """
+    Read-through caching client over ``luoguAPI``.
+
+    Problems, problem settings, users, contests, trainings, tags and records
+    are served from one ``CachePool`` per kind (``pools``), falling back to
+    the network on a miss. Writes made through this object drop the cached
+    copies they affect. Any other ``luoguAPI`` method is passed through
+    uncached.
+
+    ``cache_durations`` overrides entries of ``DEFAULT_CACHE_DURATIONS``;
+    ``pools`` replaces whole pools, e.g. to bound them with ``max_entries``.
+    Records are only cached once judged.
+
+    Every call returns its own copy, so a caller editing a result (say,
+    settings it then fails to write back) does not change what others read.
+    """
     def __init__(
             self,
             base_url="https://www.luogu.com.cn",
-            cookies: LuoguCookies = None
+            cookies: LuoguCookies = None,
+            timeout: float | httpx.Timeout | None = 10,
+            max_retries: int = 5,
+            cache_durations: Dict[str, float] | None = None,
+            max_entries: int | None = None,
+            pools: Dict[str, CachePool] | None = None,
+            api: luoguAPI | None = None,
     ):
-        self.inner = luoguAPI(base_url=base_url, cookies=cookies)
-        problem_cache_pool = CachePool[ProblemDetails](
-                default_cache_duration = 1200,
-                default_load_function = lambda pid: self.inner.get_problem(pid).problem
-        )
-        problem_setting_cache = CachePool[ProblemDetails](
-                default_cache_duration = 1200,
-                default_load_function = lambda pid: self.inner.get_problem_settings(pid).problemSettings 
+        if api is None:
+            api = luoguAPI(base_url=base_url, cookies=cookies, timeout=timeout, max_retries=max_retries)
+        self.inner = api
+        durations = {**DEFAULT_CACHE_DURATIONS, **(cache_durations or {})}
+        unknown = set(durations) - set(DEFAULT_CACHE_DURATIONS)
+        if pools is not None:
+            unknown |= set(pools) - set(DEFAULT_CACHE_DURATIONS)
+        if unknown:
+            raise ValueError(f"Unknown cache pools: {', '.join(sorted(unknown))}")
+        self.pools: Dict[str, CachePool] = {
+            kind: CachePool(default_cache_duration=duration, max_entries=max_entries)
+            for kind, duration in durations.items()
+        }
+        self.pools.update(pools or {})
+
+    def __getattr__(self, name):
+        # only reached for names not defined here, i.e. uncached API methods
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _read_through(self, kind: str, key, fetch: Callable[[], Any]):
+        pool = self.pools[kind]
+        key = str(key)
+        value = pool.load(key)
+        if value is not None:
+            return copy.deepcopy(value)
+        value = fetch()
+        if value is not None:
+            pool.store(key, copy.deepcopy(value))
+        return value
+
+    def get_problem(self, pid: str, contest_id: int | None = None) -> ProblemDataRequestResponse:
+        # a problem seen through a contest may differ, so only the plain view is cached
+        if contest_id is not None:
+            return self.inner.get_problem(pid, contest_id)
+        return self._read_through("problem", pid, lambda: self.inner.get_problem(pid))
+
+    def get_problem_settings(self, pid: str) -> ProblemSettings:
+        return self._read_through(
+            "problem_settings", pid,
+            lambda: self.inner.get_problem_settings_legacy(pid).problemSettings
         )
 
-luogu = staticLuoguAPI()
\ No newline at end of file
+    def get_user(self, uid: int) -> UserDataRequestResponse:
+        return self._read_through("user", uid, lambda: self.inner.get_user(uid))
+
+    def get_contest(self, id: int) -> ContestDataRequestResponse:
+        return self._read_through("contest", id, lambda: self.inner.get_contest(id))
+
+    def get_problem_set(self, id: int) -> ProblemSetDataRequestResponse:
+        return self._read_through("training", id, lambda: self.inner.get_problem_set(id))
+
+    def get_tags(self) -> TagRequestResponse:
+        return self._read_through("tags", "", self.inner.get_tags)
+
+    def get_record(self, rid: str) -> RecordRequestResponse:
+        pool = self.pools["record"]
+        res = pool.load(rid)
+        if res is not None:
+            return copy.deepcopy(res)
+        res = self.inner.get_record(rid)
+        # 0: waiting, 1: judging; anything else is a final verdict
+        if res.record is not None and res.record.status not in (None, 0, 1):
+            pool.store(rid, copy.deepcopy(res))
+        return res
+
+    def invalidate_problem(self, pid: str):
+        """Drop the cached problem and settings of ``pid``."""
+        self.pools["problem"].remove(pid)
+        self.pools["problem_settings"].remove(pid)
+
+    def update_problem_settings(self, pid: str, new_settings: ProblemSettings) -> ProblemModifiedResponse:
+        try:
+            return self.inner.update_problem_settings(pid, new_settings)
+        finally:
+            self.invalidate_problem(pid)
+
+    def update_testcases_settings(self, pid: str, new_settings: TestCaseSettings) -> UpdateTestCasesSettingsResponse:
+        try:
+            return self.inner.update_testcases_settings(pid, new_settings)
+        finally:
+            self.invalidate_problem(pid)
+
+    def transfer_problem(
+            self, pid: str,
+            target: TransferProblemType = "U",
+            is_clone: bool = False
+    ) -> ProblemModifiedResponse:
+        try:
+            return self.inner.transfer_problem(pid, target, is_clone)
+        finally:
+            self.invalidate_problem(pid)
+
+    def delete_problem(self, pid: str) -> bool:
+        try:
+            return self.inner.delete_problem(pid)
+        finally:
+            self.invalidate_problem(pid)
+
+    def clear(self):
+        for pool in self.pools.values():
+            pool.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        return {kind: pool.stats() for kind, pool in self.pools.items()}
+
+_luogu_lock = threading.Lock()
+
+def __getattr__(name: str):
+    # ``luogu`` is a shared anonymous client, built on first use
+    if name != "luogu":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _luogu_lock:
+        if "luogu" not in globals():
+            globals()["luogu"] = staticLuoguAPI()
+    return globals()["luogu"]
@@ -0,0 +1,477 @@
+__all__ = [
+    "Send",
+    "Sleep",
+    "Wait",
+    "RequestContext",
+    "Transport",
+    "SyncTransport",
+    "AsyncTransport",
+]
+
+import re
+import json
+import time
+import logging
+import asyncio
+import concurrent.futures
+from typing import Any, Generator, List
+
+import httpx
+
+from .errors import *
+from .bits.ultility import JsonSerializable, json_dumps_bytes
+from .bits import jsonlib
+from . import logger
+
+USER_AGENT = "luogu_bot"
+C3VK_PATTERN = re.compile(r"C3VK=([^;\"']*);")
+PREVIEW_LIMIT = 50
+
+def _preview_chunks(data, limit: int):
+    if isinstance(data, JsonSerializable):
+        data = type(data)._serializer()[1](data)  # shallow: only the set fields
+    if isinstance(data, dict):
+        yield "{"
+        for i, (key, value) in enumerate(data.items()):
+            yield ", " if i else ""
+            yield from _preview_chunks(str(key), limit)
+            yield ": "
+            yield from _preview_chunks(value, limit)
+        yield "}"
+    elif isinstance(data, (list, tuple)):
+        yield "["
+        for i, value in enumerate(data):
+            yield ", " if i else ""
+            yield from _preview_chunks(value, limit)
+        yield "]"
+    elif isinstance(data, str):
+        # only the head of a long string can make it into the preview
+        yield json.dumps(data[:limit + 1], ensure_ascii=False)
+    else:
+        yield json.dumps(data, ensure_ascii=False, default=str)
+
+def preview(data, limit: int = PREVIEW_LIMIT) -> str:
+    """
+    JSON-like text of ``data`` cut to ``limit`` characters. Rendering stops
+    once the limit is reached, so large payloads are never serialized in full.
+    """
+    chunks = []
+    size = 0
+    for chunk in _preview_chunks(data, limit):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return "".join(chunks)[:limit] + "..."
+    return "".join(chunks)
+
+class Send:
+    """Effect: send ``request`` and resume the flow with the ``httpx.Response``."""
+    __slots__ = ("request",)
+
+    def __init__(self, request: httpx.Request):
+        self.request = request
+
+class Sleep:
+    """Effect: pause the flow for ``seconds``."""
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+class Wait:
+    """Effect: resume the flow with the result of ``future`` (or raise its exception)."""
+    __slots__ = ("future",)
+
+    def __init__(self, future: asyncio.Future | concurrent.futures.Future):
+        self.future = future
+
+Flow = Generator[Send | Sleep | Wait, Any, Any]
+
+class C3VKChallenge(LuoguAPIError):
+    """Raised by the core stage when the server answers with a C3VK cookie challenge."""
+    def __init__(self, token: str):
+        super().__init__("C3VK challenge")
+        self.token = token
+
+class CSRFTokenExpired(LuoguAPIError):
+    """Raised by the core stage when a 403 looks like a stale CSRF token."""
+    pass
+
+class RetryRequest(LuoguAPIError):
+    """Raised by a middleware to ask the retry stage for another attempt."""
+    def __init__(self, message: str, delay: float = 0):
+        super().__init__(message)
+        self.delay = delay
+
+class RequestContext:
+    """Per-request state handed down the middleware pipeline."""
+    def __init__(
+            self,
+            transport: "Transport",
+            endpoint: str,
+            method: str = "GET",
+            params: dict | None = None,
+            data: dict | JsonSerializable | None = None,
+    ):
+        self.transport = transport
+        self.endpoint = endpoint.lstrip("/")
+        self.method = method
+        self.params = params
+        self.data = data
+        self.url = f"{transport.base_url}/{self.endpoint}"
+        self.headers: dict = {}
+        self.attempt = 0
+        self.sends = 0
+        self.network_time = 0.0
+        self.wait_time = 0.0
+        self.from_cache = False
+        self.coalesced = False
+        self.extensions: dict = {}
+
+    def cache_key(self) -> str:
+        if not self.params:
+            return self.endpoint
+        query = "&".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.endpoint}?{query}"
+
+    def sleep(self, seconds: float) -> Flow:
+        if seconds > 0:
+            self.wait_time += seconds
+            yield Sleep(seconds)
+
+class Transport:
+    """
+    Request engine shared by ``luoguAPI`` and ``asyncLuoguAPI``.
+
+    Every request runs as a generator flow through the middleware pipeline
+    and yields ``Send``/``Sleep``/``Wait`` effects; ``SyncTransport`` and
+    ``AsyncTransport`` only differ in how they perform those effects.
+    """
+    client: httpx.Client | httpx.AsyncClient
+
+    def __init__(
+            self,
+            base_url: str = "https://www.luogu.com.cn",
+            cookies: dict | None = None,
+            max_retries: int = 5,
+            middlewares: List["Middleware"] | None = None,
+    ):
+        from .middleware import default_middlewares, MetricsMiddleware
+
+        self.base_url = base_url
+        self.cookies = {} if cookies is None else cookies
+        self.max_retries = max_retries
+        self.x_csrf_token: str | None = None
+        if middlewares is None:
+            middlewares = default_middlewares(max_retries=max_retries)
+        self.middlewares = list(middlewares)
+        self.metrics = next((x for x in self.middlewares if isinstance(x, MetricsMiddleware)), None)
+        self._handler = self._compose()
+
+    def _compose(self):
+        handler = self._send
+        for middleware in reversed(self.middlewares):
+            handler = (lambda m, h: lambda ctx: m.handle(ctx, h))(middleware, handler)
+        return handler
+
+    def flow(
+            self,
+            endpoint: str,
+            method: str = "GET",
+            params: dict | None = None,
+            data: dict | JsonSerializable | None = None,
+    ) -> Flow:
+        ctx = RequestContext(self, endpoint, method, params, data)
+        return self._handler(ctx)
+
+    def create_future(self) -> asyncio.Future | concurrent.futures.Future:
+        raise NotImplementedError
+
+    def set_cookie(self, name: str, value: str):
+        self.cookies[name] = value
+        self.client.cookies.set(name, value)
+
+    def _send(self, ctx: RequestContext) -> Flow:
+        if logger.isEnabledFor(logging.INFO):
+            if ctx.method == "GET":
+                logger.info("(%d/%d) GET from %s with params: %s", ctx.attempt, self.max_retries, ctx.url, ctx.params)
+            else:
+                logger.info(
+                    "(%d/%d) %s to %s with payload: %s",
+                    ctx.attempt, self.max_retries, ctx.method, ctx.url, preview(ctx.data)
+                )
+
+        headers = {
+            "User-Agent": USER_AGENT,
+            "x-luogu-type": "content-only",
+            "x-lentille-request": "content-only",
+        }
+        content = None
+        if ctx.data is not None:
+            # encoded once per request and reused by retries
+            content = ctx.extensions.get("content")
+            if content is None:
+                content = ctx.extensions["content"] = json_dumps_bytes(ctx.data)
+            headers["Content-Type"] = "application/json"
+        headers.update(ctx.headers)
+
+        request = self.client.build_request(
+            ctx.method, ctx.url,
+            headers=headers,
+            params=ctx.params,
+            content=content,
+        )
+
+        start = time.perf_counter()
+        try:
+            ctx.sends += 1
+            response = yield Send(request)
+        except httpx.TimeoutException:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Request error: {e}")
+            raise RequestError("Request error") from e
+        finally:
+            ctx.network_time += time.perf_counter() - start
+
+        return self.handle_response(ctx, response)
+
+    def handle_response(self, ctx: RequestContext, response: httpx.Response):
+        if response.is_error:
+            self._raise_for_status(ctx, response)
+
+        if "json" not in response.headers.get("content-type", ""):
+            token = self._extract_c3vk(response)
+            if token is not None:
+                raise C3VKChallenge(token)
+
+        try:
+            res_json = jsonlib.loads(response.content)
+        except ValueError:
+            logger.error(f"Failed to decode JSON response: {response.text}")
+            raise RequestError("Failed to decode JSON response") from None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response from %s: %s", ctx.url, response.text)
+
+        if res_json.get("currentTemplate") == "AuthLogin":
+            raise AuthenticationError("Need Login")
+        if res_json.get("code") == 403:
+            if res_json.get("errorMessage") == "user.not_self":
+                raise AuthenticationError("not yourself")
+            error_message = (res_json.get("currentData") or {}).get("errorMessage")
+            raise ForbiddenError(error_message or "Forbidden")
+        if res_json.get("code") in [404, 418]:
+            raise NotFoundError(f"Resource not found {ctx.endpoint}")
+
+        ctx.extensions["body"] = response.content
+        return self.unwrap(res_json)
+
+    @staticmethod
+    def unwrap(res_json: dict):
+        if res_json.get("currentData") is not None:
+            res_json = res_json.get("currentData")
+        if res_json.get("data") is not None:
+            res_json = res_json.get("data")
+        return res_json
+
+    def _raise_for_status(self, ctx: RequestContext, response: httpx.Response):
+        status = response.status_code
+        if status == 401:
+            raise AuthenticationError("Authentication failed")
+        elif status == 403:
+            try:
+                message = jsonlib.loads(response.content).get("errorMessage")
+            except (ValueError, AttributeError):
+                message = None
+            logger.warning(f"HTTP 403: {message}")
+            if message is None:
+                raise ForbiddenError(f"Forbidden: {ctx.endpoint}")
+            if message == "提交过于频繁，请过3分钟再尝试":
+                raise RateLimitError(message, retry_after=180)
+            if message == "请求频繁，请稍候再试":
+                raise RateLimitError(message, retry_after=5)
+            if message == "验证码错误":
+                raise NeedCaptcha("Need captcha")
+            if message == "user.not_self":
+                raise AuthenticationError("not yourself")
+            raise CSRFTokenExpired(message)
+        elif status == 404:
+            raise NotFoundError("Resource not found")
+        elif status == 429:
+            raise RateLimitError("Rate limit exceeded")
+        elif 500 <= status < 600:
+            raise ServerError("Server error")
+        else:
+            raise RequestError(f"HTTP error: {status}", status_code=status)
+
+    @staticmethod
+    def _extract_c3vk(response: httpx.Response) -> str | None:
+        result = C3VK_PATTERN.search(response.text)
+        if result:
+            logger.info(f"C3VK token fetched successfully {result.group(1)}")
+            return result.group(1)
+        return None
+
+    def csrf_flow(self, endpoint: str = "") -> Flow:
+        headers = {
+            "User-Agent": USER_AGENT,
+        }
+
+        for attempt in range(self.max_retries):
+            logger.info(f"({attempt}/{self.max_retries}) GET CSRF token from {self.base_url + endpoint}")
+            request = self.client.build_request("GET", self.base_url + endpoint, headers=headers)
+            try:
+                response = yield Send(request)
+                response.raise_for_status()
+            except httpx.TimeoutException as e:
+                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
+                yield Sleep(1)
+                continue
+            except httpx.HTTPError as e:
+                logger.error(f"HTTP error: {e}")
+                raise RequestError("HTTP error") from e
+
+            token = self._extract_c3vk(response)
+            if token is not None:
+                self.set_cookie("C3VK", token)
+                continue
+
+            import bs4  # only needed for writes; slow to import
+            soup = bs4.BeautifulSoup(response.text, "html.parser")
+            csrf_meta = soup.select_one("meta[name='csrf-token']")
+
+            if csrf_meta and "content" in csrf_meta.attrs:
+                self.x_csrf_token = csrf_meta["content"]
+                logger.info("CSRF token fetched successfully")
+                return self.x_csrf_token
+            else:
+                logger.warning("CSRF token not found, retrying...")
+                yield Sleep(1)
+
+        logger.error(f"Failed to fetch CSRF token after {self.max_retries} attempts")
+        raise RequestError(f"Failed to fetch CSRF token after {self.max_retries} attempts")
+
+    def captcha_flow(self) -> Flow:
+        headers = {
+            "User-Agent": USER_AGENT,
+            "x-csrf-token": self.x_csrf_token
+        }
+        for attempt in range(self.max_retries):
+            logger.info(f"({attempt}/{self.max_retries}) GET captcha from {self.base_url + '/api/verify/captcha'}")
+            request = self.client.build_request("GET", self.base_url + "/api/verify/captcha", headers=headers)
+            try:
+                response = yield Send(request)
+                response.raise_for_status()
+                return response.content
+            except httpx.TimeoutException as e:
+                logger.warning(f"Attempt {attempt + 1}: Timeout error - {e}")
+                yield Sleep(1)
+            except httpx.HTTPError as e:
+                logger.error(f"HTTP error: {e}")
+                raise RequestError("HTTP error") from e
+
+        raise RequestError(f"Failed to fetch captcha after {self.max_retries} attempts")
+
+class SyncTransport(Transport):
+    def __init__(
+            self,
+            base_url: str = "https://www.luogu.com.cn",
+            cookies: dict | None = None,
+            timeout: float | httpx.Timeout | None = 10,
+            max_retries: int = 5,
+            middlewares: List["Middleware"] | None = None,
+    ):
+        super().__init__(base_url, cookies, max_retries, middlewares)
+        self.client = httpx.Client(
+            timeout=timeout,
+            cookies=self.cookies,
+            follow_redirects=True,
+        )
+
+    def run(self, flow: Flow):
+        value, error = None, None
+        while True:
+            try:
+                effect = flow.send(value) if error is None else flow.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if isinstance(effect, Send):
+                    value = self.client.send(effect.request)
+                elif isinstance(effect, Wait):
+                    value = effect.future.result()
+                else:
+                    time.sleep(effect.seconds)
+            except BaseException as e:
+                error = e
+
+    def create_future(self) -> concurrent.futures.Future:
+        return concurrent.futures.Future()
+
+    def request(
+            self,
+            endpoint: str,
+            method: str = "GET",
+            params: dict | None = None,
+            data: dict | JsonSerializable | None = None,
+    ):
+        return self.run(self.flow(endpoint, method, params, data))
+
+    def get_csrf(self, endpoint: str = "") -> str:
+        return self.run(self.csrf_flow(endpoint))
+
+    def get_captcha(self) -> bytes:
+        return self.run(self.captcha_flow())
+
+class AsyncTransport(Transport):
+    def __init__(
+            self,
+            base_url: str = "https://www.luogu.com.cn",
+            cookies: dict | None = None,
+            timeout: float | httpx.Timeout | None = 10,
+            max_retries: int = 5,
+            middlewares: List["Middleware"] | None = None,
+    ):
+        super().__init__(base_url, cookies, max_retries, middlewares)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            cookies=self.cookies,
+            follow_redirects=True,
+        )
+
+    async def run(self, flow: Flow):
+        value, error = None, None
+        while True:
+            try:
+                effect = flow.send(value) if error is None else flow.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if isinstance(effect, Send):
+                    value = await self.client.send(effect.request)
+                elif isinstance(effect, Wait):
+                    value = await asyncio.shield(effect.future)
+                else:
+                    await asyncio.sleep(effect.seconds)
+            except BaseException as e:
+                error = e
+
+    def create_future(self) -> asyncio.Future:
+        return asyncio.get_running_loop().create_future()
+
+    async def request(
+            self,
+            endpoint: str,
+            method: str = "GET",
+            params: dict | None = None,
+            data: dict | JsonSerializable | None = None,
+    ):
+        return await self.run(self.flow(endpoint, method, params, data))
+
+    async def get_csrf(self, endpoint: str = "") -> str:
+        return await self.run(self.csrf_flow(endpoint))
+
+    async def get_captcha(self) -> bytes:
+        return await self.run(self.captcha_flow())
@@ -94,12 +94,9 @@ ProblemType = Literal["P", "U", "T", "B", "CF", "AT", "UVA", "SP"]
 ProblemSetType = Literal["official", "select"]
 TransferProblemType = Literal["P", "U", "B"] | int
 
-class LuoguType(JsonSerializable, Printable):
+class LuoguType(JsonSerializable, Printable, slots=True):
     __type_dict__ = {}
 
-    def __init__(self,json=None):
-        super().__init__(json)
-
 class RequestParams(LuoguType):
     pass
 
@@ -281,6 +278,7 @@ class UserSummary(LuoguType):
         "ccfLevel": int, 
         "background": str, 
     }
+    __intern_key__ = "uid"
     uid: int
     name: str
     avatar: str
@@ -299,6 +297,7 @@ class TeamSummary(LuoguType):
         "name": str,
         "isPremium": bool
     }
+    __intern_key__ = "id"
     id: int
     name: str
     isPremium: bool
@@ -361,6 +360,7 @@ class Provider(LuoguType):
         "user": UserSummary,
         "team": TeamSummary
     }
+    __intern_key__ = ("uid", "id")
     user: UserSummary | None
     team: TeamSummary | None
 
@@ -431,6 +431,7 @@ class Forum(LuoguType):
         "slug": str,
         "color": str,
     }
+    __intern_key__ = "slug"
     name: str
     type: int
     slug: str
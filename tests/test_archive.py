@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pyLuogu.archive import ArchiveReader, ArchiveWriter, pack
+from pyLuogu.types import ProblemSettings
+
+def settings(i: int) -> ProblemSettings:
+    return ProblemSettings({"title": f"题目 {i}", "tags": [i, i + 1], "difficulty": i % 8})
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "problems.lgar")
+
+    def compressions(self):
+        yield None
+        yield "gzip"
+        try:
+            import zstandard
+        except ImportError:
+            return
+        yield "zstd"
+
+    def test_round_trip(self):
+        for compression in self.compressions():
+            with self.subTest(compression=compression):
+                path = f"{self.path}.{compression}"
+                with ArchiveWriter(path, compression=compression, block_size=256) as writer:
+                    for i in range(50):
+                        writer.write(f"P{1000 + i}", settings(i))
+                    self.assertIn("P1049", writer)
+                with ArchiveReader(path, ProblemSettings) as reader:
+                    self.assertEqual(reader.compression, compression)
+                    self.assertEqual(len(reader), 50)
+                    self.assertEqual(reader["P1007"].to_json(), settings(7).to_json())
+                    self.assertEqual(reader.get("P1003").title, "题目 3")
+                    self.assertIsNone(reader.get("P999"))
+                    streamed = list(reader.items())
+                self.assertEqual([key for key, _ in streamed], [f"P{1000 + i}" for i in range(50)])
+                self.assertEqual(streamed[49][1].tags, [49, 50])
+
+    def test_append_and_supersede(self):
+        with ArchiveWriter(self.path, compression="gzip") as writer:
+            writer.write("P1000", settings(0))
+            writer.write("P1001", settings(1))
+        with ArchiveWriter(self.path) as writer:
+            self.assertEqual(writer.compression, "gzip")
+            self.assertIn("P1000", writer)
+            writer.write("P1000", settings(5))
+        with ArchiveReader(self.path, ProblemSettings) as reader:
+            self.assertEqual(reader["P1000"].title, "题目 5")
+            self.assertEqual([key for key, _ in reader.items()], ["P1001", "P1000"])
+        with self.assertRaises(ValueError):
+            ArchiveWriter(self.path, compression="zstd")
+
+    def test_flush_syncs_data_before_index(self):
+        with ArchiveWriter(self.path) as writer:
+            writer.write("P1000", settings(0))
+            with mock.patch("os.fsync") as fsync:
+                writer.flush()
+            self.assertEqual(
+                [x.args[0] for x in fsync.call_args_list],
+                [writer._file.fileno(), writer._index_file.fileno()],
+            )
+
+    def test_recovery(self):
+        with ArchiveWriter(self.path, block_size=1) as writer:
+            for i in range(3):
+                writer.write(f"P{1000 + i}", settings(i))
+        os.remove(self.path + ".idx")
+        with open(self.path, "ab") as file:
+            file.write(b"\xff\x00\x00\x00partial")  # a frame cut short by a crash
+
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(sorted(reader), ["P1000", "P1001", "P1002"])
+            self.assertEqual(reader["P1002"]["title"], "题目 2")
+        with ArchiveWriter(self.path) as writer:
+            writer.write("P1003", settings(3))
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(list(reader.values())), 4)
+
+    def test_pack(self):
+        with ArchiveWriter(self.path, compression="gzip", block_size=1) as writer:
+            for i in range(3):
+                writer.write(f"P{1000 + i}", settings(i))
+            writer.write("P1000", settings(9))
+        packed = self.path + ".packed"
+        self.assertEqual(pack(self.path, packed), 3)
+        with self.assertRaises(FileExistsError):
+            pack(self.path, packed)
+        with ArchiveReader(packed, ProblemSettings) as reader:
+            self.assertIsNone(reader.compression)
+            self.assertEqual(reader["P1000"].title, "题目 9")
+            self.assertEqual([key for key, _ in reader.items()], ["P1001", "P1002", "P1000"])
+        self.assertLess(os.path.getsize(packed + ".idx"), os.path.getsize(self.path + ".idx"))
+
+    def test_not_an_archive(self):
+        with open(self.path, "wb") as file:
+            file.write(b'{"title": "A+B"}\n')
+        with self.assertRaises(ValueError):
+            ArchiveReader(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from pyLuogu.batch import abatch_update, batch_update
+from pyLuogu.errors import NotFoundError, ServerError
+from pyLuogu.types import ProblemSettings
+
+def retag(settings: ProblemSettings):
+    if 151 not in settings.tags:
+        return None
+    settings.tags = [464 if tag == 151 else tag for tag in settings.tags]
+    return settings
+
+class FakeAPI:
+    """Serves settings from ``tags`` and records writes; ``errors`` are raised once per pid."""
+    def __init__(self, tags, errors=None, barrier=None):
+        self.tags = tags
+        self.errors = dict(errors or {})
+        self.barrier = barrier
+        self.events = []
+        self.lock = threading.Lock()
+
+    def get_problem_settings_legacy(self, pid):
+        with self.lock:
+            self.events.append(("get", pid))
+        if self.barrier is not None:
+            self.barrier.wait()
+        if pid not in self.tags:
+            raise NotFoundError(pid)
+        return SimpleNamespace(problemSettings=ProblemSettings({"title": pid, "tags": list(self.tags[pid])}))
+
+    def update_problem_settings(self, pid, settings):
+        with self.lock:
+            error = self.errors.pop(pid, None)
+            if error is not None:
+                raise error
+            self.events.append(("update", pid))
+            self.tags[pid] = settings.tags
+        return SimpleNamespace(pid=pid)
+
+class AsyncFakeAPI(FakeAPI):
+    async def get_problem_settings(self, pid):
+        await asyncio.sleep(0)
+        return self.get_problem_settings_legacy(pid)
+
+    async def update_problem_settings(self, pid, settings):
+        await asyncio.sleep(0)
+        return FakeAPI.update_problem_settings(self, pid, settings)
+
+class TestBatchUpdate(unittest.TestCase):
+
+    def test_report(self):
+        api = FakeAPI({"P1": [1, 151], "P2": [2], "P3": [151]}, errors={"P3": ServerError("busy")})
+        seen = []
+        report = batch_update(
+            api, ["P1", "P2", "P3", "P4"], retag,
+            write_rate=None, retry_delay=0, on_result=seen.append,
+        )
+        self.assertEqual(
+            [(x.pid, x.status, x.attempts) for x in report.results],
+            [("P1", "updated", 1), ("P2", "unchanged", 1), ("P3", "updated", 2), ("P4", "failed", 1)],
+        )
+        self.assertEqual(report.counts(), {"updated": 2, "unchanged": 1, "failed": 1})
+        self.assertIsInstance(report.failed[0].error, NotFoundError)
+        self.assertEqual(sorted(x.pid for x in seen), ["P1", "P2", "P3", "P4"])
+        self.assertEqual(api.tags, {"P1": [1, 464], "P2": [2], "P3": [464]})
+        self.assertIn("4 problems", str(report))
+
+    def test_transform_errors_are_not_retried(self):
+        def broken(settings):
+            raise ValueError("bad transform")
+
+        report = batch_update(FakeAPI({"P1": [1]}), ["P1"], broken, retry_delay=0)
+        self.assertEqual((report.results[0].status, report.results[0].attempts), ("failed", 1))
+        self.assertIsInstance(report.results[0].error, ValueError)
+
+    def test_selector_is_listed_before_writing(self):
+        api = FakeAPI({"P1": [151], "P2": [151]})
+
+        def listing():
+            for pid in ("P1", "P2"):
+                api.events.append(("list", pid))
+                yield SimpleNamespace(pid=pid)
+
+        batch_update(api, listing(), retag, write_rate=None)
+        self.assertEqual(api.events[:2], [("list", "P1"), ("list", "P2")])
+
+    def test_reads_are_concurrent_and_writes_paced(self):
+        # every read waits for the other two, so this only completes if they overlap
+        api = FakeAPI({"P1": [151], "P2": [151], "P3": [151]}, barrier=threading.Barrier(3, timeout=5))
+        begin = time.perf_counter()
+        report = batch_update(api, ["P1", "P2", "P3"], retag, concurrency=3, write_rate=20)
+        self.assertEqual(report.counts()["updated"], 3)
+        # a bucket of one token: the 2nd and 3rd write wait 1/20 s each
+        self.assertGreaterEqual(time.perf_counter() - begin, 0.09)
+
+    def test_async(self):
+        api = AsyncFakeAPI({"P1": [151], "P2": [2]}, errors={"P1": ServerError("busy")})
+
+        async def listing():
+            for pid in ("P1", "P2", "P3"):
+                yield pid
+
+        report = asyncio.run(abatch_update(api, listing(), retag, write_rate=None, retry_delay=0))
+        self.assertEqual(
+            [(x.pid, x.status, x.attempts) for x in report.results],
+            [("P1", "updated", 2), ("P2", "unchanged", 1), ("P3", "failed", 1)],
+        )
+
+if __name__ == '__main__':
+    unittest.main()
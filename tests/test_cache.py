@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+
+from pyLuogu.api import luoguAPI
+from pyLuogu.bits.ultility import CachePool
+from pyLuogu.cache import CachePolicy, SQLiteCache, FOREVER
+from pyLuogu.transport import RequestContext, Transport
+from pyLuogu.types import LuoguCookies, ProblemSettings
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_persists_across_instances(self):
+        cache = SQLiteCache(self.path)
+        cache.store("problem/P1000", b"{}", FOREVER)
+        cache.close()
+        self.assertEqual(SQLiteCache(self.path).load("problem/P1000"), b"{}")
+
+    def test_expiry(self):
+        cache = SQLiteCache(self.path)
+        cache.store("a", b"1", 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.load("a"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        cache = SQLiteCache(self.path, max_entries=2, evict_interval=1)
+        cache.store("a", b"1")
+        cache.store("b", b"2")
+        cache.load("a")
+        cache.store("c", b"3")
+        self.assertIsNone(cache.load("b"))
+        self.assertEqual(cache.load("a"), b"1")
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_byte_cap(self):
+        cache = SQLiteCache(self.path, max_bytes=10, evict_interval=1)
+        for key in "abcd":
+            cache.store(key, b"12345")
+        self.assertLessEqual(cache.stats()["bytes"], 10)
+
+class TestCachePolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Transport(middlewares=[])
+        self.policy = CachePolicy()
+
+    def ctx(self, endpoint, method="GET"):
+        return RequestContext(self.transport, endpoint, method)
+
+    def test_default_rules(self):
+        self.assertEqual(self.policy.ttl(self.ctx("/_lfe/tags"), {}), 86400)
+        self.assertEqual(self.policy.ttl(self.ctx("problem/P1000"), {}), 1200)
+        self.assertFalse(self.policy.cacheable(self.ctx("api/feed/list")))
+        self.assertFalse(self.policy.cacheable(self.ctx("fe/api/problem/edit/P1000", "POST")))
+        self.assertFalse(self.policy.cacheable(self.ctx("problem/P1000/edit")))
+
+    def test_writes_invalidate_problem_reads(self):
+        self.assertEqual(
+            self.policy.invalidated(self.ctx("/fe/api/problem/editTestCase/U1", "POST")),
+            ["problem/U1", "problem/edit/U1", "problem/U1/edit"],
+        )
+        self.assertEqual(self.policy.invalidated(self.ctx("fe/api/problem/new", "POST")), [])
+
+    def test_records_cached_once_final(self):
+        ctx = self.ctx("record/1")
+        self.assertIsNone(self.policy.ttl(ctx, {"record": {"status": 1}}))
+        self.assertEqual(self.policy.ttl(ctx, {"record": {"status": 12}}), FOREVER)
+
+class TestCacheMiddleware(unittest.TestCase):
+
+    def test_second_client_reads_from_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite")
+            log = []
+
+            def handler(request):
+                log.append(request)
+                return httpx.Response(200, json={"currentData": {"tags": [{"id": 1}], "types": []}})
+
+            for _ in range(2):
+                api = luoguAPI(cache=SQLiteCache(path), cache_policy=CachePolicy())
+                api.transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+                self.assertEqual(api.get_tags().tags[0].id, 1)
+            self.assertEqual(len(log), 1)
+            self.assertEqual(api.metrics.stats()["cache_hits"], 1)
+
+    def test_write_drops_stale_reads(self):
+        titles = ["old"]
+        log = []
+
+        def handler(request):
+            log.append(request)
+            if request.url.path == "/":
+                return httpx.Response(200, text='<meta name="csrf-token" content="token">')
+            if request.method == "POST":
+                titles.append(json.loads(request.content)["settings"]["title"])
+                return httpx.Response(200, json={"pid": "U1"})
+            return httpx.Response(200, json={"currentData": {"title": titles[-1]}})
+
+        policy = CachePolicy(rules=[(r"problem/[^/]+/edit", 1200)])
+        api = luoguAPI(cache=CachePool[bytes](), cache_policy=policy)
+        api.transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+        self.assertEqual(api.get_problem_settings("U1")["title"], "old")
+        self.assertEqual(api.get_problem_settings("U1")["title"], "old")
+        api.update_problem_settings("U1", ProblemSettings({"title": "new"}))
+        self.assertEqual(api.get_problem_settings("U1")["title"], "new")
+        self.assertEqual(api.metrics.stats()["cache_hits"], 1)
+
+    def test_accounts_do_not_share_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite")
+            log = []
+
+            def handler(request):
+                log.append(request)
+                return httpx.Response(200, json={"currentData": {"tags": [{"id": 1}], "types": []}})
+
+            for uid in ("1", "2", "1"):
+                cookies = LuoguCookies({"__client_id": f"client-{uid}", "_uid": uid})
+                api = luoguAPI(cookies=cookies, cache=SQLiteCache(path), cache_policy=CachePolicy())
+                api.transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+                api.get_tags()
+            self.assertEqual(len(log), 2)
+
+if __name__ == '__main__':
+    unittest.main()
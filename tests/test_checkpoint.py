@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from pyLuogu.async_api import asyncLuoguAPI
+from pyLuogu.checkpoint import Checkpoint
+from pyLuogu.pagination import iter_pages
+from tests.test_pagination import page_handler
+from tests.test_transport import mock_async
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "crawl", "journal")
+        self.fetched = []
+
+    def iterate(self, count=7, start=1):
+        """Pages of 3 numbers up to ``count``, without count/perPage."""
+        def fetch(page):
+            self.fetched.append(page)
+            return list(range(page * 3 - 2, min(page * 3, count) + 1))
+
+        return iter_pages(fetch, list, start=start, prefetch=False)
+
+    def test_resume_at_page_and_offset(self):
+        seen = []
+        with Checkpoint(self.path) as checkpoint:
+            for item in checkpoint.walk("numbers", self.iterate):
+                if item == 5:
+                    break  # dies while processing 5
+                seen.append(item)
+            self.assertEqual(checkpoint.position("numbers"), (2, 1))
+
+        self.fetched.clear()
+        with Checkpoint(self.path) as checkpoint:
+            self.assertEqual(checkpoint.position("numbers"), (2, 1))
+            seen.extend(checkpoint.walk("numbers", self.iterate))
+            self.assertEqual(self.fetched, [2, 3])
+            self.assertTrue(checkpoint.finished("numbers"))
+            self.assertEqual(list(checkpoint.walk("numbers", self.iterate)), [])
+        self.assertEqual(seen, [1, 2, 3, 4, 5, 6, 7])
+
+        with Checkpoint(self.path) as checkpoint:
+            self.assertTrue(checkpoint.finished("numbers"))
+            checkpoint.reset("numbers")
+            self.assertEqual(list(checkpoint.walk("numbers", self.iterate, start=3)), [7])
+
+    def test_errors_keep_the_position(self):
+        def iterate(start):
+            def fetch(page):
+                if page == 2:
+                    raise RuntimeError("page 2")
+                return [1, 2, 3]
+            return iter_pages(fetch, list, start=start, prefetch=False)
+
+        with Checkpoint(self.path) as checkpoint:
+            with self.assertRaises(RuntimeError):
+                list(checkpoint.walk("numbers", iterate))
+            self.assertEqual(checkpoint.position("numbers"), (1, 2))
+            self.assertFalse(checkpoint.finished("numbers"))
+
+    def test_journal_is_compacted_and_survives_a_torn_line(self):
+        with Checkpoint(self.path) as checkpoint:
+            list(checkpoint.walk("a", self.iterate))
+            for _ in checkpoint.walk("b", self.iterate):
+                break
+        with open(self.path, "ab") as file:
+            file.write(b'["b", 3')
+        with Checkpoint(self.path) as checkpoint:
+            self.assertTrue(checkpoint.finished("a"))
+            self.assertEqual(checkpoint.position("b"), (1, 0))
+        with open(self.path, "rb") as file:
+            self.assertEqual(len(file.read().splitlines()), 2)
+
+    def test_async_walk(self):
+        log = []
+
+        async def main():
+            api = asyncLuoguAPI()
+            mock_async(api, page_handler(log, 5))
+            pids = []
+            with Checkpoint(self.path) as checkpoint:
+                async for problem in checkpoint.awalk("P", api.iter_problems, _type="P", prefetch=False):
+                    if problem.pid == "P4":
+                        break
+                    pids.append(problem.pid)
+            first_run = len(log)
+            with Checkpoint(self.path) as checkpoint:
+                async for problem in checkpoint.awalk("P", api.iter_problems, _type="P", prefetch=False):
+                    pids.append(problem.pid)
+            return pids, [x.url.params["page"] for x in log[first_run:]]
+
+        pids, pages = asyncio.run(main())
+        self.assertEqual(pids, ["P1", "P2", "P3", "P4", "P5"])
+        self.assertEqual(pages, ["2", "3"])
+
+if __name__ == '__main__':
+    unittest.main()
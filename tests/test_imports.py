@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_import_is_light(self):
+        loaded = run(
+            "import sys, pyLuogu\n"
+            "print(sorted(m for m in ('httpx', 'bs4', 'asyncio', 'pyLuogu.types', 'pyLuogu.static_api') if m in sys.modules))"
+        )
+        self.assertEqual(loaded, "[]")
+
+    def test_lazy_exports(self):
+        out = run(
+            "import sys, pyLuogu\n"
+            "from pyLuogu import LuoguCookies\n"
+            "print('httpx' in sys.modules)\n"
+            "print(pyLuogu.luogu is pyLuogu.luogu, type(pyLuogu.luogu).__name__)\n"
+            "print('luoguAPI' in pyLuogu.__all__, 'ProblemSettings' in dir(pyLuogu))"
+        )
+        self.assertEqual(out.splitlines(), ["False", "True staticLuoguAPI", "True True"])
+
+    def test_unknown_attribute(self):
+        import pyLuogu
+        with self.assertRaises(AttributeError):
+            pyLuogu.no_such_name
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from pyLuogu.bits import jsonlib
+from pyLuogu.bits.ultility import json_dumps_bytes
+from pyLuogu.types import ProblemDetails
+
+class TestJsonlib(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(jsonlib.use, jsonlib.name)
+
+    def installed(self):
+        for name in jsonlib.BACKENDS:
+            try:
+                jsonlib.use(name)
+            except ImportError:
+                continue
+            yield name
+
+    def test_backends_agree(self):
+        problem = ProblemDetails({"pid": "P1000", "title": "中文 / A+B", "limits": [[1000, 131072]]})
+        data = {"settings": problem, "ids": {1: [1.5, None, True]}}
+        expected = {"settings": problem.to_json(), "ids": {"1": [1.5, None, True]}}
+        for name in self.installed():
+            with self.subTest(backend=name):
+                encoded = json_dumps_bytes(data)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(jsonlib.loads(encoded), expected)
+                self.assertEqual(jsonlib.loads(encoded.decode()), expected)
+                with self.assertRaises(ValueError):
+                    jsonlib.loads(b"<html>")
+
+    def test_store_and_from_file(self):
+        problem = ProblemDetails({"pid": "P1000", "samples": [["1 2", "3"]], "content": {"name": "A+B"}})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "problem.json")
+            problem.store(path)
+            self.assertEqual(ProblemDetails.from_file(path).to_json(), problem.to_json())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            jsonlib.use("simplejson")
+
+if __name__ == '__main__':
+    unittest.main()
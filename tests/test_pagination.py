@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import unittest
+
+import httpx
+
+from pyLuogu.api import luoguAPI
+from pyLuogu.async_api import asyncLuoguAPI
+from pyLuogu.bits.ultility import InternTable
+from pyLuogu.pagination import afetch_pages, aiter_pages, fetch_pages, iter_pages
+from pyLuogu.types import ActivityRequestResponse
+from tests.test_transport import make_handler, mock_async, mock_sync
+
+def problem_page(pids, count, per_page=2):
+    return httpx.Response(200, json={"currentData": {"problems": {
+        "result": [{"pid": pid} for pid in pids], "count": count, "perPage": per_page,
+    }}})
+
+class Paged:
+    def __init__(self, page, count=9, per_page=2):
+        self.page = page
+        self.count = count
+        self.perPage = per_page
+
+def user_page(page, count=4):
+    """Page ``page`` of a listing of one activity per page, all by the same user."""
+    res = Paged(page, count=count, per_page=1)
+    activity = {"id": page, "user": {"uid": 1, "name": "a"}}
+    res.users = [x.user for x in ActivityRequestResponse({"activities": [activity]}).activities]
+    return res
+
+def page_handler(log, count):
+    """Serves ``problem/list`` by page number, whatever the order of requests."""
+    def handler(request: httpx.Request):
+        log.append(request)
+        page = int(request.url.params["page"])
+        pids = [f"P{i}" for i in range(page * 2 - 1, min(page * 2, count) + 1)]
+        return problem_page(pids, count)
+
+    return handler
+
+class TestPagination(unittest.TestCase):
+
+    def test_iter_problems(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [
+            problem_page(["P1", "P2"], 5),
+            problem_page(["P3", "P4"], 5),
+            problem_page(["P5"], 5),
+        ]))
+        pids = [problem.pid for problem in api.iter_problems(_type="P")]
+        self.assertEqual(pids, ["P1", "P2", "P3", "P4", "P5"])
+        self.assertEqual([x.url.params["page"] for x in log], ["1", "2", "3"])
+        self.assertEqual({x.url.params["type"] for x in log}, {"P"})
+
+    def test_empty_listing(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [problem_page([], 0)]))
+        self.assertEqual(list(api.iter_created_problems()), [])
+        self.assertEqual(len(log), 1)
+
+    def test_lists_without_count_end_at_a_short_page(self):
+        pages = {1: [1, 2], 2: [3, 4], 3: [5]}
+        calls = []
+
+        def fetch(page):
+            calls.append(page)
+            return pages.get(page, [])
+
+        self.assertEqual(list(iter_pages(fetch, list)), [1, 2, 3, 4, 5])
+        self.assertEqual(calls, [1, 2, 3])
+        calls.clear()
+        self.assertEqual(list(iter_pages(fetch, list, start=2, prefetch=False)), [3, 4, 5])
+        self.assertEqual(calls, [2, 3])
+
+    def test_next_page_is_prefetched(self):
+        fetched = threading.Event()
+
+        def fetch(page):
+            if page == 2:
+                fetched.set()
+            return [page, page] if page < 3 else []
+
+        pages = iter_pages(fetch, list)
+        self.assertEqual(next(pages), 1)
+        self.assertTrue(fetched.wait(5))
+        self.assertEqual(list(pages), [1, 2, 2])
+
+    def test_prefetch_keeps_the_callers_context(self):
+        with InternTable() as table:
+            users = list(iter_pages(user_page, lambda res: res.users))
+        self.assertEqual(len(users), 4)
+        self.assertEqual(len(set(map(id, users))), 1)
+        self.assertEqual(table.stats()["hits"], 3)
+
+    def test_errors_surface_after_the_current_page(self):
+        def fetch(page):
+            if page == 2:
+                raise RuntimeError("page 2")
+            return [1, 2]
+
+        seen = []
+        with self.assertRaisesRegex(RuntimeError, "page 2"):
+            for item in iter_pages(fetch, list):
+                seen.append(item)
+        self.assertEqual(seen, [1, 2])
+
+    def test_async_iter_problems(self):
+        log = []
+
+        async def main():
+            api = asyncLuoguAPI()
+            mock_async(api, make_handler(log, [
+                problem_page(["P1", "P2"], 3),
+                problem_page(["P3"], 3),
+            ]))
+            return [problem.pid async for problem in api.iter_problems()]
+
+        self.assertEqual(asyncio.run(main()), ["P1", "P2", "P3"])
+        self.assertEqual([x.url.params["page"] for x in log], ["1", "2"])
+
+    def test_async_prefetch_and_early_exit(self):
+        started = []
+
+        async def fetch(page):
+            started.append(page)
+            await asyncio.sleep(0)
+            return [page] * 2
+
+        async def main():
+            pages = aiter_pages(fetch, list)
+            self.assertEqual(await pages.__anext__(), 1)
+            await asyncio.sleep(0)
+            self.assertEqual(started, [1, 2])
+            await pages.aclose()
+
+        asyncio.run(main())
+        self.assertEqual(started, [1, 2])
+
+class TestFetchPages(unittest.TestCase):
+
+    def test_fetch_all_pages(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, page_handler(log, 7))
+        pages = list(api.fetch_all_pages(api.get_problem_list, _type="P", concurrency=3))
+        self.assertEqual([page for page, _ in pages], [1, 2, 3, 4])
+        pids = [problem.pid for _, res in pages for problem in res.problems]
+        self.assertEqual(pids, [f"P{i}" for i in range(1, 8)])
+        self.assertEqual(log[0].url.params["page"], "1")
+        self.assertEqual({x.url.params["type"] for x in log}, {"P"})
+
+        unordered = api.fetch_all_pages(api.get_problem_list, ordered=False, start=2)
+        self.assertEqual(sorted(page for page, _ in unordered), [2, 3, 4])
+
+    def test_pages_are_fetched_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(page):
+            if page > 1:
+                barrier.wait()  # only passes once pages 2, 3 and 4 are all in flight
+            return Paged(page, count=8)
+
+        self.assertEqual([page for page, _ in fetch_pages(fetch, concurrency=3)], [1, 2, 3, 4])
+
+    def test_unordered_pages_arrive_as_completed(self):
+        release = threading.Event()
+
+        def fetch(page):
+            if page == 2:
+                release.wait(5)
+            return Paged(page, count=6)
+
+        pages = fetch_pages(fetch, ordered=False)
+        self.assertEqual(next(pages)[0], 1)
+        self.assertEqual(next(pages)[0], 3)
+        release.set()
+        self.assertEqual(next(pages)[0], 2)
+
+    def test_fetch_pages_keeps_the_callers_context(self):
+        for ordered in (True, False):
+            # one worker, so that pages are interned one after the other
+            with InternTable():
+                pages = list(fetch_pages(user_page, concurrency=1, ordered=ordered))
+            self.assertEqual(len({id(res.users[0]) for _, res in pages}), 1)
+
+    def test_errors_and_unknown_size(self):
+        def fetch(page):
+            if page == 3:
+                raise RuntimeError("page 3")
+            return Paged(page)
+
+        with self.assertRaisesRegex(RuntimeError, "page 3"):
+            list(fetch_pages(fetch))
+        with self.assertRaises(ValueError):
+            list(fetch_pages(lambda page: [1, 2]))
+
+    def test_async_fetch_all_pages(self):
+        log = []
+        in_flight = [0, 0]
+
+        async def fetch(page):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0.01 if page % 2 else 0)
+            in_flight[0] -= 1
+            return Paged(page)
+
+        async def main():
+            api = asyncLuoguAPI()
+            mock_async(api, page_handler(log, 5))
+            pages = [(page, [x.pid for x in res.problems])
+                     async for page, res in api.fetch_all_pages(api.get_problem_list)]
+            unordered = [page async for page, _ in afetch_pages(fetch, concurrency=2, ordered=False)]
+            return pages, unordered
+
+        pages, unordered = asyncio.run(main())
+        self.assertEqual(pages, [(1, ["P1", "P2"]), (2, ["P3", "P4"]), (3, ["P5"])])
+        self.assertEqual(sorted(unordered), [1, 2, 3, 4, 5])
+        self.assertNotEqual(unordered, [1, 2, 3, 4, 5])
+        self.assertEqual(in_flight[1], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from pyLuogu.ratelimit import TokenBucket, AdaptiveTokenBucket, EndpointRateLimiter, DecorrelatedJitter
+from pyLuogu.transport import RequestContext, Transport
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_queue(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+class TestAdaptiveTokenBucket(unittest.TestCase):
+
+    def test_multiplicative_decrease_once_per_cooldown(self):
+        bucket = AdaptiveTokenBucket(rate=4, cooldown=60)
+        bucket.on_throttle()
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 2)
+        self.assertEqual(bucket.ceiling, 4)
+        self.assertEqual(bucket.throttles, 2)
+
+    def test_additive_increase_slows_above_ceiling(self):
+        bucket = AdaptiveTokenBucket(rate=1, increase=0.1, cooldown=0)
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.1)
+        bucket.on_throttle()
+        bucket.rate = bucket.ceiling
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.1 + 0.1 / 1.1 * bucket.probe_factor)
+
+    def test_rate_floor(self):
+        bucket = AdaptiveTokenBucket(rate=1, min_rate=0.4, cooldown=0)
+        for _ in range(5):
+            bucket.on_throttle()
+        self.assertEqual(bucket.rate, 0.4)
+
+class TestDecorrelatedJitter(unittest.TestCase):
+
+    def test_bounds(self):
+        jitter = DecorrelatedJitter(base=1, cap=10)
+        delay = None
+        for _ in range(100):
+            delay = jitter.next(delay)
+            self.assertGreaterEqual(delay, 1)
+            self.assertLessEqual(delay, 10)
+
+    def test_retry_after_is_lower_bound(self):
+        self.assertEqual(DecorrelatedJitter(cap=60).next(None, 180), 180)
+
+class TestEndpointRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Transport(middlewares=[])
+
+    def test_classify(self):
+        classify = EndpointRateLimiter.classify
+        self.assertEqual(classify(RequestContext(self.transport, "problem/P1000")), "read")
+        self.assertEqual(classify(RequestContext(self.transport, "/_lfe/tags")), "read")
+        self.assertEqual(classify(RequestContext(self.transport, "fe/api/problem/edit/P1000", "POST")), "write")
+        self.assertEqual(classify(RequestContext(self.transport, "/fe/api/problem/submit/P1000", "POST")), "submit")
+
+    def test_unlimited_class(self):
+        limiter = EndpointRateLimiter(read_rate=None, write_rate=1)
+        ctx = RequestContext(self.transport, "problem/P1000")
+        for _ in range(100):
+            self.assertEqual(limiter.reserve(ctx), 0)
+        write = RequestContext(self.transport, "fe/api/problem/edit/P1000", "POST")
+        self.assertEqual(limiter.reserve(write), 0)
+        self.assertGreater(limiter.reserve(write), 0)
+
+    def test_adaptive_feedback(self):
+        limiter = EndpointRateLimiter(read_rate=2, adaptive=True)
+        ctx = RequestContext(self.transport, "problem/P1000")
+        limiter.feedback(ctx, True)
+        self.assertEqual(limiter.rates["read"], 1)
+        self.assertEqual(limiter.rates["write"], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from pyLuogu.snapshot import SyncSnapshot
+from pyLuogu.types import ProblemDataRequestResponse, ProblemSummary
+
+def summary(pid: str, difficulty: int = 1, tags=(1, 2), total_submit: int = 10) -> ProblemSummary:
+    return ProblemSummary({
+        "pid": pid, "title": pid, "difficulty": difficulty, "type": "P",
+        "tags": list(tags), "totalSubmit": total_submit,
+    })
+
+class TestSyncSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "problems.snapshot")
+        self.versions = {}
+        self.fetched = []
+
+    def fetch(self, pid: str) -> ProblemDataRequestResponse:
+        self.fetched.append(pid)
+        return ProblemDataRequestResponse({"problem": {"pid": pid, "content": {"version": self.versions.get(pid, 1)}}})
+
+    def run_sync(self, listing, **kwargs):
+        self.fetched.clear()
+        with SyncSnapshot(self.path, **kwargs) as snapshot:
+            changed = [item.pid for item, _ in snapshot.changes(listing, self.fetch)]
+            return changed, snapshot.stats(), snapshot.missing()
+
+    def test_only_changed_items_are_fetched(self):
+        listing = [summary("P1"), summary("P2"), summary("P3")]
+        changed, stats, _ = self.run_sync(listing)
+        self.assertEqual(changed, ["P1", "P2", "P3"])
+        self.assertEqual(stats["new"], 3)
+
+        changed, stats, _ = self.run_sync(listing)
+        self.assertEqual((changed, self.fetched), ([], []))
+        self.assertEqual(stats["unchanged"], 3)
+
+        listing = [summary("P1", difficulty=2), summary("P2", total_submit=99), summary("P3", tags=(2, 1))]
+        changed, stats, _ = self.run_sync(listing)
+        self.assertEqual(changed, ["P1"])
+        self.assertEqual(stats, {"seen": 3, "fetched": 1, "new": 0, "changed": 1, "refreshed": 0, "unchanged": 2})
+
+    def test_refresh_yields_only_new_content_versions(self):
+        listing = [summary("P1"), summary("P2")]
+        self.run_sync(listing)
+        self.versions["P2"] = 2
+        changed, stats, _ = self.run_sync(listing, refresh_after=0)
+        self.assertEqual(self.fetched, ["P1", "P2"])
+        self.assertEqual(changed, ["P2"])
+        self.assertEqual((stats["refreshed"], stats["unchanged"]), (1, 1))
+        changed, _, _ = self.run_sync(listing, refresh_after=3600)
+        self.assertEqual(self.fetched, [])
+
+    def test_interrupted_item_is_yielded_again(self):
+        listing = [summary("P1"), summary("P2"), summary("P3")]
+        with SyncSnapshot(self.path) as snapshot:
+            for item, _ in snapshot.changes(listing, self.fetch):
+                if item.pid == "P2":
+                    break  # dies while storing P2
+        changed, _, _ = self.run_sync(listing)
+        self.assertEqual(changed, ["P2", "P3"])
+
+    def test_missing_and_forget(self):
+        self.run_sync([summary("P1"), summary("P2")])
+        _, _, missing = self.run_sync([summary("P1")])
+        self.assertEqual(missing, ["P2"])
+        with SyncSnapshot(self.path) as snapshot:
+            snapshot.forget("P2")
+            self.assertEqual(snapshot.missing(), ["P1"])
+
+    def test_async_changes(self):
+        async def listing():
+            for pid in ("P1", "P2"):
+                yield summary(pid)
+
+        async def fetch(pid):
+            return SimpleNamespace(problem=SimpleNamespace(content=SimpleNamespace(version=1)))
+
+        async def main():
+            with SyncSnapshot(self.path) as snapshot:
+                first = [item.pid async for item, _ in snapshot.achanges(listing(), fetch)]
+            with SyncSnapshot(self.path) as snapshot:
+                second = [item.pid async for item, _ in snapshot.achanges(listing(), fetch)]
+            return first, second
+
+        self.assertEqual(asyncio.run(main()), (["P1", "P2"], []))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import httpx
+
+from pyLuogu.static_api import staticLuoguAPI
+from pyLuogu.types import ProblemSettings
+from tests.test_transport import make_handler, mock_sync
+
+def problem_response(title):
+    return httpx.Response(200, json={"currentData": {"problem": {
+        "pid": "P1000", "title": title, "limits": {"time": [1000], "memory": [131072]}
+    }}})
+
+def record_response(status):
+    return httpx.Response(200, json={"currentData": {"record": {"id": 1, "status": status}}})
+
+class TestStaticLuoguAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.log = []
+        self.api = staticLuoguAPI()
+
+    def serve(self, *responses):
+        mock_sync(self.api.inner, make_handler(self.log, responses))
+
+    def test_read_through(self):
+        self.serve(problem_response("A+B"))
+        first = self.api.get_problem("P1000")
+        second = self.api.get_problem("P1000")
+        self.assertEqual(first.to_json(), second.to_json())
+        self.assertEqual(second.problem.title, "A+B")
+        self.assertEqual(len(self.log), 1)
+        self.assertEqual(self.api.stats()["problem"]["hits"], 1)
+
+    def test_callers_get_their_own_copy(self):
+        self.serve(problem_response("A+B"))
+        self.api.get_problem("P1000").problem.title = "edited, never written"
+        cached = self.api.get_problem("P1000")
+        cached.problem.title = "edited again"
+        self.assertEqual(self.api.get_problem("P1000").problem.title, "A+B")
+        self.assertEqual(len(self.log), 1)
+
+    def test_write_invalidates(self):
+        self.serve(
+            problem_response("old"),
+            httpx.Response(200, json={"_empty": True}),
+            problem_response("new"),
+        )
+        self.assertEqual(self.api.get_problem("P1000").problem.title, "old")
+        self.assertTrue(self.api.delete_problem("P1000"))
+        self.assertEqual(self.api.get_problem("P1000").problem.title, "new")
+
+    def test_pending_records_are_not_cached(self):
+        self.serve(record_response(1), record_response(12), record_response(1))
+        self.assertEqual(self.api.get_record("1").record.status, 1)
+        self.assertEqual(self.api.get_record("1").record.status, 12)
+        self.assertEqual(self.api.get_record("1").record.status, 12)
+        self.assertEqual(len(self.log), 2)
+
+    def test_uncached_methods_pass_through(self):
+        self.assertEqual(self.api.x_csrf_token, self.api.inner.x_csrf_token)
+        with self.assertRaises(ValueError):
+            staticLuoguAPI(cache_durations={"problems": 1})
+
+if __name__ == '__main__':
+    unittest.main()
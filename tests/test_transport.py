@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import unittest
+from unittest import mock
+
+import httpx
+
+from pyLuogu import ColoredFormatter, logger
+from pyLuogu.api import luoguAPI
+from pyLuogu.bits.ultility import json_dumps_bytes
+from pyLuogu.async_api import asyncLuoguAPI
+from pyLuogu.errors import ForbiddenError, NotFoundError
+from pyLuogu.transport import preview
+from pyLuogu.types import ProblemSettings
+
+CSRF_PAGE = '<html><head><meta name="csrf-token" content="token-{}"></head></html>'
+
+def make_handler(log, responses):
+    """Replays ``responses`` (one per API request) and serves CSRF pages on ``/``."""
+    responses = list(responses)
+    csrf_count = [0]
+
+    def handler(request: httpx.Request):
+        log.append(request)
+        if request.url.path == "/":
+            csrf_count[0] += 1
+            return httpx.Response(200, text=CSRF_PAGE.format(csrf_count[0]))
+        return responses.pop(0)
+
+    return handler
+
+def mock_sync(api: luoguAPI, handler):
+    api.transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+def mock_async(api: asyncLuoguAPI, handler):
+    api.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+class TestTransport(unittest.TestCase):
+
+    def test_unwraps_current_data(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [
+            httpx.Response(200, json={"currentData": {"tags": [], "types": []}}),
+        ]))
+        res = api.get_tags()
+        self.assertEqual(res.tags, [])
+        self.assertEqual(str(log[0].url), "https://www.luogu.com.cn/_lfe/tags")
+        self.assertNotIn("x-csrf-token", log[0].headers)
+
+    def test_json_error_codes(self):
+        api = luoguAPI()
+        mock_sync(api, make_handler([], [
+            httpx.Response(200, json={"code": 404}),
+            httpx.Response(200, json={"code": 403, "currentData": {"errorMessage": "no"}}),
+        ]))
+        with self.assertRaises(NotFoundError):
+            api.get_tags()
+        with self.assertRaises(ForbiddenError):
+            api.get_tags()
+
+    def test_c3vk_challenge_is_answered(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [
+            httpx.Response(200, text='<script>document.cookie="C3VK=abc; path=/";</script>'),
+            httpx.Response(200, json={"currentData": {"tags": [], "types": []}}),
+        ]))
+        api.get_tags()
+        self.assertEqual(api.cookies["C3VK"], "abc")
+        self.assertIn("C3VK=abc", log[1].headers["cookie"])
+
+    def test_stale_csrf_is_refreshed_before_retry(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [
+            httpx.Response(403, json={"errorMessage": "csrf"}),
+            httpx.Response(200, json={"_empty": True}),
+        ]))
+        self.assertTrue(api.delete_problem("U1"))
+        posts = [x for x in log if x.method == "POST"]
+        self.assertEqual(posts[0].headers["x-csrf-token"], "token-1")
+        self.assertEqual(posts[1].headers["x-csrf-token"], "token-2")
+        self.assertEqual(api.metrics.stats()["sends"], 2)
+
+    def test_settings_are_encoded_once_per_write(self):
+        log = []
+        api = luoguAPI()
+        mock_sync(api, make_handler(log, [
+            httpx.Response(403, json={"errorMessage": "csrf"}),
+            httpx.Response(200, json={"pid": "U1"}),
+        ]))
+        settings = ProblemSettings({"title": "中文", "tags": [1, 2]})
+        with mock.patch("pyLuogu.transport.json_dumps_bytes", wraps=json_dumps_bytes) as encode:
+            api.update_problem_settings("U1", settings)
+        encode.assert_called_once()
+        posts = [x for x in log if x.method == "POST"]
+        self.assertEqual(posts[0].content, posts[1].content)
+        self.assertEqual(posts[1].headers["content-type"], "application/json")
+        self.assertEqual(json.loads(posts[1].content)["settings"], {"title": "中文", "tags": [1, 2]})
+
+    def test_async_stale_csrf_is_refreshed_before_retry(self):
+        log = []
+        api = asyncLuoguAPI()
+        mock_async(api, make_handler(log, [
+            httpx.Response(403, json={"errorMessage": "csrf"}),
+            httpx.Response(200, json={"_empty": True}),
+        ]))
+        self.assertTrue(asyncio.run(api.delete_problem("U1")))
+        posts = [x for x in log if x.method == "POST"]
+        self.assertEqual(posts[1].headers["x-csrf-token"], "token-2")
+
+    def test_async_identical_gets_are_coalesced(self):
+        log = []
+
+        async def handler(request: httpx.Request):
+            log.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"currentData": {"tags": [{"id": 1}], "types": []}})
+
+        async def main():
+            api = asyncLuoguAPI()
+            mock_async(api, handler)
+            results = await asyncio.gather(*[api.get_tags() for _ in range(6)])
+            return api, results
+
+        api, results = asyncio.run(main())
+        self.assertEqual(len(log), 1)
+        self.assertEqual(api.metrics.stats()["coalesced"], 5)
+        self.assertEqual([x.tags[0].id for x in results], [1] * 6)
+        self.assertIsNot(results[0].tags[0], results[1].tags[0])
+
+    def test_async_cancelled_leader_hands_over_to_follower(self):
+        log = []
+
+        async def handler(request: httpx.Request):
+            log.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"currentData": {"tags": [{"id": 1}], "types": []}})
+
+        async def main():
+            api = asyncLuoguAPI()
+            mock_async(api, handler)
+            leader = asyncio.ensure_future(asyncio.wait_for(api.get_tags(), 0.01))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(api.get_tags())
+            with self.assertRaises(asyncio.TimeoutError):
+                await leader
+            return await follower, follower
+
+        result, follower = asyncio.run(main())
+        self.assertFalse(follower.cancelled())
+        self.assertEqual(result.tags[0].id, 1)
+        self.assertEqual(len(log), 2)
+
+class TestLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.level = logger.level
+
+    def tearDown(self):
+        logger.setLevel(self.level)
+
+    def test_preview_is_bounded(self):
+        self.assertEqual(preview({"a": 1}), '{"a": 1}')
+        text = preview({"cases": list(range(10 ** 6))}, limit=20)
+        self.assertEqual(text, '{"cases": [0, 1, 2, ...')
+
+    def test_no_formatting_below_level(self):
+        logger.setLevel(logging.WARNING)
+        api = luoguAPI()
+        mock_sync(api, make_handler([], [httpx.Response(200, json={"_empty": True})]))
+        with mock.patch("pyLuogu.transport.preview") as patched:
+            api.delete_problem("U1")
+        patched.assert_not_called()
+
+        logger.setLevel(logging.INFO)
+        mock_sync(api, make_handler([], [httpx.Response(200, json={"_empty": True})]))
+        with mock.patch("pyLuogu.transport.preview", return_value="{}") as patched, \
+                self.assertLogs(logger, logging.INFO):
+            api.delete_problem("U1")
+        patched.assert_called_once()
+
+    def test_colored_formatter_keeps_record(self):
+        record = logging.LogRecord("LuoguAPI", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        line = ColoredFormatter("%(message)s").format(record)
+        self.assertIn("hello world", line)
+        self.assertEqual(record.msg, "hello %s")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+import asyncio
+import importlib.util
+import pickle
+import threading
+import time
+import types
+import unittest
+
+import json
+
+from pyLuogu.bits.ultility import (
+    CachePool, InternTable, JsonSerializable, approximate_size, json_dumps, json_dumps_bytes, msgpack_dumps, msgpack_loads
+)
+from pyLuogu.types import ProblemDataRequestResponse, ProblemDetails, ProblemListRequestResponse, Provider, PagedList, UserSummary
+
+class TestJsonSerializable(unittest.TestCase):
+
+    def test_nested_parse(self):
+        problem = ProblemDetails({
+            "pid": "P1000", "tags": [1, 2], "samples": [["1 2", "3"]], "limits": [[1000, 131072]],
+            "provider": {"uid": 1, "name": "kkksc03"}, "content": {"name": "A+B", "user": None},
+            "unknown": object(),
+        })
+        self.assertEqual(problem.samples, [("1 2", "3")])
+        self.assertEqual(problem.limits, [(1000, 131072)])
+        self.assertIsInstance(problem.provider, Provider)
+        self.assertEqual(problem.provider.get().name, "kkksc03")
+        self.assertEqual(problem.content.name, "A+B")
+        self.assertIsNone(problem.content.user)
+        self.assertIsNone(problem.vjudge)
+        self.assertFalse(hasattr(problem, "unknown"))
+        self.assertFalse(hasattr(problem, "__dict__"))
+
+    def test_type_errors(self):
+        with self.assertRaisesRegex(TypeError, "tags Expected a list"):
+            ProblemDetails({"tags": 1})
+        with self.assertRaisesRegex(TypeError, "pid Expected <class 'str'>"):
+            ProblemDetails({"pid": 1})
+        with self.assertRaisesRegex(TypeError, "Expected a dictionary"):
+            ProblemListRequestResponse({"problems": [1]})
+
+    def test_parser_is_compiled_per_class(self):
+        ProblemListRequestResponse({"problems": [{"pid": "P1000"}]})
+        parser = ProblemListRequestResponse.__dict__["__parser__"]
+        ProblemListRequestResponse({"problems": []})
+        self.assertIs(ProblemListRequestResponse.__dict__["__parser__"], parser)
+        self.assertIsNot(ProblemDetails._parser(), parser)
+
+    def test_reparse_keeps_missing_fields(self):
+        user = UserSummary({"uid": 1, "name": "a"})
+        user.parse({"name": "b"})
+        self.assertEqual((user.uid, user.name), (1, "b"))
+
+    def test_to_json(self):
+        problem = ProblemDetails({"pid": "P1000", "limits": [[1000, 128]], "provider": {"id": 1, "name": "t"}})
+        self.assertEqual(problem.to_json(), {
+            "pid": "P1000", "limits": [[1000, 128]], "provider": {"team": {"id": 1, "name": "t"}}
+        })
+
+    def test_direct_encoding_matches_to_json(self):
+        problem = ProblemDetails({"pid": "P1000", "title": "中文", "samples": [["1", "2"]], "tags": [1]})
+        self.assertEqual(json_dumps(problem), json.dumps(problem.to_json()))
+        self.assertEqual(problem.to_json_str(), json_dumps(problem))
+        payload = json_dumps_bytes({"settings": problem, "type": None})
+        self.assertEqual(json.loads(payload), {"settings": problem.to_json(), "type": None})
+        self.assertIn("中文".encode(), payload)
+        with self.assertRaises(TypeError):
+            json_dumps({"x": object()})
+
+    def test_custom_to_json_is_used_for_encoding(self):
+        class Custom(JsonSerializable):
+            __type_dict__ = {"a": int}
+
+            def to_json(self):
+                return {"b": self.a}
+
+        self.assertEqual(json_dumps([Custom({"a": 1})]), '[{"b": 1}]')
+
+    def test_slots(self):
+        from pyLuogu.types import LuoguCookies, PagedList
+        user = UserSummary({"uid": 1})
+        with self.assertRaises(AttributeError):
+            user.unknown = 1
+        self.assertIn("uid", UserSummary.__slots__)
+        self.assertNotIn("pid", ProblemDetails.__slots__)  # inherited from ProblemSketch
+        self.assertEqual(PagedList[UserSummary]({"count": 1}).count, 1)
+        cookies = LuoguCookies({"__client_id": "c", "_uid": "1"})
+        self.assertEqual(cookies.to_json(), {"__client_id": "c", "_uid": "1"})
+        self.assertIn("_uid", str(cookies))
+
+    def test_type_var_items_pass_through(self):
+        page = PagedList({"results": [{"uid": 1}], "count": 1})
+        self.assertEqual(page.results, [{"uid": 1}])
+
+    def test_lazy_parse(self):
+        data = {
+            "problem": {"pid": "P1000", "content": {"name": "A+B"}, "provider": {"uid": 1}},
+            "translations": {"en": {"name": "A+B"}},
+            "recommendations": [{"pid": "P1001"}],
+            "bookmarked": True,
+        }
+        res = ProblemDataRequestResponse(data, lazy=True)
+        self.assertEqual(res.to_json(), ProblemDataRequestResponse(data).to_json())
+
+        res = ProblemDataRequestResponse(data, lazy=True)
+        problem = res.problem
+        self.assertIs(res.problem, problem)  # built once
+        self.assertEqual(problem.content.name, "A+B")
+        self.assertIsInstance(problem.provider, Provider)
+        self.assertEqual(res.recommendations[0].pid, "P1001")
+        res.problem = None
+        self.assertIsNone(res.problem)
+
+    def test_lazy_parse_leaves_model_class_alone(self):
+        data = {"problem": {"pid": "P1000", "content": {"name": "A+B"}}, "bookmarked": True}
+        lazy = ProblemDataRequestResponse(data, lazy=True)
+        eager = ProblemDataRequestResponse(data)
+        # the deferring descriptors live on a generated subclass only
+        self.assertIs(type(ProblemDataRequestResponse.__dict__["problem"]), types.MemberDescriptorType)
+        self.assertIs(type(eager), ProblemDataRequestResponse)
+        self.assertIsInstance(lazy, ProblemDataRequestResponse)
+        self.assertEqual(type(lazy).__name__, "ProblemDataRequestResponse")
+        self.assertIsInstance(lazy.problem, ProblemDetails)
+        copy = pickle.loads(pickle.dumps(lazy))
+        self.assertIs(type(copy), ProblemDataRequestResponse)
+        self.assertEqual(copy.to_json(), eager.to_json())
+
+    def test_lazy_type_errors_are_deferred(self):
+        res = ProblemDataRequestResponse({"problem": {"tags": 1}, "bookmarked": True}, lazy=True)
+        self.assertTrue(res.bookmarked)
+        with self.assertRaisesRegex(TypeError, "tags Expected a list"):
+            res.problem.tags
+
+    def test_trusted_parse(self):
+        data = {"pid": "P1000", "samples": [["1 2", "3"]], "limits": [[1000, 131072]], "content": {"name": "A+B"}}
+        problem = ProblemDetails(data, validate=False)
+        self.assertEqual(problem.to_json(), ProblemDetails(data).to_json())
+        self.assertEqual(problem.samples, [("1 2", "3")])
+        self.assertEqual(problem.content.name, "A+B")
+        # nothing is checked, so bad data goes through unnoticed
+        self.assertEqual(ProblemDetails({"pid": 1000}, validate=False).pid, 1000)
+
+    def test_sampled_validation(self):
+        errors = 0
+        for _ in range(10):
+            try:
+                ProblemDetails({"pid": 1000}, validate=5)
+            except TypeError:
+                errors += 1
+        self.assertEqual(errors, 2)
+        for validate in (0, -1, 2.5, 1.0):
+            with self.assertRaises(ValueError):
+                ProblemDetails({"pid": "P1000"}, validate=validate)
+
+    def test_interning(self):
+        from pyLuogu.types import ActivityRequestResponse
+        page = {"activities": [
+            {"id": 1, "user": {"uid": 1, "name": "a"}},
+            {"id": 2, "user": {"uid": 1, "name": "a"}},
+            {"id": 3, "user": {"uid": 1, "name": "renamed"}},
+            {"id": 4, "user": {"uid": 2, "name": "b"}},
+        ]}
+        users = [a.user for a in ActivityRequestResponse(page).activities]
+        self.assertIsNot(users[0], users[1])
+
+        table = InternTable()
+        with table:
+            users = [a.user for a in ActivityRequestResponse(page).activities]
+            again = ActivityRequestResponse(page).activities[3].user
+        self.assertIs(users[0], users[1])
+        self.assertEqual(users[2].name, "renamed")
+        self.assertIs(again, users[3])
+        self.assertEqual(table.stats(), {"entries": 2, "hits": 3, "misses": 5})
+
+    def test_interning_lazy_fields(self):
+        from pyLuogu.types import ActivityRequestResponse
+        page = {"activities": [{"id": i, "user": {"uid": 1, "name": "a"}} for i in range(3)]}
+        table = InternTable()
+        with table:
+            res = ActivityRequestResponse(page, lazy=True)
+        # built after the block, but still interned in the table in effect when parsed
+        users = [a.user for a in res.activities]
+        self.assertIs(users[0], users[1])
+        self.assertIs(users[1], users[2])
+        self.assertEqual(table.stats()["hits"], 2)
+        self.assertIsNot(ActivityRequestResponse(page, lazy=True).activities[0].user, users[0])
+
+    def test_interning_custom_constructor(self):
+        data = {"pid": "P1000", "provider": {"uid": 1, "name": "a"}}
+        with InternTable():
+            first, second = ProblemDetails(data), ProblemDetails(data)
+        self.assertIs(first.provider, second.provider)
+        self.assertEqual(first.provider.get().name, "a")
+
+    def test_pickle(self):
+        from pyLuogu.types import LuoguCookies
+        data = {"pid": "P1000", "samples": [["1 2", "3"]], "provider": {"uid": 1}, "content": {"name": "A+B"}}
+        problem = ProblemDetails(data)
+        for protocol in (2, pickle.HIGHEST_PROTOCOL):
+            copy = pickle.loads(pickle.dumps(problem, protocol))
+            self.assertEqual(copy.to_json(), problem.to_json())
+            self.assertEqual(copy.samples, [("1 2", "3")])
+        self.assertNotIn(b"samples", pickle.dumps(problem))  # positional, no field names
+
+        with InternTable():
+            pair = [ProblemDetails(data), ProblemDetails(data)]
+        pair = pickle.loads(pickle.dumps(pair))
+        self.assertIs(pair[0].provider, pair[1].provider)
+
+        cookies = pickle.loads(pickle.dumps(LuoguCookies({"__client_id": "c", "_uid": "1"})))
+        self.assertEqual(cookies.to_json(), {"__client_id": "c", "_uid": "1"})
+
+    @unittest.skipUnless(importlib.util.find_spec("msgpack"), "msgpack is not installed")
+    def test_msgpack(self):
+        from pyLuogu.types import ProblemSummary
+        page = ProblemListRequestResponse({"problems": [{"pid": "P1000", "tags": [1]}], "count": 1})
+        copy = ProblemListRequestResponse.from_msgpack(page.to_msgpack())
+        self.assertIsInstance(copy.problems[0], ProblemSummary)
+        self.assertEqual(copy.to_json(), page.to_json())
+
+        problem = ProblemDetails({"pid": "P1000", "limits": [[1000, 131072]], "provider": {"id": 2}})
+        [copy] = msgpack_loads(msgpack_dumps([problem]), [ProblemDetails])
+        self.assertEqual(copy.limits, [(1000, 131072)])
+        self.assertEqual(copy.provider.get().id, 2)
+
+class TestCachePool(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        pool = CachePool[int](max_entries=2)
+        pool.store("a", 1)
+        pool.store("b", 2)
+        pool.load("a")
+        pool.store("c", 3)
+        self.assertNotIn("b", pool)
+        self.assertEqual(pool.load("a"), 1)
+        self.assertEqual(pool.stats()["evictions"], 1)
+
+    def test_lfu_eviction_keeps_new_item(self):
+        pool = CachePool[int](max_entries=2, eviction="lfu")
+        pool.store("a", 1)
+        pool.store("b", 2)
+        for _ in range(3):
+            pool.load("a")
+        pool.load("b")
+        pool.store("c", 3)
+        self.assertIn("a", pool)
+        self.assertIn("c", pool)
+        self.assertNotIn("b", pool)
+
+    def test_byte_budget(self):
+        pool = CachePool[bytes](max_bytes=3 * approximate_size(b"x" * 100))
+        for key in "abcdef":
+            pool.store(key, b"x" * 100)
+        self.assertEqual(len(pool), 3)
+        self.assertLessEqual(pool.stats()["bytes"], pool.max_bytes)
+        pool.remove("f")
+        pool.clear()
+        self.assertEqual(pool.stats()["bytes"], 0)
+
+    def test_unbounded_pool_skips_sizing(self):
+        sizes = []
+        pool = CachePool[bytes](size_function=lambda value: sizes.append(value) or len(value))
+        pool.store("a", b"x" * 100)
+        self.assertEqual((sizes, pool.stats()["bytes"]), ([], 0))
+        pool.max_bytes = 150
+        pool.store("b", b"x" * 100)
+        self.assertEqual(sizes, [b"x" * 100])
+
+    def test_sweep_expired(self):
+        pool = CachePool[int](default_cache_duration=0.01, sweep_interval=0)
+        pool.store("a", 1)
+        time.sleep(0.02)
+        pool.store("b", 2)
+        self.assertNotIn("a", pool)
+        self.assertEqual(pool.stats()["expirations"], 1)
+
+    def test_hits_and_misses(self):
+        pool = CachePool[str](default_load_function=lambda key: key * 2)
+        self.assertEqual(pool.load("ab"), "abab")
+        self.assertEqual(pool.load("ab"), "abab")
+        stats = pool.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_threads(self):
+        for eviction in ("lru", "lfu"):
+            pool = CachePool[bytes](max_entries=4, eviction=eviction, sweep_interval=0)
+            errors = []
+
+            def work(seed):
+                try:
+                    for i in range(2000):
+                        key = str((seed * 7 + i) % 10)
+                        if pool.load(key) is None:
+                            pool.store(key, key.encode() * (i % 5 + 1))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            self.assertLessEqual(len(pool), 4)
+            self.assertEqual(pool.stats()["bytes"], sum(item.size for item in pool._cache.values()))
+
+class TestAsyncCachePool(unittest.TestCase):
+
+    def test_single_flight_async_loader(self):
+        calls = []
+
+        async def loader(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        async def main():
+            pool = CachePool[str](default_load_function=loader)
+            return await asyncio.gather(*[pool.async_load("p1000") for _ in range(10)])
+
+        self.assertEqual(asyncio.run(main()), ["P1000"] * 10)
+        self.assertEqual(calls, ["p1000"])
+
+    def test_stale_while_revalidate(self):
+        versions = iter(range(10))
+
+        async def loader(key):
+            await asyncio.sleep(0.01)
+            return next(versions)
+
+        async def main():
+            pool = CachePool[int](default_cache_duration=0.1, default_load_function=loader, stale_grace=10)
+            first = await pool.async_load("a")
+            await asyncio.sleep(0.12)
+            stale = await pool.async_load("a")
+            await asyncio.sleep(0.03)
+            fresh = await pool.async_load("a")
+            return first, stale, fresh, pool.stats()
+
+        first, stale, fresh, stats = asyncio.run(main())
+        self.assertEqual((first, stale, fresh), (0, 0, 1))
+        self.assertEqual(stats["stale_hits"], 1)
+
+    def test_sync_load_rejects_async_loader(self):
+        async def loader(key):
+            return key
+
+        pool = CachePool[str](default_load_function=loader)
+        with self.assertRaises(TypeError):
+            pool.load("a")
+
+if __name__ == '__main__':
+    unittest.main()